@@ -0,0 +1,180 @@
+"""
+contains the inputs and results of bulk (write) operations
+"""
+
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterable, Sequence
+from datetime import timedelta
+from typing import Any, Generic, TypeVar
+
+from aiohttp import ClientResponseError
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field
+
+Entity = TypeVar("Entity", bound=BaseModel)
+
+
+def describe_failure(error: Exception) -> str:
+    """
+    returns a short reason (e.g. 'HTTP 409' or 'TimeoutError') by which the failures of a bulk operation are counted
+    """
+    if isinstance(error, ClientResponseError):
+        return f"HTTP {error.status}"
+    return type(error).__name__
+
+
+class BulkOperationSummary(BaseModel):
+    """
+    how many items of a bulk operation succeeded and how long it took
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    number_of_items: int
+    number_of_successes: int
+    number_of_failures: int
+    duration: timedelta
+    failures_by_reason: dict[str, int] = Field(default_factory=dict)
+    """
+    the number of failures per reason, e.g. {'HTTP 409': 2, 'TimeoutError': 1}
+    """
+
+    @classmethod
+    def create(cls, failure_reasons: Iterable[str | None], duration: timedelta) -> "BulkOperationSummary":
+        """
+        creates the summary from one failure reason per item (None for items that succeeded)
+        """
+        reasons = list(failure_reasons)
+        failures_by_reason = Counter(reason for reason in reasons if reason is not None)
+        return cls(
+            number_of_items=len(reasons),
+            number_of_successes=len(reasons) - failures_by_reason.total(),
+            number_of_failures=failures_by_reason.total(),
+            duration=duration,
+            failures_by_reason=dict(failures_by_reason),
+        )
+
+    @property
+    def items_per_second(self) -> float:
+        """
+        the throughput of the bulk operation
+        """
+        seconds = self.duration.total_seconds()
+        if seconds <= 0:
+            return float(self.number_of_items)
+        return self.number_of_items / seconds
+
+
+class PlattformfaehigkeitChange(BaseModel):
+    """
+    the arguments of a single set_plattformfaehigkeit call
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    external_ao_id: str
+    change_date: AwareDatetime
+    is_plattformfaehig: bool = True
+
+
+class PlattformfaehigkeitOutcome(BaseModel):
+    """
+    the outcome of a single change in set_plattformfaehigkeit_many
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    change: PlattformfaehigkeitChange
+    success: bool
+    """
+    true if the change has been accepted and its event (if any) has been handled in time
+    """
+    event_id: uuid.UUID | None = None
+    """
+    the x-event-id returned by TMDS (if any)
+    """
+    error: str | None = None
+    """
+    a description of the error if the POST request failed; None if it succeeded (even if the event timed out)
+    """
+
+
+class BulkPlattformfaehigkeitResult(BaseModel):
+    """
+    the result of set_plattformfaehigkeit_many
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    outcomes: list[PlattformfaehigkeitOutcome]
+    """
+    one outcome per change, in the order of the changes
+    """
+    summary: BulkOperationSummary
+
+
+class BulkUpdateItem(BaseModel, Generic[Entity]):
+    """
+    the arguments of a single update (e.g. update_zaehler) in a bulk update
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    entity_id: uuid.UUID | str
+    changes: Sequence[Callable[[Entity], None]] | Sequence[dict[str, Any]]
+    """
+    either callables that modify the entity or a JSON patch (a list of RFC6902 operations)
+    """
+    keydate: AwareDatetime | None = None
+
+
+class BulkUpdateOutcome(BaseModel, Generic[Entity]):
+    """
+    the outcome of a single item of a bulk update
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    item: BulkUpdateItem[Entity]
+    entity: Entity | None = None
+    """
+    the entity after the update (None, if the update failed)
+    """
+    has_been_patched: bool = False
+    """
+    false if the update failed or if the changes did not change anything, so that no PATCH request was necessary
+    """
+    error: str | None = None
+
+    @property
+    def success(self) -> bool:
+        """
+        true if the entity is up to date (no matter whether it had to be patched or not)
+        """
+        return self.error is None
+
+
+class BulkUpdateResult(BaseModel, Generic[Entity]):
+    """
+    the result of a bulk update (e.g. update_zaehler_many)
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    outcomes: list[BulkUpdateOutcome[Entity]]
+    """
+    one outcome per item, in the order of the items
+    """
+    summary: BulkOperationSummary
+
+
+__all__ = [
+    "BulkOperationSummary",
+    "BulkPlattformfaehigkeitResult",
+    "BulkUpdateItem",
+    "BulkUpdateOutcome",
+    "BulkUpdateResult",
+    "PlattformfaehigkeitChange",
+    "PlattformfaehigkeitOutcome",
+    "describe_failure",
+]
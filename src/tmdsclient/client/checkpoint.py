@@ -0,0 +1,93 @@
+"""
+contains a local, append-only journal of the entities that have already been downloaded
+"""
+
+import logging
+import os
+import uuid
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
+
+_logger = logging.getLogger(__name__)
+
+
+class DownloadCheckpoint:
+    """
+    An append-only file that contains one ID per line for every entity that has been completely processed.
+    Each ID is flushed as soon as it's marked as completed, so that the file survives a crash or restart of the process.
+    A line that has only been written partially (e.g. because the process was killed) is ignored.
+    Use the checkpoint as context manager or call close() when you're done.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        """
+        :param path: the location of the checkpoint file; it's created if it does not exist yet
+        :param fsync: if true, every ID is also synced to disk (slower, but survives a crash of the OS, not only of the
+        process)
+        """
+        self._path = path
+        self._fsync = fsync
+        self._file: IO[str] | None = None
+
+    def load(self) -> set[uuid.UUID]:
+        """
+        returns the IDs that have been marked as completed (in this or any previous run)
+        """
+        if not self._path.exists():
+            return set()
+        result: set[uuid.UUID] = set()
+        with open(self._path, encoding="utf-8") as checkpoint_file:
+            for line in checkpoint_file:
+                if not line.strip():
+                    continue
+                try:
+                    result.add(uuid.UUID(line.strip()))
+                except ValueError:
+                    _logger.warning("Ignoring incomplete line '%s' of checkpoint %s", line.strip(), self._path)
+        return result
+
+    def mark_as_completed(self, entity_id: uuid.UUID) -> None:
+        """
+        appends the entity_id to the checkpoint file
+        """
+        if self._file is None:
+            self._file = open(self._path, "a", encoding="utf-8")  # pylint:disable=consider-using-with
+            if self._last_line_is_incomplete():
+                self._file.write("\n")
+        self._file.write(f"{entity_id}\n")
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def _last_line_is_incomplete(self) -> bool:
+        """
+        returns true if the previous run crashed while writing the last line
+        """
+        with open(self._path, "rb") as checkpoint_file:
+            if checkpoint_file.seek(0, os.SEEK_END) == 0:
+                return False
+            checkpoint_file.seek(-1, os.SEEK_END)
+            return checkpoint_file.read(1) != b"\n"
+
+    def close(self) -> None:
+        """
+        closes the underlying file
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+__all__ = ["DownloadCheckpoint"]
@@ -0,0 +1,148 @@
+"""
+contains a circuit breaker that lets requests fail fast while TMDS is degraded
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from enum import StrEnum
+
+from aiohttp import ClientConnectionError, ClientResponseError
+from pydantic import BaseModel, ConfigDict, Field
+
+_logger = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    """
+    the state of a circuit breaker
+    """
+
+    CLOSED = "CLOSED"  #: requests are sent as usual
+    OPEN = "OPEN"  #: requests fail immediately without being sent
+    HALF_OPEN = "HALF_OPEN"  #: a limited number of trial requests is sent to check whether TMDS has recovered
+
+
+class CircuitBreakerSettings(BaseModel):
+    """
+    configures when the circuit breaker opens and how it recovers
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    failure_threshold: int = Field(default=5, ge=1)
+    """
+    the circuit opens after this many failures (timeouts, connection errors or 5xx responses) in a row
+    """
+    open_duration: timedelta = timedelta(seconds=30)
+    """
+    how long the circuit stays open before trial requests are let through
+    """
+    max_trial_requests: int = Field(default=1, ge=1)
+    """
+    the number of trial requests that may be in flight at the same time while the circuit is half open
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    raised instead of sending a request while the circuit is open
+    """
+
+    def __init__(self, retry_after: timedelta):
+        super().__init__(f"TMDS seems to be degraded; no requests are sent for another {retry_after}")
+        self.retry_after = retry_after
+        """
+        the time until the next trial request is let through
+        """
+
+
+def _is_failure(error: BaseException) -> bool:
+    """
+    returns true if the error is a sign that TMDS is degraded (other errors, e.g. 404, do not count as failure)
+    """
+    if isinstance(error, TimeoutError | ClientConnectionError):
+        return True
+    return isinstance(error, ClientResponseError) and error.status >= 500
+
+
+class CircuitBreaker:
+    """
+    Counts the failures of consecutive requests. After failure_threshold failures in a row, the circuit opens and all
+    requests fail with a CircuitOpenError without being sent. After open_duration, the circuit is half open: up to
+    max_trial_requests requests are let through. If a trial request succeeds, the circuit closes again; if it fails,
+    the circuit opens for another open_duration.
+    """
+
+    def __init__(self, settings: CircuitBreakerSettings | None = None):
+        self._settings = settings or CircuitBreakerSettings()
+        self._failures_in_a_row = 0
+        self._opened_at: float | None = None
+        self._trial_requests_in_flight = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """
+        the current state; e.g. health checks and schedulers may back off as long as it's not CLOSED
+        """
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+        if time.monotonic() - self._opened_at < self._settings.open_duration.total_seconds():
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    @property
+    def retry_after(self) -> timedelta:
+        """
+        the time until the next trial request is let through (zero, if the circuit is not open)
+        """
+        if self._opened_at is None:
+            return timedelta(0)
+        remaining = self._settings.open_duration.total_seconds() - (time.monotonic() - self._opened_at)
+        return timedelta(seconds=max(remaining, 0))
+
+    def _open(self) -> None:
+        if self._opened_at is None:
+            _logger.warning("Opening the circuit after %i failures in a row", self._failures_in_a_row)
+        self._opened_at = time.monotonic()
+
+    def _close(self) -> None:
+        if self._opened_at is not None:
+            _logger.info("Closing the circuit; TMDS has recovered")
+        self._opened_at = None
+        self._failures_in_a_row = 0
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Wrap a request with this context manager: It raises a CircuitOpenError if the request must not be sent and
+        records whether the request failed.
+        """
+        state = self.state
+        is_trial_request = state == CircuitState.HALF_OPEN
+        if state == CircuitState.OPEN or (
+            is_trial_request and self._trial_requests_in_flight >= self._settings.max_trial_requests
+        ):
+            raise CircuitOpenError(self.retry_after)
+        if is_trial_request:
+            self._trial_requests_in_flight += 1
+        try:
+            yield
+        except Exception as error:
+            if not _is_failure(error):
+                self._close()
+                raise
+            self._failures_in_a_row += 1
+            if is_trial_request or self._failures_in_a_row >= self._settings.failure_threshold:
+                self._open()
+            raise
+        else:
+            self._close()
+        finally:
+            if is_trial_request:
+                self._trial_requests_in_flight -= 1
+
+
+__all__ = ["CircuitBreaker", "CircuitBreakerSettings", "CircuitOpenError", "CircuitState"]
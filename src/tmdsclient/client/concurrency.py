@@ -0,0 +1,292 @@
+"""
+helpers to run many requests concurrently while keeping a bounded number of them in flight
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Coroutine, Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal, TypeVar, overload
+
+from aiohttp import ClientResponseError
+from pydantic import AwareDatetime, BaseModel, ConfigDict
+
+from tmdsclient.client.retry import RetryPolicy, _is_retry_worthy
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ConcurrencyLimitChange(BaseModel):
+    """
+    a single change of the limit of an AdaptiveConcurrencyLimiter
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    timestamp: AwareDatetime
+    old_limit: int
+    new_limit: int
+    reason: str
+    """
+    e.g. 'HTTP 502' or 'timeout' (for decreases) or 'healthy' (for increases)
+    """
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    An AIMD (additive increase, multiplicative decrease) limit for the number of concurrent requests.
+    Every time as many healthy responses as the current limit have been observed in a row, the limit is increased by
+    increase_step. A response is healthy if it arrived without error and (if a latency_threshold is set) in time.
+    Responses with a 5xx status code and timeouts are signs of an overloaded server; they multiply the limit with
+    decrease_factor. All the errors which are caused by the requests that were in flight at the time the server was
+    overloaded only lead to one decrease.
+    Pass one instance to e.g. get_all_netzvertraege and inspect .limit and .limit_changes to see what happened.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        increase_step: int = 1,
+        decrease_factor: float = 0.5,
+        latency_threshold: timedelta | None = None,
+        max_recorded_changes: int = 1000,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                f"Expected 1 <= min_limit <= initial_limit <= max_limit but got {min_limit, initial_limit, max_limit}"
+            )
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f"The decrease_factor must be between 0 and 1 but was {decrease_factor}")
+        if increase_step < 1:
+            raise ValueError(f"The increase_step must be at least 1 but was {increase_step}")
+        self._limit = initial_limit
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase_step = increase_step
+        self._decrease_factor = decrease_factor
+        self._latency_threshold_seconds = latency_threshold.total_seconds() if latency_threshold is not None else None
+        self._healthy_in_a_row = 0
+        self._results_since_last_decrease: int | None = None  # None means: there has not been any decrease yet
+        self._limit_changes: deque[ConcurrencyLimitChange] = deque(maxlen=max_recorded_changes)
+
+    @property
+    def limit(self) -> int:
+        """
+        the number of requests that may currently be in flight at the same time
+        """
+        return self._limit
+
+    @property
+    def limit_changes(self) -> list[ConcurrencyLimitChange]:
+        """
+        the (most recent) changes of the limit, oldest first
+        """
+        return list(self._limit_changes)
+
+    def _set_limit(self, new_limit: int, reason: str) -> None:
+        new_limit = max(self._min_limit, min(self._max_limit, new_limit))
+        if new_limit == self._limit:
+            return
+        _logger.info("Changing the concurrency limit from %i to %i (%s)", self._limit, new_limit, reason)
+        self._limit_changes.append(
+            ConcurrencyLimitChange(
+                timestamp=datetime.now(UTC), old_limit=self._limit, new_limit=new_limit, reason=reason
+            )
+        )
+        self._limit = new_limit
+
+    def record_success(self, latency: float) -> None:
+        """
+        record a successful response which took latency seconds
+        """
+        if self._results_since_last_decrease is not None:
+            self._results_since_last_decrease += 1
+        if self._latency_threshold_seconds is not None and latency > self._latency_threshold_seconds:
+            self._healthy_in_a_row = 0
+            return
+        self._healthy_in_a_row += 1
+        if self._healthy_in_a_row >= self._limit:
+            self._healthy_in_a_row = 0
+            self._set_limit(self._limit + self._increase_step, reason="healthy")
+
+    def record_error(self, error: Exception) -> None:
+        """
+        record a failed request; only timeouts and server errors (5xx) decrease the limit, other errors are ignored
+        """
+        reason: str
+        if isinstance(error, TimeoutError):
+            reason = "timeout"
+        elif isinstance(error, ClientResponseError) and error.status >= 500:
+            reason = f"HTTP {error.status}"
+        else:
+            return
+        self._healthy_in_a_row = 0
+        if self._results_since_last_decrease is not None and self._results_since_last_decrease < self._limit:
+            # the error was probably caused by a request that was already in flight at the time of the last decrease
+            self._results_since_last_decrease += 1
+            return
+        self._results_since_last_decrease = 0
+        self._set_limit(int(self._limit * self._decrease_factor), reason=reason)
+
+
+@overload
+def run_with_bounded_concurrency(
+    items: Iterable[T],
+    worker: Callable[[T], Coroutine[Any, Any, R]],
+    max_concurrency: int | AdaptiveConcurrencyLimiter,
+    ordered: bool = False,
+    return_exceptions: Literal[False] = False,
+    *,
+    retry_policy: RetryPolicy | None = None,
+    is_retryable: Callable[[Exception], bool] = _is_retry_worthy,
+) -> AsyncGenerator[tuple[T, R], None]: ...
+
+
+@overload
+def run_with_bounded_concurrency(
+    items: Iterable[T],
+    worker: Callable[[T], Coroutine[Any, Any, R]],
+    max_concurrency: int | AdaptiveConcurrencyLimiter,
+    ordered: bool = False,
+    *,
+    return_exceptions: Literal[True],
+    retry_policy: RetryPolicy | None = None,
+    is_retryable: Callable[[Exception], bool] = _is_retry_worthy,
+) -> AsyncGenerator[tuple[T, R | Exception], None]: ...
+
+
+async def run_with_bounded_concurrency(
+    items: Iterable[T],
+    worker: Callable[[T], Coroutine[Any, Any, R]],
+    max_concurrency: int | AdaptiveConcurrencyLimiter,
+    ordered: bool = False,
+    return_exceptions: bool = False,
+    *,
+    retry_policy: RetryPolicy | None = None,
+    is_retryable: Callable[[Exception], bool] = _is_retry_worthy,
+) -> AsyncGenerator[tuple[T, R | Exception], None]:
+    """
+    Calls worker(item) for every item and yields (item, result) pairs.
+    Other than chunking the items and awaiting asyncio.gather for each chunk, this keeps max_concurrency calls in
+    flight all the time: As soon as one call finishes, the next item is started. A single slow request does not leave
+    the other slots idle.
+    By default the results are yielded in the order in which they finish. With ordered=True they are yielded in the
+    order of the items; results that finish ahead of a slower predecessor are buffered until it's their turn.
+    Instead of a fixed max_concurrency you may pass an AdaptiveConcurrencyLimiter, which is fed with the latency and
+    errors of the worker calls and decides how many calls may be in flight.
+    If a retry_policy is given, items for which the worker raised an error that is_retryable are retried (and only
+    those items). While an item waits for its backoff to pass, it does not occupy a slot; once the backoff has passed,
+    it is started before any new item.
+    Like in asyncio.gather, return_exceptions=True yields exceptions raised by the worker as results instead of raising
+    them. Otherwise, the first exception (that is not retried) is raised and all calls in flight are cancelled.
+    """
+    if isinstance(max_concurrency, int) and max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1 but was {max_concurrency}")
+
+    def current_limit() -> int:
+        if isinstance(max_concurrency, AdaptiveConcurrencyLimiter):
+            return max_concurrency.limit
+        return max_concurrency
+
+    async def timed_worker(item: T, limiter: AdaptiveConcurrencyLimiter) -> R:
+        started = time.monotonic()
+        try:
+            result = await worker(item)
+        except Exception as error:
+            limiter.record_error(error)
+            raise
+        limiter.record_success(time.monotonic() - started)
+        return result
+
+    def start(item: T) -> asyncio.Task[R]:
+        if isinstance(max_concurrency, AdaptiveConcurrencyLimiter):
+            return asyncio.create_task(timed_worker(item, max_concurrency))
+        return asyncio.create_task(worker(item))
+
+    item_iterator = iter(enumerate(items))
+    items_are_exhausted = False
+    items_started = 0
+    retries_so_far = 0
+    # the values are (index, item, number of the attempt)
+    in_flight: dict[asyncio.Task[R], tuple[int, T, int]] = {}
+    backing_off: dict[asyncio.Task[None], tuple[int, T, int]] = {}
+    ready_for_retry: deque[tuple[int, T, int]] = deque()
+    finished_ahead_of_turn: dict[int, tuple[T, R | Exception]] = {}
+    next_index_to_yield = 0
+    try:
+        while True:
+            while len(in_flight) < current_limit():
+                if ready_for_retry:
+                    index, item, attempt = ready_for_retry.popleft()
+                elif not items_are_exhausted:
+                    try:
+                        index, item = next(item_iterator)
+                    except StopIteration:
+                        items_are_exhausted = True
+                        break
+                    attempt = 1
+                    items_started += 1
+                else:
+                    break
+                in_flight[start(item)] = (index, item, attempt)
+            if not in_flight and not backing_off:
+                break
+            done, _ = await asyncio.wait([*in_flight, *backing_off], return_when=asyncio.FIRST_COMPLETED)
+            for backoff_task in [t for t in backing_off if t in done]:
+                ready_for_retry.append(backing_off.pop(backoff_task))
+            for task in sorted((t for t in in_flight if t in done), key=lambda t: in_flight[t][0]):
+                index, item, attempt = in_flight[task]
+                result: R | Exception
+                try:
+                    result = task.result()
+                except Exception as error:  # pylint:disable=broad-exception-caught
+                    if (
+                        retry_policy is not None
+                        and attempt < retry_policy.max_attempts
+                        and is_retryable(error)
+                        and retry_policy.budget_allows_retry(retries_so_far, items_started)
+                    ):
+                        retries_so_far += 1
+                        backoff = retry_policy.get_backoff(attempt)
+                        _logger.warning(
+                            "Attempt %i for %s failed (%s); Retrying in %.1fs",
+                            attempt,
+                            item,
+                            error,
+                            backoff.total_seconds(),
+                        )
+                        del in_flight[task]
+                        backing_off[asyncio.create_task(asyncio.sleep(backoff.total_seconds()))] = (
+                            index,
+                            item,
+                            attempt + 1,
+                        )
+                        continue
+                    if not return_exceptions:
+                        raise
+                    result = error
+                del in_flight[task]
+                if not ordered:
+                    yield item, result
+                    continue
+                finished_ahead_of_turn[index] = (item, result)
+                while next_index_to_yield in finished_ahead_of_turn:
+                    yield finished_ahead_of_turn.pop(next_index_to_yield)
+                    next_index_to_yield += 1
+    finally:
+        # happens if the worker raised or the consumer stopped iterating early
+        pending_tasks: list[asyncio.Task[Any]] = [*in_flight, *backing_off]
+        for pending_task in pending_tasks:
+            pending_task.cancel()
+        if pending_tasks:
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+
+__all__ = ["AdaptiveConcurrencyLimiter", "ConcurrencyLimitChange", "run_with_bounded_concurrency"]
@@ -2,12 +2,18 @@
 contains a class with which the TMDS client is instantiated/configured
 """
 
+import ssl
+from datetime import timedelta
 from typing import Any, Self
 
-from pydantic import BaseModel, ConfigDict, HttpUrl, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, field_validator, model_validator
 from yarl import URL
 
+from .circuit_breaker import CircuitBreakerSettings
+from .events import EventTrackingSettings
 from .oauth import token_is_valid
+from .rate_limit import RateLimitSettings
+from .write_queue import WriteCoalescingSettings
 
 
 class TmdsConfig(BaseModel):
@@ -22,6 +28,57 @@ class TmdsConfig(BaseModel):
     e.g. URL("https://techmasterdata.xtk-stage.de/")
     """
 
+    connection_limit: int = Field(default=100, ge=0)
+    """
+    the maximum number of simultaneously open connections (0 means: no limit)
+    """
+    connection_limit_per_host: int = Field(default=0, ge=0)
+    """
+    the maximum number of simultaneously open connections to the same host (0 means: no limit)
+    """
+    keepalive_timeout: timedelta = timedelta(seconds=15)
+    """
+    how long an idle connection is kept open to be reused by the next request
+    """
+    dns_cache_ttl: timedelta | None = timedelta(seconds=10)
+    """
+    how long resolved host names are cached (None means: forever)
+    """
+    total_timeout: timedelta | None = timedelta(seconds=60)
+    """
+    the maximum duration of a request, including connecting and reading the response (None means: no timeout)
+    """
+    connect_timeout: timedelta | None = None
+    """
+    the maximum duration to acquire a connection from the pool or to establish a new one (None means: no timeout)
+    """
+    read_timeout: timedelta | None = None
+    """
+    the maximum time between two chunks of the response being read (None means: no timeout)
+    """
+    ssl_context: ssl.SSLContext | None = None
+    """
+    The TLS context used for all connections (e.g. to trust a custom CA). If None, a default context is created once
+    per client and reused for every session, so that the CA certificates are not loaded again when a session is
+    re-created.
+    """
+    event_tracking: EventTrackingSettings = EventTrackingSettings()
+    """
+    how the client waits for events to be handled (polling intervals, timeout and backpressure)
+    """
+    rate_limit: RateLimitSettings | None = None
+    """
+    limits the rate of requests sent to TMDS (overall and optionally per endpoint family); None means: no limit
+    """
+    circuit_breaker: CircuitBreakerSettings | None = None
+    """
+    if set, requests fail fast (without being sent) after a run of timeouts or server errors; None means: disabled
+    """
+    write_coalescing: WriteCoalescingSettings = WriteCoalescingSettings()
+    """
+    how the queue_*_update methods combine concurrent updates of the same entity
+    """
+
     # pylint:disable=no-self-argument
     @field_validator("server_url")
     def validate_url(cls, value: Any) -> URL:
@@ -0,0 +1,201 @@
+"""
+contains a persistent cache for the (undecoded) entities downloaded from TMDS
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from pydantic import BaseModel, ConfigDict
+
+_logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    keydate TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (entity_type, entity_id, keydate)
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS entities_by_stored_at ON entities (stored_at)"
+
+
+class CachedEntity(BaseModel):
+    """
+    a response body together with the validators that were returned along with it
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    body: bytes
+    etag: str | None = None
+    """
+    value of the ETag response header (if any)
+    """
+    last_modified: str | None = None
+    """
+    value of the Last-Modified response header (if any)
+    """
+    stored_at: float
+    """
+    unix timestamp of the moment in which the body has been stored or revalidated the last time
+    """
+
+    @property
+    def can_be_revalidated(self) -> bool:
+        """
+        true iff the server returned a validator which can be used for a conditional GET
+        """
+        return self.etag is not None or self.last_modified is not None
+
+    def get_conditional_headers(self) -> dict[str, str]:
+        """
+        returns the If-None-Match/If-Modified-Since headers for a conditional GET
+        """
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class SqliteEntityCache:
+    """
+    A persistent cache for response bodies, stored in an SQLite database.
+    The entries are keyed by entity type (e.g. 'Marktlokation'), entity ID and keydate (empty string if none).
+    If the server returned an ETag or Last-Modified header, cached entries are revalidated with a conditional GET on
+    every access (which is cheap when the entity did not change: the server responds 304 without a body).
+    Otherwise, cached entries are considered fresh for the given ttl and re-downloaded afterward.
+    Because the cache lives in a file, a restarted process (or another process) starts with a warm cache.
+    If the cache holds more than max_entries entities, those which have been stored (or revalidated) the longest time
+    ago are evicted.
+    The methods are blocking (but thread safe); the TmdsClient calls them in a separate thread.
+    """
+
+    def __init__(self, path: Path, ttl: timedelta = timedelta(minutes=5), max_entries: int | None = 100_000):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1 but was {max_entries}")
+        self._ttl_seconds = ttl.total_seconds()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")  # allows concurrent readers from other processes
+        self._connection.execute(_SCHEMA)
+        self._connection.execute(_INDEX)
+        self._number_of_entries = self._count_entries()
+        _logger.info("Using entity cache at %s", path)
+
+    def _count_entries(self) -> int:
+        return int(self._connection.execute("SELECT COUNT(*) FROM entities").fetchone()[0])
+
+    def get(self, entity_type: str, entity_id: str, keydate: str = "") -> CachedEntity | None:
+        """
+        returns the cached entity or None if it's not in the cache
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM entities "
+                "WHERE entity_type = ? AND entity_id = ? AND keydate = ?",
+                (entity_type, entity_id, keydate),
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedEntity(body=row[0], etag=row[1], last_modified=row[2], stored_at=row[3])
+
+    def is_fresh(self, cached_entity: CachedEntity) -> bool:
+        """
+        returns true if the cached entity may be used without asking the server (because there is no way to revalidate
+        it and it's younger than the ttl)
+        """
+        return not cached_entity.can_be_revalidated and time.time() - cached_entity.stored_at < self._ttl_seconds
+
+    def put(
+        self,
+        entity_type: str,
+        entity_id: str,
+        keydate: str,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """
+        stores (or replaces) the body of an entity; evicts the oldest entities if the cache is full
+        """
+        with self._lock:
+            is_new = (
+                self._connection.execute(
+                    "SELECT 1 FROM entities WHERE entity_type = ? AND entity_id = ? AND keydate = ?",
+                    (entity_type, entity_id, keydate),
+                ).fetchone()
+                is None
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entities "
+                "(entity_type, entity_id, keydate, body, etag, last_modified, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entity_type, entity_id, keydate, body, etag, last_modified, time.time()),
+            )
+            if is_new:
+                self._number_of_entries += 1
+            if self._max_entries is not None and self._number_of_entries > self._max_entries:
+                self._evict_oldest_entries(self._number_of_entries - self._max_entries)
+
+    def _evict_oldest_entries(self, number_of_entries: int) -> None:
+        self._connection.execute(
+            "DELETE FROM entities WHERE rowid IN (SELECT rowid FROM entities ORDER BY stored_at, rowid LIMIT ?)",
+            (number_of_entries,),
+        )
+        # other processes might use the same file, so we count again instead of only subtracting the deleted rows
+        self._number_of_entries = self._count_entries()
+        _logger.debug("Evicted %i entities from the entity cache", number_of_entries)
+
+    def mark_as_revalidated(self, entity_type: str, entity_id: str, keydate: str = "") -> None:
+        """
+        to be called if the server confirmed that the cached entity is still up to date (HTTP 304)
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE entities SET stored_at = ? WHERE entity_type = ? AND entity_id = ? AND keydate = ?",
+                (time.time(), entity_type, entity_id, keydate),
+            )
+
+    def invalidate(self, entity_type: str, entity_id: str) -> None:
+        """
+        removes all cached versions (i.e. for all keydates) of an entity, e.g. because it has been modified
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM entities WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id)
+            )
+            self._number_of_entries -= cursor.rowcount
+
+    def close(self) -> None:
+        """
+        closes the underlying database connection
+        """
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+__all__ = ["CachedEntity", "SqliteEntityCache"]
@@ -0,0 +1,190 @@
+"""
+contains a tracker that waits for many TMDS events to be handled at once
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Callable, Coroutine
+from datetime import timedelta
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from tmdsclient.client.concurrency import run_with_bounded_concurrency
+
+_logger = logging.getLogger(__name__)
+
+
+class EventTrackingSettings(BaseModel):
+    """
+    configures how the client waits for events (e.g. the one returned by set_plattformfaehigkeit) to be handled
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    timeout: timedelta = timedelta(seconds=30)
+    """
+    the default duration after which we stop waiting for an event to be handled
+    """
+    initial_poll_interval: timedelta = timedelta(seconds=1)
+    """
+    the time between the first and the second poll of the same event
+    """
+    max_poll_interval: timedelta = timedelta(seconds=8)
+    """
+    the interval grows exponentially (with backoff_multiplier) up to this value
+    """
+    backoff_multiplier: float = Field(default=2.0, ge=1.0)
+    max_concurrent_polls: int = Field(default=10, ge=1)
+    """
+    the maximum number of /hasBeenHandled requests that are in flight at the same time
+    """
+    max_pending_events: int = Field(default=1000, ge=1)
+    """
+    Backpressure: if this many events are not handled yet, tracking another event waits until one of them has been
+    handled (or timed out). This slows down callers if TMDS does not keep up with handling the events.
+    """
+
+
+class _PendingEvent:  # pylint:disable=too-few-public-methods
+    """
+    an event that has not been handled yet
+    """
+
+    def __init__(self, event_id: uuid.UUID, future: "asyncio.Future[bool]", deadline: float, poll_interval: float):
+        self.event_id = event_id
+        self.future = future
+        self.deadline = deadline
+        self.next_poll_at = time.monotonic()
+        self.poll_interval = poll_interval
+
+
+class EventTracker:
+    """
+    Waits for many events to be handled at once: All pending events are polled by a single background task (instead of
+    one polling loop per event). Each event is polled with exponential backoff and the number of concurrent polls is
+    bounded.
+    The tracker runs only while there are pending events.
+    """
+
+    def __init__(
+        self,
+        has_been_handled: Callable[[uuid.UUID], Coroutine[Any, Any, bool]],
+        settings: EventTrackingSettings | None = None,
+    ):
+        """
+        :param has_been_handled: polls TMDS once and returns true iff the event has been handled
+        """
+        self._has_been_handled = has_been_handled
+        self._settings = settings or EventTrackingSettings()
+        self._pending: dict[uuid.UUID, _PendingEvent] = {}
+        self._capacity = asyncio.Semaphore(self._settings.max_pending_events)
+        self._event_added = asyncio.Event()
+        self._ticker: asyncio.Task[None] | None = None
+
+    @property
+    def number_of_pending_events(self) -> int:
+        """
+        the number of events which have neither been handled nor timed out yet
+        """
+        return len(self._pending)
+
+    async def track(self, event_id: uuid.UUID, timeout: timedelta | None = None) -> "asyncio.Future[bool]":
+        """
+        Starts tracking the event and returns a future which resolves to true as soon as the event has been handled
+        (or false, if it has not been handled within the timeout).
+        If max_pending_events are pending already, this waits until there is capacity for another event.
+        """
+        if event_id in self._pending:
+            return self._pending[event_id].future
+        await self._capacity.acquire()
+        if event_id in self._pending:
+            # someone else started tracking the same event while we were waiting for capacity
+            self._capacity.release()
+            return self._pending[event_id].future
+        timeout_in_seconds = (timeout or self._settings.timeout).total_seconds()
+        pending_event = _PendingEvent(
+            event_id,
+            future=asyncio.get_running_loop().create_future(),
+            deadline=time.monotonic() + timeout_in_seconds,
+            poll_interval=self._settings.initial_poll_interval.total_seconds(),
+        )
+        self._pending[event_id] = pending_event
+        self._event_added.set()
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._poll_pending_events())
+        return pending_event.future
+
+    async def wait_until_handled(self, event_id: uuid.UUID, timeout: timedelta | None = None) -> bool:
+        """
+        returns true as soon as the event has been handled or false if it has not been handled within the timeout
+        """
+        future = await self.track(event_id, timeout)
+        # the shield prevents that a cancelled caller also cancels the future for all the other callers
+        return await asyncio.shield(future)
+
+    def _resolve(self, pending_event: _PendingEvent, has_been_handled: bool) -> None:
+        del self._pending[pending_event.event_id]
+        self._capacity.release()
+        if not pending_event.future.done():
+            pending_event.future.set_result(has_been_handled)
+
+    async def _poll(self, pending_event: _PendingEvent) -> bool:
+        return await self._has_been_handled(pending_event.event_id)
+
+    async def _poll_pending_events(self) -> None:
+        """
+        the ticker: polls all events that are due, then sleeps until the next event is due (or a new one is tracked)
+        """
+        while self._pending:
+            now = time.monotonic()
+            due_events = [x for x in self._pending.values() if x.next_poll_at <= now]
+            async for pending_event, result in run_with_bounded_concurrency(
+                due_events, self._poll, max_concurrency=self._settings.max_concurrent_polls, return_exceptions=True
+            ):
+                if result is True:
+                    _logger.debug("Event %s has been handled", pending_event.event_id)
+                    self._resolve(pending_event, True)
+                    continue
+                if isinstance(result, Exception):
+                    _logger.warning("Failed to poll event %s: %s", pending_event.event_id, str(result))
+                now = time.monotonic()
+                if now >= pending_event.deadline:
+                    _logger.warning("Event %s has not been handled in time", pending_event.event_id)
+                    self._resolve(pending_event, False)
+                    continue
+                _logger.log(5, "Event %s has not been handled yet", pending_event.event_id)
+                pending_event.next_poll_at = min(now + pending_event.poll_interval, pending_event.deadline)
+                pending_event.poll_interval = min(
+                    pending_event.poll_interval * self._settings.backoff_multiplier,
+                    self._settings.max_poll_interval.total_seconds(),
+                )
+            if not self._pending:
+                return
+            self._event_added.clear()
+            seconds_until_next_poll = min(x.next_poll_at for x in self._pending.values()) - time.monotonic()
+            try:
+                await asyncio.wait_for(self._event_added.wait(), timeout=max(seconds_until_next_poll, 0))
+            except TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        """
+        stops tracking; the futures of all pending events are cancelled
+        """
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        for pending_event in list(self._pending.values()):
+            pending_event.future.cancel()
+            del self._pending[pending_event.event_id]
+            self._capacity.release()
+
+
+__all__ = ["EventTracker", "EventTrackingSettings"]
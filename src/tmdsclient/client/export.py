@@ -0,0 +1,181 @@
+"""
+contains a pipeline that streams downloaded entities into newline delimited JSON (NDJSON) files
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+from collections.abc import AsyncIterable
+from pathlib import Path
+from typing import cast
+
+from pydantic import BaseModel, ConfigDict
+
+_logger = logging.getLogger(__name__)
+
+
+class NdjsonExportResult(BaseModel):
+    """
+    summary of an NDJSON export
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    files: list[Path]
+    """
+    the files that have been written, in the order in which they have been written
+    """
+    number_of_entities: int
+    number_of_bytes: int
+    """
+    the number of (uncompressed) bytes written to all files
+    """
+
+
+def _to_ndjson_line(body: bytes) -> bytes:
+    """
+    returns the body as a single line; the JSON is only re-serialized if it's not a single line already
+    """
+    body = body.strip()
+    if b"\n" in body or b"\r" in body:
+        body = json.dumps(json.loads(body), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body + b"\n"
+
+
+class _RotatingNdjsonWriter:
+    """
+    writes lines into numbered files; starts a new file as soon as the current one exceeds max_bytes_per_file.
+    the methods are blocking; they're meant to be run in a separate thread
+    """
+
+    def __init__(self, directory: Path, file_name_prefix: str, compress: bool, max_bytes_per_file: int | None):
+        self._directory = directory
+        self._file_name_prefix = file_name_prefix
+        self._compress = compress
+        self._max_bytes_per_file = max_bytes_per_file
+        self._current_file: gzip.GzipFile | io.BufferedWriter | None = None
+        self._bytes_in_current_file = 0
+        self.files: list[Path] = []
+        self.number_of_lines = 0
+        self.number_of_bytes = 0
+
+    def _open_next_file(self) -> gzip.GzipFile | io.BufferedWriter:
+        self.close()
+        suffix = ".ndjson.gz" if self._compress else ".ndjson"
+        path = self._directory / f"{self._file_name_prefix}-{len(self.files):05d}{suffix}"
+        _logger.info("Writing into %s", path)
+        self.files.append(path)
+        self._bytes_in_current_file = 0
+        # pylint:disable=consider-using-with
+        next_file: gzip.GzipFile | io.BufferedWriter = gzip.open(path, "wb") if self._compress else open(path, "wb")
+        self._current_file = next_file
+        return next_file
+
+    def write(self, bodies: list[bytes]) -> None:
+        """
+        writes each body as a single line
+        """
+        for body in bodies:
+            line = _to_ndjson_line(body)
+            current_file = self._current_file
+            if current_file is None or (
+                self._max_bytes_per_file is not None
+                and self._bytes_in_current_file > 0
+                and self._bytes_in_current_file + len(line) > self._max_bytes_per_file
+            ):
+                current_file = self._open_next_file()
+            current_file.write(line)
+            self._bytes_in_current_file += len(line)
+            self.number_of_bytes += len(line)
+            self.number_of_lines += 1
+
+    def close(self) -> None:
+        """
+        closes the current file (if any)
+        """
+        if self._current_file is not None:
+            self._current_file.close()
+            self._current_file = None
+
+
+_SENTINEL = object()
+"""
+marks the end of the queue
+"""
+
+
+async def export_to_ndjson(
+    bodies: AsyncIterable[bytes | None],
+    directory: Path,
+    file_name_prefix: str,
+    compress: bool = False,
+    max_bytes_per_file: int | None = None,
+    queue_size: int = 1000,
+) -> NdjsonExportResult:
+    """
+    Writes each JSON body as one line into NDJSON files in directory (optionally gzip compressed); None bodies (e.g. of
+    entities that returned 404) are skipped.
+    If max_bytes_per_file is set, a new file is started before the (uncompressed) size of the current file would
+    exceed it.
+    The bodies are consumed while the previous ones are written to disk in a separate thread, so network and disk I/O
+    overlap. At most queue_size bodies are held in memory, so the memory consumption does not grow with the number of
+    bodies.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    writer = _RotatingNdjsonWriter(directory, file_name_prefix, compress, max_bytes_per_file)
+    queue: asyncio.Queue[bytes | object] = asyncio.Queue(maxsize=queue_size)
+
+    writer_error: Exception | None = None
+    pending_write: asyncio.Future[None] | None = None
+
+    async def write_from_queue() -> None:
+        nonlocal writer_error, pending_write
+        while True:
+            batch: list[bytes] = []
+            body = await queue.get()
+            while body is not _SENTINEL:
+                batch.append(cast(bytes, body))
+                if queue.empty():
+                    break
+                body = queue.get_nowait()
+            if batch and writer_error is None:
+                pending_write = asyncio.ensure_future(asyncio.to_thread(writer.write, batch))
+                try:
+                    # if this task is cancelled, the write (in its thread) goes on; it's awaited before closing
+                    await asyncio.shield(pending_write)
+                except Exception as error:  # pylint:disable=broad-exception-caught
+                    # we keep on consuming the queue, so that the producer is never blocked
+                    writer_error = error
+            if body is _SENTINEL:
+                return
+
+    writer_task = asyncio.create_task(write_from_queue())
+    try:
+        async for body in bodies:
+            if writer_error is not None:
+                break
+            if body is None:
+                continue
+            await queue.put(body)
+        await queue.put(_SENTINEL)
+        await writer_task
+    finally:
+        if not writer_task.done():
+            writer_task.cancel()
+        # wait until the writer task has finished (or has been cancelled) and its last write has been completed
+        await asyncio.gather(writer_task, return_exceptions=True)
+        if pending_write is not None:
+            await asyncio.gather(pending_write, return_exceptions=True)
+        await asyncio.to_thread(writer.close)
+    if writer_error is not None:
+        raise writer_error
+    result = NdjsonExportResult(
+        files=writer.files, number_of_entities=writer.number_of_lines, number_of_bytes=writer.number_of_bytes
+    )
+    _logger.info("Exported %i entities into %i file(s)", result.number_of_entities, len(result.files))
+    return result
+
+
+__all__ = ["NdjsonExportResult", "export_to_ndjson"]
@@ -0,0 +1,29 @@
+"""
+contains the JSON decoder used where the client needs plain Python objects instead of pydantic models.
+(To create models, pydantics model_validate_json is used; it parses the raw bytes without building a dict first.)
+If orjson is installed (pip install tmdsclient[fast-json]), it's used instead of the json module of the standard
+library.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    def loads_json(data: bytes) -> Any:
+        """
+        decodes the JSON body using orjson
+        """
+        return orjson.loads(data)
+
+except ImportError:  # pragma: no cover
+
+    def loads_json(data: bytes) -> Any:
+        """
+        decodes the JSON body using the json module of the standard library
+        """
+        return json.loads(data)
+
+
+__all__ = ["loads_json"]
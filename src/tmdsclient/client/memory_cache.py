@@ -0,0 +1,175 @@
+"""
+contains an in-process cache for parsed entities that also coalesces concurrent requests for the same entity
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine
+from datetime import timedelta
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+_logger = logging.getLogger(__name__)
+
+_CacheKey = tuple[str, str, str]
+"""
+entity type, entity ID, keydate (empty string if none)
+"""
+
+_Entity = TypeVar("_Entity")
+
+
+class CacheStatistics(BaseModel):
+    """
+    counters that help to tune the cache
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    hits: int
+    """
+    number of requests that have been answered from the cache
+    """
+    misses: int
+    """
+    number of requests that caused a request to TMDS
+    """
+    coalesced: int
+    """
+    number of requests that neither hit the cache nor caused a request to TMDS, because they waited for an identical
+    request which was already in flight
+    """
+    evictions: int
+    """
+    number of entries that have been removed because the cache was full
+    """
+    size: int
+    """
+    the current number of entries
+    """
+
+
+class InMemoryEntityCache:
+    """
+    A size-bounded LRU cache for parsed entities with a TTL per entity type (e.g. 'Marktlokation').
+    Concurrent requests for the same entity which is not in the cache are collapsed into a single request ("single
+    flight"); all of them receive the same result (or error).
+    Entities that do not exist (None) are not cached.
+    Note that all callers receive the same instance of a cached entity, so you must not modify it (create a copy if
+    you need to).
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        default_ttl: timedelta = timedelta(minutes=1),
+        ttl_per_entity_type: dict[str, timedelta] | None = None,
+    ):
+        """
+        :param max_size: the maximum number of entities in the cache; the least recently used ones are evicted first
+        :param default_ttl: how long an entity is served from the cache
+        :param ttl_per_entity_type: overrides the default_ttl for specific entity types, e.g. {'Zaehler': timedelta(0)}
+        (a TTL of 0 disables the caching but concurrent requests are still coalesced)
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1 but was {max_size}")
+        self._max_size = max_size
+        self._default_ttl_seconds = default_ttl.total_seconds()
+        self._ttl_seconds_per_entity_type = {
+            entity_type: ttl.total_seconds() for entity_type, ttl in (ttl_per_entity_type or {}).items()
+        }
+        self._entries: OrderedDict[_CacheKey, tuple[float, Any]] = OrderedDict()
+        """
+        maps keys to (monotonic expiry deadline, entity); the least recently used entry comes first
+        """
+        self._in_flight: dict[_CacheKey, asyncio.Task[Any]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """
+        a snapshot of the hit/miss/coalescing counters
+        """
+        return CacheStatistics(
+            hits=self._hits,
+            misses=self._misses,
+            coalesced=self._coalesced,
+            evictions=self._evictions,
+            size=len(self._entries),
+        )
+
+    async def get_or_load(
+        self,
+        entity_type: str,
+        entity_id: str,
+        keydate: str,
+        load: Callable[[], Coroutine[Any, Any, _Entity | None]],
+    ) -> _Entity | None:
+        """
+        returns the cached entity; if it's not cached (anymore), it's loaded (unless the same entity is being loaded
+        already) and cached
+        """
+        key: _CacheKey = (entity_type, entity_id, keydate)
+        entry = self._entries.get(key)
+        if entry is not None:
+            deadline, entity = entry
+            if time.monotonic() < deadline:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entity  # type: ignore[no-any-return]
+            del self._entries[key]
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            self._misses += 1
+            task = asyncio.create_task(load())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished_task: self._on_loaded(key, finished_task))
+        # the shield prevents that a cancelled caller also cancels the request for all the other callers
+        return await asyncio.shield(task)
+
+    def _on_loaded(self, key: _CacheKey, task: "asyncio.Task[Any]") -> None:
+        # retrieving the exception (even if it's not used) prevents "exception was never retrieved" warnings
+        failed = task.cancelled() or task.exception() is not None
+        if self._in_flight.get(key) is not task:
+            # the entity has been invalidated while it was being loaded; the result might be outdated already
+            return
+        del self._in_flight[key]
+        if failed or task.result() is None:
+            return
+        ttl_seconds = self._ttl_seconds_per_entity_type.get(key[0], self._default_ttl_seconds)
+        if ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, entity_type: str, entity_id: str) -> None:
+        """
+        removes all cached versions (i.e. for all keydates) of an entity, e.g. because it has been modified.
+        Requests which are in flight are not cancelled but their results won't be cached.
+        """
+        for key in [k for k in self._entries if k[0] == entity_type and k[1] == entity_id]:
+            del self._entries[key]
+        for key in [k for k in self._in_flight if k[0] == entity_type and k[1] == entity_id]:
+            del self._in_flight[key]
+
+    def clear(self) -> None:
+        """
+        removes all entries (but keeps the statistics)
+        """
+        self._entries.clear()
+        self._in_flight.clear()
+        _logger.debug("Cleared in-memory entity cache")
+
+
+__all__ = ["CacheStatistics", "InMemoryEntityCache"]
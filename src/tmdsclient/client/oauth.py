@@ -4,6 +4,8 @@ oauth stuff
 
 import asyncio
 import logging
+import math
+import time
 from abc import ABC
 from datetime import UTC, datetime, timedelta
 
@@ -14,6 +16,23 @@ from yarl import URL
 _logger = logging.getLogger(__name__)
 _last_time_the_expiration_was_logged: datetime | None = None  # pylint:disable=invalid-name
 
+_TOKEN_VALIDITY_MARGIN = timedelta(minutes=1)
+"""
+tokens are considered invalid this long before they expire (because the request using it shouldn't take longer)
+"""
+
+
+def get_token_expiration(token: str) -> datetime | None:
+    """
+    returns the expiration date of the token (or None, if it doesn't expire);
+    raises a jwt.InvalidTokenError if the token cannot be decoded
+    """
+    decoded_token = jwt.decode(token, algorithms=["HS256"], options={"verify_signature": False})
+    expiration_timestamp = decoded_token.get("exp")
+    if expiration_timestamp is None:
+        return None
+    return datetime.fromtimestamp(float(expiration_timestamp), tz=UTC)
+
 
 def token_is_valid(token: str) -> bool:
     """
@@ -21,11 +40,9 @@ def token_is_valid(token: str) -> bool:
     more than 1 minute (because the clients' request using the token shouldn't take longer than that)
     """
     try:
-        decoded_token = jwt.decode(token, algorithms=["HS256"], options={"verify_signature": False})
-        expiration_timestamp = decoded_token.get("exp")
-        if expiration_timestamp is None:
+        expiration_datetime = get_token_expiration(token)
+        if expiration_datetime is None:
             return False
-        expiration_datetime = datetime.fromtimestamp(float(expiration_timestamp)).replace(tzinfo=UTC)
         global _last_time_the_expiration_was_logged  # noqa: PLW0603
         should_log_expiration_dt = _last_time_the_expiration_was_logged is None or (
             datetime.now(UTC) - _last_time_the_expiration_was_logged
@@ -34,7 +51,7 @@ def token_is_valid(token: str) -> bool:
             _logger.debug("Token is valid until %s", expiration_datetime.isoformat())
             _last_time_the_expiration_was_logged = datetime.now(UTC)
         current_datetime = datetime.now(UTC)
-        token_is_valid_one_minute_into_the_future = expiration_datetime > current_datetime + timedelta(minutes=1)
+        token_is_valid_one_minute_into_the_future = expiration_datetime > current_datetime + _TOKEN_VALIDITY_MARGIN
         return token_is_valid_one_minute_into_the_future
     except jwt.ExpiredSignatureError:
         _logger.info("The token is expired", exc_info=True)
@@ -44,6 +61,32 @@ def token_is_valid(token: str) -> bool:
         return False
 
 
+def get_token_deadline(token: str) -> float | None:
+    """
+    Decodes the token and returns the time.monotonic() value at which it expires: math.inf if the token does not
+    expire, None if it cannot be decoded (i.e. is invalid). Decode each token only once and check the deadline with
+    token_deadline_is_valid; that's way cheaper than token_is_valid and not affected by changes of the system clock.
+    """
+    try:
+        expiration_datetime = get_token_expiration(token)
+    except jwt.InvalidTokenError:
+        _logger.info("The token is invalid", exc_info=True)
+        return None
+    if expiration_datetime is None:
+        _logger.debug("Token does not expire")
+        return math.inf
+    _logger.debug("Token is valid until %s", expiration_datetime.isoformat())
+    return time.monotonic() + (expiration_datetime - datetime.now(UTC)).total_seconds()
+
+
+def token_deadline_is_valid(deadline: float | None) -> bool:
+    """
+    like token_is_valid but for a deadline returned by get_token_deadline; a token that cannot be decoded (None) is
+    invalid, one that does not expire (math.inf) is always valid
+    """
+    return deadline is not None and deadline > time.monotonic() + _TOKEN_VALIDITY_MARGIN.total_seconds()
+
+
 class _ValidateTokenMixin:  # pylint:disable=too-few-public-methods
     """
     Mixin for classes which need to validate tokens
@@ -80,6 +123,7 @@ class _OAuthHttpClient(_ValidateTokenMixin, ABC):  # pylint:disable=too-few-publ
             logger=_logger,
         )
         self._token: str | None = None  # the jwt token if we did an authenticated request before
+        self._token_deadline: float | None = None  # the expiration of _token as time.monotonic() value
         self._token_write_lock = asyncio.Lock()
 
     async def _get_new_token(self) -> str:
@@ -96,13 +140,26 @@ class _OAuthHttpClient(_ValidateTokenMixin, ABC):  # pylint:disable=too-few-publ
         async with self._token_write_lock:
             if self._token is None:
                 _logger.info("Initially retrieving a new token")
-                self._token = await self._get_new_token()
-            elif not token_is_valid(self._token):
+                return self._set_token(await self._get_new_token())
+            if not token_deadline_is_valid(self._token_deadline):
                 _logger.info("Token is not valid anymore, retrieving a new token")
-                self._token = await self._get_new_token()
-            else:
-                _logger.debug("Token is still valid, reusing it")
-        return self._token
+                return self._set_token(await self._get_new_token())
+            _logger.debug("Token is still valid, reusing it")
+            return self._token
+
+    async def _refresh_oauth_token(self) -> str:
+        """
+        retrieves a new token, even if the current one is still valid
+        :returns the new oauth token
+        """
+        async with self._token_write_lock:
+            _logger.info("Refreshing the token")
+            return self._set_token(await self._get_new_token())
+
+    def _set_token(self, token: str) -> str:
+        self._token = token
+        self._token_deadline = get_token_deadline(token)
+        return token
 
 
-__all__ = ["token_is_valid"]
+__all__ = ["get_token_deadline", "get_token_expiration", "token_deadline_is_valid", "token_is_valid"]
@@ -0,0 +1,189 @@
+"""
+contains a client side rate limiter (token buckets) that every request to TMDS passes
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from pydantic import BaseModel, ConfigDict, Field
+from yarl import URL
+
+_logger = logging.getLogger(__name__)
+
+_OVERALL_BUDGET_NAME = "overall"
+
+
+class EndpointBudget(BaseModel):
+    """
+    A separate budget for a family of endpoints, e.g. all PATCH requests to the v2 API:
+    EndpointBudget(name="v2 patches", method="PATCH", path_prefix="api/v2/", requests_per_second=5, burst=5).
+    Requests of this family have to fit into both this budget and the overall budget.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    """
+    the name under which the statistics of this budget are reported
+    """
+    method: str | None = None
+    """
+    the HTTP method (e.g. 'GET'); None means: any method
+    """
+    path_prefix: str
+    """
+    the beginning of the path relative to the server URL, e.g. 'api/Netzvertrag/' or 'api/Event/'
+    """
+    requests_per_second: float = Field(gt=0)
+    burst: int = Field(default=1, ge=1)
+    """
+    the number of requests that may be sent at once after the budget has not been used for a while
+    """
+
+    def matches(self, method: str, url: URL) -> bool:
+        """
+        returns true if a request with the given method to url belongs to this endpoint family
+        """
+        if self.method is not None and self.method.upper() != method.upper():
+            return False
+        return url.path.lstrip("/").startswith(self.path_prefix.lstrip("/"))
+
+
+class RateLimitSettings(BaseModel):
+    """
+    Limits the rate of requests the client sends (token bucket): On average, at most requests_per_second requests are
+    sent; up to burst requests may be sent at once. Requests that exceed the budget wait until it allows them.
+    Optionally, families of endpoints get additional budgets of their own. A request belongs to the first family whose
+    endpoint_budgets entry matches.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    requests_per_second: float = Field(gt=0)
+    burst: int = Field(default=1, ge=1)
+    endpoint_budgets: list[EndpointBudget] = Field(default_factory=list)
+
+
+class RateLimitStatistics(BaseModel):
+    """
+    how long the requests of one budget had to wait
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    number_of_requests: int
+    number_of_delayed_requests: int
+    """
+    the number of requests that had to wait at all
+    """
+    total_wait: timedelta
+    max_wait: timedelta
+
+
+class _TokenBucket:
+    """
+    A token bucket which is refilled with rate tokens per second up to capacity.
+    Requests that find the bucket empty reserve a token nonetheless (the number of tokens becomes negative) and wait
+    until it has been refilled. That way waiting requests are served in the order in which they arrived.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens: float = capacity
+        self._updated_at = time.monotonic()
+        self.number_of_requests = 0
+        self.number_of_delayed_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self) -> float:
+        """
+        takes a token and returns the number of seconds to wait before it may be used
+        """
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self._rate)
+
+    def give_back(self) -> None:
+        """
+        returns a reserved token that has not been used
+        """
+        self._tokens = min(self._capacity, self._tokens + 1)
+
+    def record_wait(self, wait: float) -> None:
+        """
+        updates the statistics
+        """
+        self.number_of_requests += 1
+        if wait > 0:
+            self.number_of_delayed_requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def get_statistics(self) -> RateLimitStatistics:
+        """
+        returns the statistics so far
+        """
+        return RateLimitStatistics(
+            number_of_requests=self.number_of_requests,
+            number_of_delayed_requests=self.number_of_delayed_requests,
+            total_wait=timedelta(seconds=self.total_wait),
+            max_wait=timedelta(seconds=self.max_wait),
+        )
+
+
+class RateLimiter:
+    """
+    Applies RateLimitSettings to the requests of a client.
+    Call acquire before each request. The statistics tell how long requests had to wait.
+    """
+
+    def __init__(self, settings: RateLimitSettings):
+        self._settings = settings
+        self._overall_bucket = _TokenBucket(settings.requests_per_second, settings.burst)
+        self._endpoint_buckets = [
+            (budget, _TokenBucket(budget.requests_per_second, budget.burst)) for budget in settings.endpoint_budgets
+        ]
+
+    @property
+    def statistics(self) -> dict[str, RateLimitStatistics]:
+        """
+        the statistics per budget; the overall budget is reported as 'overall'
+        """
+        result = {_OVERALL_BUDGET_NAME: self._overall_bucket.get_statistics()}
+        for budget, bucket in self._endpoint_buckets:
+            result[budget.name] = bucket.get_statistics()
+        return result
+
+    def _get_buckets(self, method: str, url: URL) -> list[_TokenBucket]:
+        for budget, bucket in self._endpoint_buckets:
+            if budget.matches(method, url):
+                return [self._overall_bucket, bucket]
+        return [self._overall_bucket]
+
+    async def acquire(self, method: str, url: URL) -> float:
+        """
+        Waits until the request fits into the budget(s) and returns the time waited (in seconds).
+        If the waiting is cancelled, the reserved tokens are given back.
+        """
+        buckets = self._get_buckets(method, url)
+        wait = max(bucket.reserve() for bucket in buckets)
+        if wait > 0:
+            _logger.debug("Delaying %s %s by %.3fs to stay within the rate limit", method, url, wait)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                for bucket in buckets:
+                    bucket.give_back()
+                raise
+        for bucket in buckets:
+            bucket.record_wait(wait)
+        return wait
+
+
+__all__ = ["EndpointBudget", "RateLimitSettings", "RateLimitStatistics", "RateLimiter"]
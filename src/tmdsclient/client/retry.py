@@ -0,0 +1,70 @@
+"""
+contains the policy which decides if, when and how often failed requests are retried
+"""
+
+import random
+from datetime import timedelta
+
+from aiohttp import ClientResponseError
+from pydantic import BaseModel, ConfigDict, Field
+
+_retry_worthy_http_status_codes = {500, 502}
+"""
+if a GET request fails with one of these status codes, it might be worth retrying and the error code might simply be
+due to high load
+"""
+
+
+def _is_retry_worthy(error: Exception) -> bool:
+    """
+    returns true if the error might be caused by high load on server side, so that it's worth to retry the request
+    """
+    if isinstance(error, TimeoutError):
+        return True
+    return isinstance(error, ClientResponseError) and error.status in _retry_worthy_http_status_codes
+
+
+class RetryPolicy(BaseModel):
+    """
+    Describes how requests that failed because of high load on the server are retried.
+    The delay before the n-th retry grows exponentially (initial_backoff * backoff_multiplier^(n-1), capped at
+    max_backoff). With jitter, a random delay between half and the full backoff is used, so that requests which failed
+    at the same time are not retried at the same time.
+    The retry budget limits the total number of retries in a bulk operation to retry_budget_ratio times the number of
+    items started so far (but allows at least min_retries retries). When the server is down, this prevents each item
+    from being retried max_attempts times.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    max_attempts: int = Field(default=4, ge=1)
+    """
+    the maximum number of attempts per item (including the first one)
+    """
+    initial_backoff: timedelta = timedelta(milliseconds=500)
+    max_backoff: timedelta = timedelta(seconds=30)
+    backoff_multiplier: float = Field(default=2.0, ge=1.0)
+    jitter: bool = True
+    retry_budget_ratio: float = Field(default=0.2, ge=0.0)
+    min_retries: int = Field(default=10, ge=0)
+
+    def get_backoff(self, retry_number: int) -> timedelta:
+        """
+        returns the time to wait before the retry_number-th retry (starting at 1)
+        """
+        backoff_seconds = min(
+            self.max_backoff.total_seconds(),
+            self.initial_backoff.total_seconds() * self.backoff_multiplier ** (retry_number - 1),
+        )
+        if self.jitter:
+            backoff_seconds = random.uniform(backoff_seconds / 2, backoff_seconds)
+        return timedelta(seconds=backoff_seconds)
+
+    def budget_allows_retry(self, retries_so_far: int, items_started: int) -> bool:
+        """
+        returns true if yet another retry fits into the retry budget
+        """
+        return retries_so_far < max(self.min_retries, int(self.retry_budget_ratio * items_started))
+
+
+__all__ = ["RetryPolicy"]
@@ -0,0 +1,116 @@
+"""
+contains the local snapshot which is used to incrementally synchronize entities with TMDS
+"""
+
+import hashlib
+import logging
+import os
+import uuid
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field
+
+from tmdsclient.models.netzvertrag import Netzvertrag
+
+_logger = logging.getLogger(__name__)
+
+
+def fingerprint(body: bytes) -> str:
+    """
+    returns a fingerprint of an (undecoded) response body
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class SnapshotEntry(BaseModel):
+    """
+    what we know about a single entity from the last time it has been downloaded
+    """
+
+    fingerprint: str
+    """
+    the fingerprint of the response body
+    """
+    downloaded_at: AwareDatetime
+
+
+class EntitySnapshot(BaseModel):
+    """
+    The IDs and fingerprints of all entities that are known locally.
+    It's stored as JSON file between two syncs.
+    """
+
+    entries: dict[uuid.UUID, SnapshotEntry] = Field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "EntitySnapshot":
+        """
+        reads the snapshot from path; if the file does not exist, an empty snapshot is returned
+        """
+        if not path.exists():
+            _logger.info("There is no snapshot at %s yet; starting with an empty one", path)
+            return cls()
+        return cls.model_validate_json(path.read_bytes())
+
+    def save(self, path: Path) -> None:
+        """
+        (over)writes the snapshot at path; the file is replaced atomically, so a crash never leaves a corrupt snapshot
+        """
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_text(self.model_dump_json(), encoding="utf-8")
+        os.replace(temporary_path, path)
+
+    def get_ids_to_download(
+        self, server_ids: Iterable[uuid.UUID], revalidate_after: timedelta | None, suspected_ids: Iterable[uuid.UUID]
+    ) -> list[uuid.UUID]:
+        """
+        Returns the server_ids which are either unknown, have not been downloaded for longer than revalidate_after or
+        are in suspected_ids (and exist on server side).
+        """
+        suspected = set(suspected_ids)
+        now = datetime.now(UTC)
+        result: list[uuid.UUID] = []
+        for entity_id in server_ids:
+            entry = self.entries.get(entity_id)
+            if (
+                entry is None
+                or entity_id in suspected
+                or (revalidate_after is not None and now - entry.downloaded_at >= revalidate_after)
+            ):
+                result.append(entity_id)
+        return result
+
+
+class NetzvertragDeltaSyncResult(BaseModel):
+    """
+    the outcome of an incremental sync of netzverträge
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    added: list[Netzvertrag]
+    """
+    netzverträge which were not in the snapshot before
+    """
+    changed: list[Netzvertrag]
+    """
+    netzverträge which were in the snapshot but whose content has changed since they have been downloaded the last time
+    """
+    unchanged_ids: list[uuid.UUID]
+    """
+    IDs of netzverträge which have been downloaded again but did not change
+    """
+    removed_ids: list[uuid.UUID]
+    """
+    IDs of netzverträge which were in the snapshot but do not exist on server side anymore
+    """
+    not_downloaded_ids: list[uuid.UUID]
+    """
+    IDs of netzverträge which exist on server side but have not been downloaded, because they were neither new nor due
+    for revalidation
+    """
+
+
+__all__ = ["EntitySnapshot", "NetzvertragDeltaSyncResult", "SnapshotEntry", "fingerprint"]
@@ -2,48 +2,111 @@
 
 import asyncio
 import logging
+import math
+import ssl
+import time
 import uuid
+import warnings
 from abc import ABC
-from collections.abc import AsyncGenerator, Callable
-from datetime import datetime, timedelta
-from typing import Literal, overload
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Coroutine, Iterable
+from contextlib import AbstractContextManager, asynccontextmanager, nullcontext
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal, TypeVar, cast, overload
 
 import jsonpatch  # type: ignore[import-untyped]
-from aiohttp import BasicAuth, ClientResponseError, ClientSession, ClientTimeout
-from more_itertools import chunked
-from pydantic import AwareDatetime
+from aiohttp import BasicAuth, ClientResponse, ClientResponseError, ClientSession, ClientTimeout, TCPConnector
+from pydantic import AwareDatetime, BaseModel
 from yarl import URL
 
+from tmdsclient.client.bulk import (
+    BulkOperationSummary,
+    BulkPlattformfaehigkeitResult,
+    BulkUpdateItem,
+    BulkUpdateOutcome,
+    BulkUpdateResult,
+    PlattformfaehigkeitChange,
+    PlattformfaehigkeitOutcome,
+    describe_failure,
+)
+from tmdsclient.client.checkpoint import DownloadCheckpoint
+from tmdsclient.client.circuit_breaker import CircuitBreaker
+from tmdsclient.client.concurrency import AdaptiveConcurrencyLimiter, run_with_bounded_concurrency
 from tmdsclient.client.config import BasicAuthTmdsConfig, OAuthTmdsConfig, TmdsConfig
-from tmdsclient.client.oauth import _OAuthHttpClient, token_is_valid
+from tmdsclient.client.entity_cache import SqliteEntityCache
+from tmdsclient.client.events import EventTracker
+from tmdsclient.client.export import NdjsonExportResult, export_to_ndjson
+from tmdsclient.client.json_decoding import loads_json
+from tmdsclient.client.memory_cache import InMemoryEntityCache
+from tmdsclient.client.oauth import _OAuthHttpClient, get_token_deadline, token_deadline_is_valid
+from tmdsclient.client.rate_limit import RateLimiter
+from tmdsclient.client.retry import RetryPolicy, _is_retry_worthy
+from tmdsclient.client.sync import EntitySnapshot, NetzvertragDeltaSyncResult, SnapshotEntry, fingerprint
+from tmdsclient.client.write_queue import Changes, CoalescingWriteQueue
 from tmdsclient.models import AllIdsResponse
 from tmdsclient.models.jsonpatch import JsonPatch
 from tmdsclient.models.marktlokation import Marktlokation
 from tmdsclient.models.messlokation import Messlokation
 from tmdsclient.models.netzvertrag import Netzvertrag, _ListOfNetzvertraege
-from tmdsclient.models.patches import build_json_patch_document
+from tmdsclient.models.patches import (
+    add_test_operations,
+    build_json_patch_document,
+    can_be_sent_twice,
+    changes_are_callables,
+)
 from tmdsclient.models.zaehler import Zaehler
 
 _logger = logging.getLogger(__name__)
 
 _DEFAULT_CHUNK_SIZE = 100
+_TOKEN_REFRESH_MARGIN = timedelta(minutes=2)
+"""
+the bearer token is refreshed this long before it expires (tokens are considered invalid one minute before)
+"""
+_MIN_TOKEN_REFRESH_INTERVAL = timedelta(seconds=5)
+"""
+prevents a busy loop if the tokens live shorter than the refresh margin
+"""
+_MIN_BODY_SIZE_TO_PATCH_IN_THREAD = 64 * 1024
+"""
+In bulk updates, parsing larger entities and applying the changes to them is done in a separate thread, so that it does
+not block the event loop (and the other requests) for too long.
+"""
+_TOKEN_REFRESH_RETRY_INTERVAL = timedelta(seconds=10)
 
+_DownloadResult = TypeVar("_DownloadResult")
+_EntityId = TypeVar("_EntityId", str, uuid.UUID)
+_Model = TypeVar("_Model", bound=BaseModel)
 
-def _log_chunk_success(chunk_size: int, total_size: int, chunk_idx: int, chunk_length: int) -> None:
-    _logger.info(
-        "Downloaded Netzvertrag (%i/%i) / chunk %i/%i",
-        chunk_size * chunk_idx + chunk_length,
-        total_size,
-        chunk_idx + 1,
-        total_size // chunk_size + 1,
-    )
 
+def _to_seconds(duration: timedelta | None) -> float | None:
+    return duration.total_seconds() if duration is not None else None
 
-_retry_worthy_http_status_codes = {500, 502}
-"""
-if a GET request fails with one of these status codes, it might be worth retrying and the error code might simply be
-due to high load
-"""
+
+def _log_download_progress(downloaded: int, total_size: int, log_every: int) -> None:
+    if downloaded % log_every == 0 or downloaded == total_size:
+        _logger.info("Downloaded Netzvertrag (%i/%i)", downloaded, total_size)
+
+
+def _create_patch_document(
+    current_state: _Model,
+    changes: list[Callable[[_Model], None]] | JsonPatch | list[dict[str, Any]],
+    guard_against_concurrent_modification: bool,
+    track_changes: bool = False,
+) -> jsonpatch.JsonPatch:
+    """
+    returns the patch document that applies the changes (callables or the JSON patch itself) to current_state
+    """
+    patch_document: jsonpatch.JsonPatch
+    if changes_are_callables(changes):
+        patch_document = build_json_patch_document(
+            current_state, cast(list[Callable[[_Model], None]], changes), track_changes=track_changes
+        )
+    else:
+        patch_document = jsonpatch.JsonPatch(changes)
+    if guard_against_concurrent_modification:
+        patch_document = add_test_operations(current_state, patch_document)
+    return patch_document
 
 
 class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod because tests instantiate this base class directly
@@ -51,12 +114,45 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
     an async wrapper around the TMDS API
     """
 
-    def __init__(self, config: TmdsConfig):
+    def __init__(
+        self,
+        config: TmdsConfig,
+        entity_cache: SqliteEntityCache | None = None,
+        memory_cache: InMemoryEntityCache | None = None,
+    ):
+        """
+        If an entity_cache is given, the single entity getters (get_netzvertrag_by_id, get_marktlokation,
+        get_messlokation and get_zaehler) store the response bodies in it and revalidate them on the next request.
+        If a memory_cache is given, the same getters return the parsed entities from it (as long as they're not expired)
+        and concurrent requests for the same entity are collapsed into one.
+        """
         self._config = config
         self._session_lock = asyncio.Lock()
         self._session: ClientSession | None = None
+        self._entity_cache = entity_cache
+        self._memory_cache = memory_cache
+        self._ssl_context: ssl.SSLContext | None = config.ssl_context
+        self._event_tracker: EventTracker | None = None
+        self._rate_limiter = RateLimiter(config.rate_limit) if config.rate_limit is not None else None
+        self._circuit_breaker = CircuitBreaker(config.circuit_breaker) if config.circuit_breaker is not None else None
+        self._write_queues: dict[str, CoalescingWriteQueue[Any]] = {}
         _logger.info("Instantiated TmdsClient with server_url %s", str(self._config.server_url))
 
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """
+        the rate limiter configured by config.rate_limit (if any); its statistics tell how long requests had to wait
+        """
+        return self._rate_limiter
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker | None:
+        """
+        the circuit breaker configured by config.circuit_breaker (if any); query its state to back off while TMDS is
+        degraded
+        """
+        return self._circuit_breaker
+
     def get_top_level_domain(self) -> URL | None:
         """
         Returns the top level domain of the server_url; this is useful to differentiate prod from test systems.
@@ -76,57 +172,135 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
             tld = ".".join(domain_parts[-2:])
         return URL(self._config.server_url.scheme + "://" + tld)
 
-    async def _get_session(self) -> ClientSession:
+    def _new_session(self) -> ClientSession:
+        """
+        creates the session that is shared by all requests (until it's closed)
+        """
         raise NotImplementedError("The inheriting class has to implement this with its respective authentication")
 
+    async def _get_session(self) -> ClientSession:
+        """
+        returns a client session (that may be reused or newly created)
+        reusing the same (threadsafe) session will be faster than re-creating a new session for every request.
+        see https://docs.aiohttp.org/en/stable/http_request_lifecycle.html#how-to-use-the-clientsession
+        """
+        session = self._session
+        if session is not None and not session.closed:
+            # fast path without the lock: there's no await between the check and the return, so no other coroutine
+            # can close or replace the session in between
+            return session
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                _logger.info("creating new session")
+                self._session = self._new_session()
+            else:
+                _logger.log(5, "reusing aiohttp session")  # log level 5 is half as "loud" logging.DEBUG
+            return self._session
+
+    def _create_session(self, **kwargs: Any) -> ClientSession:
+        """
+        creates a new client session whose connection pool and timeouts are configured according to the TmdsConfig;
+        the kwargs (e.g. auth or headers) are passed to the ClientSession
+        """
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        dns_cache_ttl = self._config.dns_cache_ttl
+        connector = TCPConnector(
+            limit=self._config.connection_limit,
+            limit_per_host=self._config.connection_limit_per_host,
+            keepalive_timeout=self._config.keepalive_timeout.total_seconds(),
+            ttl_dns_cache=int(dns_cache_ttl.total_seconds()) if dns_cache_ttl is not None else None,
+            ssl=self._ssl_context,
+        )
+        timeout = ClientTimeout(
+            total=_to_seconds(self._config.total_timeout),
+            connect=_to_seconds(self._config.connect_timeout),
+            sock_read=_to_seconds(self._config.read_timeout),
+        )
+        return ClientSession(connector=connector, timeout=timeout, raise_for_status=True, **kwargs)
+
+    async def _get_auth_headers(self) -> dict[str, str]:
+        """
+        returns the headers that authenticate a request; the default authentication is done by the session itself
+        """
+        return {}
+
+    @asynccontextmanager
+    async def _request(self, method: str, url: URL, **kwargs: Any) -> AsyncIterator[ClientResponse]:
+        """
+        Sends a request using the (shared) session; all requests to TMDS pass this method.
+        The kwargs are passed to ClientSession.request.
+        If a rate limit is configured, this waits until the request fits into the budget.
+        If a circuit breaker is configured and open, this raises a CircuitOpenError without sending the request.
+        """
+        guard: AbstractContextManager[None] = (
+            self._circuit_breaker.guard() if self._circuit_breaker is not None else nullcontext()
+        )
+        with guard:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire(method, url)
+            session = await self._get_session()
+            auth_headers = await self._get_auth_headers()
+            if auth_headers:
+                kwargs["headers"] = auth_headers | (kwargs.get("headers") or {})
+            async with session.request(method, url, **kwargs) as response:
+                yield response
+
     async def close_session(self) -> None:
         """
-        closes the client session
+        closes the client session (after the queued updates have been sent; stops waiting for pending events)
         """
+        for write_queue in self._write_queues.values():
+            await write_queue.flush()
+        if self._event_tracker is not None:
+            await self._event_tracker.close()
         async with self._session_lock:
             if self._session is not None and not self._session.closed:
                 _logger.info("Closing aiohttp session")
                 await self._session.close()
                 self._session = None
 
-    async def _poll_until_has_been_handled(
-        self, tmds_event_id: uuid.UUID, timeout: timedelta = timedelta(seconds=30)
-    ) -> bool:
+    async def _has_been_handled(self, tmds_event_id: uuid.UUID) -> bool:
         """
-        Polls the /hasBeenHandledEndpoint once per second until the event has been handled
-        Returns true if the event has been handled, false if the timeout has been reached.
+        asks the /hasBeenHandled endpoint (once) whether the event has been handled
         """
         url = self._config.server_url / "api/Event" / "hasBeenHandled" / str(tmds_event_id)
-        session = await self._get_session()
-        timeout_in_seconds: int = int(timeout.total_seconds())
-        seconds_left = timeout_in_seconds
-        while seconds_left > 0:
-            async with session.get(url, ssl=True) as response:
-                body = await response.text()
-                if body.lower() in {'"true"', "true"}:
-                    _logger.debug("Event %s has been handled", tmds_event_id)
-                    return True
-
-                _logger.log(5, "Event %s has not been handled yet. Waiting another second", tmds_event_id)
-                await asyncio.sleep(1)
-                seconds_left -= 1
-        _logger.warning("Event %s has not been handled after %s seconds", tmds_event_id, timeout_in_seconds)
-        await asyncio.sleep(60)  # slow down. slow down, at least in this thread
-        return False
+        async with self._request("GET", url, ssl=True) as response:
+            body = await response.text()
+        return body.lower() in {'"true"', "true"}
+
+    def _get_event_tracker(self) -> EventTracker:
+        if self._event_tracker is None:
+            self._event_tracker = EventTracker(self._has_been_handled, self._config.event_tracking)
+        return self._event_tracker
+
+    async def track_event(self, tmds_event_id: uuid.UUID, timeout: timedelta | None = None) -> "asyncio.Future[bool]":
+        """
+        Returns a future that resolves to true as soon as the event has been handled (or false, if it has not been
+        handled within the timeout; defaults to config.event_tracking.timeout).
+        All events are polled together by one background task of the client. If too many events are pending already
+        (see EventTrackingSettings.max_pending_events), this method waits until there is capacity for another event.
+        """
+        return await self._get_event_tracker().track(tmds_event_id, timeout)
+
+    async def _poll_until_has_been_handled(self, tmds_event_id: uuid.UUID, timeout: timedelta | None = None) -> bool:
+        """
+        Waits until the event has been handled.
+        Returns true if the event has been handled, false if the timeout has been reached.
+        """
+        return await self._get_event_tracker().wait_until_handled(tmds_event_id, timeout)
 
     async def get_netzvertraege_for_query_params(self, query_params: dict[str, str]) -> list[Netzvertrag]:
         """provide a list of query parameters that are directly passed on to the find endpoint"""
         if not any(query_params) or not any(str(x).strip() != "" for x in query_params.values()):
             raise ValueError("At least one query parameter must be provided")
-        session = await self._get_session()
         request_url = self._config.server_url / "api" / "Netzvertrag" / "find" % query_params
         request_uuid = uuid.uuid4()
         _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
+        async with self._request("GET", request_url) as response:
             response.raise_for_status()  # endpoint returns an empty list but no 404
             _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            _list_of_netzvertraege = _ListOfNetzvertraege.model_validate(response_json)
+            _list_of_netzvertraege = _ListOfNetzvertraege.model_validate_json(await response.read())
         return _list_of_netzvertraege.root
 
     async def get_netzvertraege_for_melo(self, melo_id: str) -> list[Netzvertrag]:
@@ -145,24 +319,181 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
             raise ValueError("You must not provide an empty malo_id")
         return await self.get_netzvertraege_for_query_params({"marktlokation": malo_id})
 
-    async def get_netzvertrag_by_id(self, nv_id: uuid.UUID) -> Netzvertrag | None:
+    async def _get_netzvertraege_for_many_query_params(
+        self,
+        query_param_name: Literal["messlokation", "marktlokation"],
+        query_param_values: Iterable[str],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        retry_policy: RetryPolicy | None,
+    ) -> dict[str, list[Netzvertrag]]:
         """
-        provide a UUID, get the matching netzvertrag in return (or None, if 404)
+        Calls the find endpoint for every distinct value of the query parameter (with bounded concurrency and retries).
+        A netzvertrag that is part of more than one response is only parsed once; all lists contain the same instance.
+        """
+        distinct_values = list(dict.fromkeys(query_param_values))
+        if not all(distinct_values):
+            raise ValueError(f"You must not provide an empty {query_param_name} ID")
+
+        async def find_raw(query_param_value: str) -> bytes | None:
+            request_url = (
+                self._config.server_url / "api" / "Netzvertrag" / "find" % {query_param_name: query_param_value}
+            )
+            return await self._get_raw(request_url)
+
+        parsed_netzvertraege: dict[uuid.UUID, Netzvertrag] = {}
+        results: dict[str, list[Netzvertrag]] = {}
+        async for query_param_value, body in run_with_bounded_concurrency(
+            distinct_values, find_raw, max_concurrency=max_concurrency, retry_policy=retry_policy or RetryPolicy()
+        ):
+            netzvertraege: list[Netzvertrag] = []
+            for netzvertrag_json in loads_json(body) if body else []:
+                nv_id = uuid.UUID(netzvertrag_json["id"])
+                netzvertrag = parsed_netzvertraege.get(nv_id)
+                if netzvertrag is None:
+                    netzvertrag = Netzvertrag.model_validate(netzvertrag_json)
+                    parsed_netzvertraege[nv_id] = netzvertrag
+                netzvertraege.append(netzvertrag)
+            results[query_param_value] = netzvertraege
+        _logger.info(
+            "Found %i distinct Netzvertraege for %i %s IDs",
+            len(parsed_netzvertraege),
+            len(distinct_values),
+            query_param_name,
+        )
+        return {value: results[value] for value in distinct_values}
+
+    async def get_netzvertraege_for_melos(
+        self,
+        melo_ids: Iterable[str],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, list[Netzvertrag]]:
+        """
+        provide many melo ids and get a dict with the corresponding netzverträge for each melo id in return.
+        Duplicate IDs are only requested once. A netzvertrag that belongs to more than one melo is the same instance in
+        all lists (so better don't modify it).
+        """
+        return await self._get_netzvertraege_for_many_query_params(
+            "messlokation", melo_ids, max_concurrency, retry_policy
+        )
+
+    async def get_netzvertraege_for_malos(
+        self,
+        malo_ids: Iterable[str],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, list[Netzvertrag]]:
+        """
+        provide many malo ids and get a dict with the corresponding netzverträge for each malo id in return.
+        Duplicate IDs are only requested once. A netzvertrag that belongs to more than one malo is the same instance in
+        all lists (so better don't modify it).
+        """
+        return await self._get_netzvertraege_for_many_query_params(
+            "marktlokation", malo_ids, max_concurrency, retry_policy
+        )
+
+    async def _get_raw(self, request_url: URL) -> bytes | None:
+        """
+        returns the undecoded body of a GET request to request_url (or None, if 404)
         """
-        session = await self._get_session()
-        request_url = self._config.server_url / "api" / "Netzvertrag" / str(nv_id)
         request_uuid = uuid.uuid4()
         _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
+        # the session raises for all error codes; we only want to raise for errors other than 404
+        async with self._request("GET", request_url, raise_for_status=False) as response:
             try:
                 if response.status == 404:
                     return None
                 response.raise_for_status()
             finally:
                 _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Netzvertrag.model_validate(response_json)
-        return result
+            return await response.read()
+
+    async def _get_entity_raw(
+        self, request_url: URL, entity_type: str, entity_id: str, keydate: str = ""
+    ) -> bytes | None:
+        """
+        like _get_raw but uses the entity cache (if any): a cached body is returned without a request as long as it's
+        fresh; otherwise it's revalidated with a conditional GET (and only downloaded again if it has been modified)
+        """
+        if self._entity_cache is None:
+            return await self._get_raw(request_url)
+        # sqlite is blocking; the cache is accessed in a separate thread, so that the other requests are not stalled
+        cached_entity = await asyncio.to_thread(self._entity_cache.get, entity_type, entity_id, keydate)
+        if cached_entity is not None and self._entity_cache.is_fresh(cached_entity):
+            _logger.debug("Using cached %s %s", entity_type, entity_id)
+            return cached_entity.body
+        request_uuid = uuid.uuid4()
+        _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
+        async with self._request(
+            "GET",
+            request_url,
+            headers=cached_entity.get_conditional_headers() if cached_entity is not None else None,
+            raise_for_status=False,
+        ) as response:
+            try:
+                if response.status == 304 and cached_entity is not None:
+                    await asyncio.to_thread(self._entity_cache.mark_as_revalidated, entity_type, entity_id, keydate)
+                    return cached_entity.body
+                if response.status == 404:
+                    return None
+                response.raise_for_status()
+            finally:
+                _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
+            body = await response.read()
+            await asyncio.to_thread(
+                self._entity_cache.put,
+                entity_type,
+                entity_id,
+                keydate,
+                body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return body
+
+    async def _get_entity(
+        self, model_class: type[_Model], request_url: URL, entity_id: str, keydate: str = ""
+    ) -> _Model | None:
+        """
+        returns the entity at request_url parsed as model_class (or None, if 404); uses the caches (if any)
+        """
+        entity_type = model_class.__name__
+
+        async def download_and_parse() -> _Model | None:
+            body = await self._get_entity_raw(request_url, entity_type, entity_id, keydate)
+            if body is None:
+                return None
+            return model_class.model_validate_json(body)
+
+        if self._memory_cache is None:
+            return await download_and_parse()
+        return await self._memory_cache.get_or_load(entity_type, entity_id, keydate, download_and_parse)
+
+    async def _invalidate_cached_entity(self, entity_type: str, entity_id: str) -> None:
+        """
+        removes the entity from the caches (if any), e.g. because it has been modified
+        """
+        if self._entity_cache is not None:
+            await asyncio.to_thread(self._entity_cache.invalidate, entity_type, entity_id)
+        if self._memory_cache is not None:
+            self._memory_cache.invalidate(entity_type, entity_id)
+
+    async def _get_netzvertrag_raw(self, nv_id: uuid.UUID) -> bytes | None:
+        return await self._get_raw(self._config.server_url / "api" / "Netzvertrag" / str(nv_id))
+
+    async def get_netzvertrag_by_id(self, nv_id: uuid.UUID) -> Netzvertrag | None:
+        """
+        provide a UUID, get the matching netzvertrag in return (or None, if 404)
+        """
+        request_url = self._config.server_url / "api" / "Netzvertrag" / str(nv_id)
+        return await self._get_entity(Netzvertrag, request_url, str(nv_id))
+
+    async def get_netzvertrag_by_id_raw(self, nv_id: uuid.UUID) -> bytes | None:
+        """
+        like get_netzvertrag_by_id but returns the undecoded response body without validating it (or None, if 404)
+        """
+        request_url = self._config.server_url / "api" / "Netzvertrag" / str(nv_id)
+        return await self._get_entity_raw(request_url, "Netzvertrag", str(nv_id))
 
     async def set_plattformfaehigkeit(
         self, external_ao_id: str, change_date: datetime, is_plattformfaehig: bool = True
@@ -172,6 +503,17 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
         """
         if change_date.tzinfo is None:
             raise ValueError("change_date must be timezone aware")
+        tmds_event_id = await self._post_plattformfaehigkeit(external_ao_id, change_date, is_plattformfaehig)
+        if tmds_event_id is None:
+            return True
+        return await self._poll_until_has_been_handled(tmds_event_id)
+
+    async def _post_plattformfaehigkeit(
+        self, external_ao_id: str, change_date: datetime, is_plattformfaehig: bool
+    ) -> uuid.UUID | None:
+        """
+        sends the setPlattform request and returns the ID of the resulting event (if any)
+        """
         url = (
             self._config.server_url
             / "api"
@@ -180,302 +522,914 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
             / "setPlattform"
             % {"aenderungsdatum": change_date.isoformat(), "plattformfaehig": str(is_plattformfaehig).lower()}
         )
-        session = await self._get_session()
-        async with session.post(url, ssl=True) as response:
+        async with self._request("POST", url, ssl=True) as response:
             # the beloved tmds api does not consistently return an event id
             id_string = response.headers.get("x-event-id")
         if id_string is None:
-            return True
-        tmds_event_id = uuid.UUID(id_string)
-        return await self._poll_until_has_been_handled(tmds_event_id)
+            return None
+        return uuid.UUID(id_string)
+
+    async def set_plattformfaehigkeit_many(
+        self,
+        changes: Iterable[PlattformfaehigkeitChange],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = 10,
+        retry_policy: RetryPolicy | None = None,
+        event_timeout: timedelta | None = None,
+    ) -> BulkPlattformfaehigkeitResult:
+        """
+        Sets the plattformfaehigkeit of many Anschlussobjekte. The POST requests are sent with bounded concurrency
+        (and are only retried if you provide a retry_policy). Their events are not awaited one after another but are
+        all tracked together by the client's event tracker (see track_event) while the remaining requests are sent.
+        Failing requests do not stop the others; each change gets its own outcome.
+        """
+        started = time.monotonic()
+        indexed_changes = list(enumerate(changes))
+
+        async def post_and_track(
+            indexed_change: tuple[int, PlattformfaehigkeitChange],
+        ) -> tuple[uuid.UUID | None, "asyncio.Future[bool] | None"]:
+            change = indexed_change[1]
+            tmds_event_id = await self._post_plattformfaehigkeit(
+                change.external_ao_id, change.change_date, change.is_plattformfaehig
+            )
+            if tmds_event_id is None:
+                return None, None
+            return tmds_event_id, await self.track_event(tmds_event_id, event_timeout)
+
+        post_results: dict[int, tuple[uuid.UUID | None, asyncio.Future[bool] | None] | Exception] = {}
+        async for (index, _), post_result in run_with_bounded_concurrency(
+            indexed_changes,
+            post_and_track,
+            max_concurrency=max_concurrency,
+            return_exceptions=True,
+            retry_policy=retry_policy,
+        ):
+            post_results[index] = post_result
+        outcomes: list[PlattformfaehigkeitOutcome] = []
+        failure_reasons: list[str | None] = []
+        for index, change in indexed_changes:
+            post_result = post_results[index]
+            if isinstance(post_result, Exception):
+                _logger.warning("Failed to set the plattformfaehigkeit of %s: %s", change.external_ao_id, post_result)
+                outcomes.append(PlattformfaehigkeitOutcome(change=change, success=False, error=str(post_result)))
+                failure_reasons.append(describe_failure(post_result))
+                continue
+            tmds_event_id, has_been_handled = post_result
+            success = True if has_been_handled is None else await asyncio.shield(has_been_handled)
+            outcomes.append(PlattformfaehigkeitOutcome(change=change, success=success, event_id=tmds_event_id))
+            failure_reasons.append(None if success else "event not handled in time")
+        summary = BulkOperationSummary.create(failure_reasons, timedelta(seconds=time.monotonic() - started))
+        _logger.info(
+            "Set the plattformfaehigkeit of %i Anschlussobjekte (%i failed) at %.1f items/s",
+            summary.number_of_items,
+            summary.number_of_failures,
+            summary.items_per_second,
+        )
+        return BulkPlattformfaehigkeitResult(outcomes=outcomes, summary=summary)
 
     async def get_all_netzvertrag_ids(self) -> list[uuid.UUID]:
         """
         get all IDs of netzverträge that exist on server side
         """
-        session = await self._get_session()
         request_url = self._config.server_url / "api" / "Netzvertrag" / "allIds"
         request_uuid = uuid.uuid4()
         _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
+        async with self._request("GET", request_url) as response:
             response.raise_for_status()
             _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            all_ids_response = AllIdsResponse.model_validate(response_json)
+            all_ids_response = AllIdsResponse.model_validate_json(await response.read())
         result = [uuid.UUID(x.interne_id) for x in all_ids_response.root["Netzvertrag"]]
         _logger.info("There are %i Netzvertraege on server side", len(result))
         return result
 
-    def _get_all_netzvertraege_stream(
-        self, all_ids: list[uuid.UUID], chunk_size: int
-    ) -> AsyncGenerator[Netzvertrag, None]:
+    def _download_netzvertraege(
+        self,
+        all_ids: list[uuid.UUID],
+        download: Callable[[uuid.UUID], Coroutine[Any, Any, _DownloadResult | None]],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[_DownloadResult, None]:
         """
-        download all netzverträge from TMDS
+        calls download for all the given netzvertrag IDs with at most max_concurrency requests in flight at the same
+        time; IDs for which download returns None (404) are skipped.
         """
+        log_every = max_concurrency if isinstance(max_concurrency, int) else _DEFAULT_CHUNK_SIZE
 
-        async def generator() -> AsyncGenerator[Netzvertrag, None]:
+        async def generator() -> AsyncGenerator[_DownloadResult, None]:
             successfully_downloaded = 0
-            for chunk_index, id_chunk in enumerate(chunked(all_ids, chunk_size)):
-                get_tasks = [self.get_netzvertrag_by_id(nv_id) for nv_id in id_chunk]
-                try:
-                    _result_chunk = await asyncio.gather(*get_tasks)
-                    for nv in _result_chunk:
-                        yield nv  # type: ignore[misc]
-                        # this must not be None, because we know the ID exists on server side
-                    successfully_downloaded += len(_result_chunk)
-                    _log_chunk_success(
-                        chunk_size=chunk_size,
-                        total_size=len(all_ids),
-                        chunk_idx=chunk_index,
-                        chunk_length=len(_result_chunk),
-                    )
-                except (TimeoutError, ClientResponseError) as chunk_error:
-                    if (
-                        isinstance(chunk_error, ClientResponseError)
-                        and chunk_error.status not in _retry_worthy_http_status_codes
-                    ):
-                        raise
-                    _logger.warning(
-                        "Failed to download chunk %i; Retrying one by one; %s", chunk_index, str(chunk_error)
-                    )
-                    for _nv_id in id_chunk:
-                        # This is a bit dumb; If we had aiostream here, we could create multiple requests at once
-                        # and yield from a merged stream. This might be a future improvement... For now it's ok.
-                        # With a moderate sized chunk_size it should be fine as there are not that many 500 errors.
-                        success_in_this_chunk = 0
-                        try:
-                            yield await self.get_netzvertrag_by_id(_nv_id)  # type: ignore[misc]
-                            # it should not be none here, because we know the ID exists, that would be a server error
-                            successfully_downloaded += 1
-                            success_in_this_chunk += 1
-                        except (TimeoutError, ClientResponseError) as single_error:
-                            if (
-                                isinstance(single_error, ClientResponseError)
-                                and single_error.status not in _retry_worthy_http_status_codes
-                            ):
-                                raise
-                            _logger.exception("Failed to download Netzvertrag %s; skipping", _nv_id)
-                            continue
-                        _log_chunk_success(
-                            chunk_size=chunk_size,
-                            total_size=len(all_ids),
-                            chunk_idx=chunk_index,
-                            chunk_length=success_in_this_chunk,
-                        )
+            async for nv_id, result_or_error in run_with_bounded_concurrency(
+                all_ids,
+                download,
+                max_concurrency=max_concurrency,
+                ordered=ordered,
+                return_exceptions=True,
+                retry_policy=retry_policy or RetryPolicy(),
+            ):
+                if isinstance(result_or_error, Exception):
+                    if not _is_retry_worthy(result_or_error):
+                        raise result_or_error
+                    _logger.error("Failed to download Netzvertrag %s; skipping; %s", nv_id, str(result_or_error))
+                    continue
+                if result_or_error is None:
+                    # the netzvertrag has been deleted since the /allIds request
+                    _logger.warning("Netzvertrag %s does not exist (anymore); skipping", nv_id)
+                    continue
+                yield result_or_error
+                successfully_downloaded += 1
+                _log_download_progress(successfully_downloaded, total_size=len(all_ids), log_every=log_every)
             _logger.info("Successfully downloaded %i Netzvertraege", successfully_downloaded)
 
         return generator()
         # This needs to be called to return an AsyncGenerator
 
-    async def _get_all_netzvertraege_list(self, all_ids: list[uuid.UUID], chunk_size: int) -> list[Netzvertrag]:
-        result: list[Netzvertrag] = []
-        for chunk_index, id_chunk in enumerate(chunked(all_ids, chunk_size)):
-            # we probably need to account for the fact that this leads to HTTP 500 errors, let's see
-            get_tasks = [self.get_netzvertrag_by_id(nv_id) for nv_id in id_chunk]
-            try:
-                result_chunk = await asyncio.gather(*get_tasks)
-            except ClientResponseError as chunk_client_error:
-                if chunk_client_error.status not in _retry_worthy_http_status_codes:
-                    raise
-                _logger.warning(
-                    "Failed to download chunk %i (%s); Retrying 1 by 1", chunk_index, str(chunk_client_error)
-                )
-                result_chunk = []
-                for nv_id in id_chunk:
-                    try:
-                        nv = await self.get_netzvertrag_by_id(nv_id)
-                    except ClientResponseError as single_client_error:
-                        if single_client_error.status not in _retry_worthy_http_status_codes:
-                            raise
-                        _logger.exception("Failed to download Netzvertrag %s; skipping", nv_id)
-                        continue
-                    assert nv is not None
-                    result_chunk.append(nv)
-            if any(x is None for x in result_chunk):
-                raise ValueError("This must not happen.")
-            _log_chunk_success(
-                chunk_size=chunk_size, chunk_idx=chunk_index, total_size=len(all_ids), chunk_length=len(result_chunk)
-            )
-            result.extend(result_chunk)  # type: ignore[arg-type]
-        _logger.info("Successfully downloaded %i Netzvertraege", len(result))
-        return result
+    def _get_all_netzvertraege_stream(
+        self,
+        all_ids: list[uuid.UUID],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[Netzvertrag, None]:
+        """
+        download all netzverträge from TMDS
+        """
+        return self._download_netzvertraege(all_ids, self.get_netzvertrag_by_id, max_concurrency, ordered, retry_policy)
+
+    async def _get_all_netzvertraege_list(
+        self,
+        all_ids: list[uuid.UUID],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> list[Netzvertrag]:
+        stream = self._get_all_netzvertraege_stream(all_ids, max_concurrency, ordered, retry_policy)
+        return [nv async for nv in stream]
 
     @overload
     async def get_all_netzvertraege(
-        self, as_generator: Literal[False], chunk_size: int = _DEFAULT_CHUNK_SIZE
+        self,
+        as_generator: Literal[False],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        *,
+        chunk_size: int | None = None,
     ) -> list[Netzvertrag]: ...
 
     @overload
     async def get_all_netzvertraege(
-        self, as_generator: Literal[True], chunk_size: int = _DEFAULT_CHUNK_SIZE
+        self,
+        as_generator: Literal[True],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        *,
+        chunk_size: int | None = None,
     ) -> AsyncGenerator[Netzvertrag, None]: ...
 
     async def get_all_netzvertraege(
-        self, as_generator: bool, chunk_size: int = _DEFAULT_CHUNK_SIZE
+        self,
+        as_generator: bool,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        *,
+        chunk_size: int | None = None,
     ) -> list[Netzvertrag] | AsyncGenerator[Netzvertrag, None]:
         """
-        download all netzverträge from TMDS
+        download all netzverträge from TMDS.
+        max_concurrency is the number of requests that are kept in flight at the same time (chunk_size is a deprecated
+        alias for it).
+        The list (as_generator=False) is in the order of the IDs returned by the /allIds endpoint, the generator yields
+        the netzverträge in the order in which their download finished. Use ordered to override this.
+        If you provide an AdaptiveConcurrencyLimiter as max_concurrency, it adapts the number of concurrent requests to
+        the load of the server. The same limiter may be re-used for the next run to start at the learned limit.
+        Netzverträge that fail to download because of (probably) high load on the server are retried according to the
+        retry_policy (defaults to RetryPolicy()); if they still fail, they are skipped and logged.
         """
+        if chunk_size is not None:
+            warnings.warn("chunk_size is deprecated; use max_concurrency instead", DeprecationWarning, stacklevel=2)
+            max_concurrency = chunk_size
+        if ordered is None:
+            ordered = not as_generator
         all_ids = await self.get_all_netzvertrag_ids()
 
         if as_generator:
-            return self._get_all_netzvertraege_stream(all_ids, chunk_size)
-        return await self._get_all_netzvertraege_list(all_ids, chunk_size)
+            return self._get_all_netzvertraege_stream(all_ids, max_concurrency, ordered, retry_policy)
+        return await self._get_all_netzvertraege_list(all_ids, max_concurrency, ordered, retry_policy)
 
-    async def update_netzvertrag(
+    @overload
+    async def get_all_netzvertraege_raw(
         self,
-        netzvertrag_id: uuid.UUID,
-        changes: list[Callable[[Netzvertrag], None]],
-        keydate: AwareDatetime | None = None,
-    ) -> Netzvertrag:
+        decode: Literal[False] = False,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[bytes, None]: ...
+
+    @overload
+    async def get_all_netzvertraege_raw(
+        self,
+        decode: Literal[True],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[dict[str, Any], None]: ...
+
+    async def get_all_netzvertraege_raw(
+        self,
+        decode: bool = False,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        ordered: bool = False,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[bytes, None] | AsyncGenerator[dict[str, Any], None]:
         """
-        patch the given netzvertrag using the changes
+        Like get_all_netzvertraege(as_generator=True) but the netzverträge are not validated (which is the CPU
+        bottleneck of the bulk download). By default, the undecoded response bodies are yielded; with decode=True the
+        plain (JSON) dicts are yielded instead.
+        Use this if you only pass the netzverträge on (e.g. to a data lake) and do not need the Netzvertrag models.
+        """
+        all_ids = await self.get_all_netzvertrag_ids()
+        if not decode:
+            return self._download_netzvertraege(
+                all_ids, self._get_netzvertrag_raw, max_concurrency, ordered, retry_policy
+            )
+
+        async def download_and_decode(nv_id: uuid.UUID) -> dict[str, Any] | None:
+            body = await self._get_netzvertrag_raw(nv_id)
+            if body is None:
+                return None
+            return loads_json(body)  # type: ignore[no-any-return]
+
+        return self._download_netzvertraege(all_ids, download_and_decode, max_concurrency, ordered, retry_policy)
+
+    async def get_all_netzvertraege_resumable(
+        self,
+        checkpoint_path: Path,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[Netzvertrag, None]:
+        """
+        Like get_all_netzvertraege(as_generator=True) but the IDs of the netzverträge you have processed are written to
+        a local checkpoint file. A netzvertrag counts as processed as soon as you request the next one from the
+        generator. If the download is interrupted (e.g. by an error or a restart of the process), call this method with
+        the same checkpoint_path again to only download the netzverträge which have not been processed yet.
+        The checkpoint is never deleted by this method; use a new checkpoint_path (or delete the file) to start over.
+        Netzverträge that have been deleted since the /allIds request (404) are skipped and marked as completed.
+        """
+        all_ids = await self.get_all_netzvertrag_ids()
+        checkpoint = DownloadCheckpoint(checkpoint_path)
+        completed_ids = checkpoint.load()
+        missing_ids = [nv_id for nv_id in all_ids if nv_id not in completed_ids]
+        _logger.info(
+            "%i/%i Netzvertraege have already been downloaded according to checkpoint %s",
+            len(all_ids) - len(missing_ids),
+            len(all_ids),
+            checkpoint_path,
+        )
+
+        async def download_with_id(nv_id: uuid.UUID) -> tuple[uuid.UUID, Netzvertrag | None]:
+            return nv_id, await self.get_netzvertrag_by_id(nv_id)
+
+        async def generator() -> AsyncGenerator[Netzvertrag, None]:
+            with checkpoint:
+                stream = self._download_netzvertraege(
+                    missing_ids,
+                    download_with_id,
+                    max_concurrency,
+                    retry_policy=retry_policy,
+                )
+                async for nv_id, nv in stream:
+                    if nv is None:
+                        # deleted after the /allIds request; there is nothing to download in the next run either
+                        _logger.warning("Netzvertrag %s does not exist (anymore); skipping", nv_id)
+                        checkpoint.mark_as_completed(nv_id)
+                        continue
+                    yield nv
+                    checkpoint.mark_as_completed(nv_id)
+
+        return generator()
+
+    async def export_all_netzvertraege_to_ndjson(
+        self,
+        directory: Path,
+        compress: bool = False,
+        max_bytes_per_file: int | None = None,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> NdjsonExportResult:
+        """
+        Downloads all netzverträge from TMDS and writes them into NDJSON files 'netzvertraege-00000.ndjson' (and
+        '-00001', '-00002'... if max_bytes_per_file is set) in the given directory; with compress=True the files are
+        gzipped.
+        The response bodies are written as they are, i.e. they are neither parsed into Netzvertrag objects nor
+        re-serialized. Other than get_all_netzvertraege(as_generator=False) the memory consumption does not grow with
+        the number of netzverträge.
+        """
+        all_ids = await self.get_all_netzvertrag_ids()
+        bodies = self._download_netzvertraege(
+            all_ids,
+            self._get_netzvertrag_raw,
+            max_concurrency,
+            retry_policy=retry_policy,
+        )
+        return await export_to_ndjson(
+            bodies,
+            directory,
+            file_name_prefix="netzvertraege",
+            compress=compress,
+            max_bytes_per_file=max_bytes_per_file,
+        )
+
+    async def sync_netzvertraege(
+        self,
+        snapshot_path: Path,
+        revalidate_after: timedelta | None = timedelta(days=1),
+        suspected_ids: Iterable[uuid.UUID] = (),
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> NetzvertragDeltaSyncResult:
+        """
+        Incrementally synchronizes the netzverträge with a local snapshot (a JSON file at snapshot_path that contains
+        the IDs and fingerprints of all netzverträge seen so far) and updates the snapshot.
+        The /allIds response is diffed against the snapshot. Only those netzverträge are downloaded that are new, that
+        have not been downloaded for longer than revalidate_after (None means: never revalidate) or whose IDs you
+        suspect to have changed (suspected_ids). The fingerprint of each downloaded body tells whether it changed.
+        Only new and changed netzverträge are parsed.
+        The first sync (without a snapshot) downloads all netzverträge.
+        """
+        snapshot = EntitySnapshot.load(snapshot_path)
+        all_ids = await self.get_all_netzvertrag_ids()
+        ids_to_download = snapshot.get_ids_to_download(all_ids, revalidate_after, suspected_ids)
+        all_id_set = set(all_ids)
+        removed_ids = [nv_id for nv_id in snapshot.entries if nv_id not in all_id_set]
+        _logger.info(
+            "Downloading %i of %i Netzvertraege; %i have been removed",
+            len(ids_to_download),
+            len(all_ids),
+            len(removed_ids),
+        )
+
+        async def download_with_id(nv_id: uuid.UUID) -> tuple[uuid.UUID, bytes | None]:
+            return nv_id, await self._get_netzvertrag_raw(nv_id)
+
+        added: list[Netzvertrag] = []
+        changed: list[Netzvertrag] = []
+        unchanged_ids: list[uuid.UUID] = []
+        downloaded_ids: set[uuid.UUID] = set()
+        download_stream = self._download_netzvertraege(
+            ids_to_download,
+            download_with_id,
+            max_concurrency,
+            retry_policy=retry_policy,
+        )
+        async for nv_id, body in download_stream:
+            if body is None:
+                # deleted after the /allIds request; it has been removed only if it has been synced before
+                if nv_id in snapshot.entries:
+                    removed_ids.append(nv_id)
+                continue
+            downloaded_ids.add(nv_id)
+            new_entry = SnapshotEntry(fingerprint=fingerprint(body), downloaded_at=datetime.now(UTC))
+            old_entry = snapshot.entries.get(nv_id)
+            snapshot.entries[nv_id] = new_entry
+            if old_entry is not None and old_entry.fingerprint == new_entry.fingerprint:
+                unchanged_ids.append(nv_id)
+            elif old_entry is None:
+                added.append(Netzvertrag.model_validate_json(body))
+            else:
+                changed.append(Netzvertrag.model_validate_json(body))
+        for removed_id in removed_ids:
+            snapshot.entries.pop(removed_id, None)
+        snapshot.save(snapshot_path)
+        result = NetzvertragDeltaSyncResult(
+            added=added,
+            changed=changed,
+            unchanged_ids=unchanged_ids,
+            removed_ids=removed_ids,
+            not_downloaded_ids=[
+                nv_id for nv_id in all_ids if nv_id not in downloaded_ids and nv_id in snapshot.entries
+            ],
+        )
+        _logger.info(
+            "Sync result: %i added, %i changed, %i unchanged, %i removed Netzvertraege",
+            len(result.added),
+            len(result.changed),
+            len(result.unchanged_ids),
+            len(result.removed_ids),
+        )
+        return result
+
+    async def _build_patch_document(
+        self,
+        changes: list[Callable[[_Model], None]] | JsonPatch,
+        current_state: _Model | None,
+        load_current_state: Callable[[], Coroutine[Any, Any, _Model | None]],
+        not_found_message: str,
+        guard_against_concurrent_modification: bool,
+    ) -> jsonpatch.JsonPatch:
+        """
+        Returns the patch document for the changes. The current state is only downloaded if it's needed and has not
+        been provided: to apply change callables or to add test operations to the patch.
+        """
+        if not changes_are_callables(changes) and not guard_against_concurrent_modification:
+            # assume it's the patch itself; no need to download anything
+            return jsonpatch.JsonPatch(changes)
+        if current_state is None:
+            current_state = await load_current_state()
+            if current_state is None:
+                raise ValueError(not_found_message)
+        return _create_patch_document(current_state, changes, guard_against_concurrent_modification)
+
+    async def _send_patch(
+        self,
+        model_class: type[_Model],
+        request_url: URL,
+        entity_type: str,
+        entity_id: str,
+        patch_document: jsonpatch.JsonPatch,
+        keydate: AwareDatetime | None,
+    ) -> _Model:
+        """
+        sends the patch document to the v2 endpoint at request_url and returns the updated entity
         """
-        session = await self._get_session()
-        netzvertrag = await self.get_netzvertrag_by_id(netzvertrag_id)
-        if netzvertrag is None:
-            raise ValueError(f"Netzvertrag with id {netzvertrag_id} not found")
-        patch_document = build_json_patch_document(netzvertrag, changes)
-        request_url = self._config.server_url / "api" / "v2" / "Netzvertrag" / str(netzvertrag_id)
         if keydate is not None:  # if it's None it defaults to now(UTC) on serverside anyway
             request_url = request_url % {"aenderungsDatum": keydate.isoformat()}
         request_uuid = uuid.uuid4()
         _logger.debug("[%s] patching %s with body %s", str(request_uuid), request_url, str(patch_document))
-        async with session.patch(
-            request_url, json=patch_document.patch, headers={"Content-Type": "application/json-patch+json"}
+        async with self._request(
+            "PATCH", request_url, json=patch_document.patch, headers={"Content-Type": "application/json-patch+json"}
         ) as response:
             response.raise_for_status()
             _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Netzvertrag.model_validate(response_json)
+            result = model_class.model_validate_json(await response.read())
+        await self._invalidate_cached_entity(entity_type, entity_id)
         return result
 
+    async def update_netzvertrag(
+        self,
+        netzvertrag_id: uuid.UUID,
+        changes: list[Callable[[Netzvertrag], None]] | JsonPatch,
+        keydate: AwareDatetime | None = None,
+        current_state: Netzvertrag | None = None,
+        guard_against_concurrent_modification: bool = False,
+    ) -> Netzvertrag:
+        """
+        Patch the given netzvertrag using the changes (either callables that modify the netzvertrag or a JSON patch).
+        The changes are applied to current_state; only if you don't provide it, the netzvertrag is downloaded first.
+        A JSON patch is sent as it is, without downloading the netzvertrag.
+        With guard_against_concurrent_modification, the patch starts with test operations that make the server reject
+        the patch if the values it changes differ from current_state (which is downloaded, if not provided).
+        """
+        patch_document = await self._build_patch_document(
+            changes,
+            current_state,
+            lambda: self.get_netzvertrag_by_id(netzvertrag_id),
+            f"Netzvertrag with id {netzvertrag_id} not found",
+            guard_against_concurrent_modification,
+        )
+        request_url = self._config.server_url / "api" / "v2" / "Netzvertrag" / str(netzvertrag_id)
+        return await self._send_patch(
+            Netzvertrag, request_url, "Netzvertrag", str(netzvertrag_id), patch_document, keydate
+        )
+
     async def update_marktlokation(
         self,
         malo_id: str,
         changes: list[Callable[[Marktlokation], None]] | JsonPatch,
         keydate: AwareDatetime | None = None,
+        current_state: Marktlokation | None = None,
+        guard_against_concurrent_modification: bool = False,
     ) -> Marktlokation:
         """
-        patch the given marktlokation using the changes
+        Patch the given marktlokation using the changes (either callables that modify the marktlokation or a JSON
+        patch); see update_netzvertrag for the meaning of current_state and guard_against_concurrent_modification.
         """
-        session = await self._get_session()
-        marktlokation = await self.get_marktlokation(malo_id)
-        if marktlokation is None:
-            raise ValueError(f"Marktlokation with id '{malo_id}' not found")
-        patch_document: jsonpatch.JsonPatch
-        if isinstance(changes, list) and len(changes) > 0 and not isinstance(changes[0], dict):
-            # we assume that "not isinstance(changes[0], dict)" == isinstance(changes[0], Callable)
-            patch_document = build_json_patch_document(marktlokation, changes)
-        else:
-            # assume it's the patch itself
-            patch_document = jsonpatch.JsonPatch(changes)
+        patch_document = await self._build_patch_document(
+            changes,
+            current_state,
+            lambda: self.get_marktlokation(malo_id),
+            f"Marktlokation with id '{malo_id}' not found",
+            guard_against_concurrent_modification,
+        )
         request_url = self._config.server_url / "api" / "v2" / "Marktlokation" / str(malo_id)
-        if keydate is not None:  # if it's None it defaults to now(UTC) on serverside anyway
-            request_url = request_url % {"aenderungsDatum": keydate.isoformat()}
-        request_uuid = uuid.uuid4()
-        _logger.debug("[%s] patching %s with body %s", str(request_uuid), request_url, str(patch_document))
-        async with session.patch(
-            request_url, json=patch_document.patch, headers={"Content-Type": "application/json-patch+json"}
-        ) as response:
-            response.raise_for_status()
-            _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Marktlokation.model_validate(response_json)
-        return result
+        return await self._send_patch(
+            Marktlokation, request_url, "Marktlokation", str(malo_id), patch_document, keydate
+        )
 
     async def update_zaehler(
         self,
         zaehler_id: uuid.UUID,
         changes: list[Callable[[Zaehler], None]] | JsonPatch,
         keydate: AwareDatetime | None = None,
+        current_state: Zaehler | None = None,
+        guard_against_concurrent_modification: bool = False,
     ) -> Zaehler:
         """
-        patch the given zaehler using the changes
+        Patch the given zaehler using the changes (either callables that modify the zaehler or a JSON patch); see
+        update_netzvertrag for the meaning of current_state and guard_against_concurrent_modification.
+        If the zaehler has to be downloaded, it's downloaded at the keydate.
         """
-        session = await self._get_session()
-        zaehler = await self.get_zaehler(zaehler_id, keydate)
-        if zaehler is None:
-            raise ValueError(f"Zaehler with id '{zaehler_id}' not found")
-        patch_document: jsonpatch.JsonPatch
-        if isinstance(changes, list) and len(changes) > 0 and not isinstance(changes[0], dict):
-            # we assume that "not isinstance(changes[0], dict)" == isinstance(changes[0], Callable)
-            patch_document = build_json_patch_document(zaehler, changes)
-        else:
-            # assume it's the patch itself
-            patch_document = jsonpatch.JsonPatch(changes)
+        patch_document = await self._build_patch_document(
+            changes,
+            current_state,
+            lambda: self.get_zaehler(zaehler_id, keydate),
+            f"Zaehler with id '{zaehler_id}' not found",
+            guard_against_concurrent_modification,
+        )
         request_url = self._config.server_url / "api" / "v2" / "Zaehler" / str(zaehler_id)
-        if keydate is not None:  # if it's None it defaults to now(UTC) on serverside anyway
-            request_url = request_url % {"aenderungsDatum": keydate.isoformat()}
-        request_uuid = uuid.uuid4()
-        _logger.debug("[%s] patching %s with body %s", str(request_uuid), request_url, str(patch_document))
-        async with session.patch(
-            request_url, json=patch_document.patch, headers={"Content-Type": "application/json-patch+json"}
-        ) as response:
-            response.raise_for_status()
-            _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Zaehler.model_validate(response_json)
-        return result
+        return await self._send_patch(Zaehler, request_url, "Zaehler", str(zaehler_id), patch_document, keydate)
+
+    async def _update_many(
+        self,
+        model_class: type[_Model],
+        entity_type: str,
+        items: Iterable[BulkUpdateItem[_Model]],
+        get_raw: Callable[[BulkUpdateItem[_Model]], Coroutine[Any, Any, bytes | None]],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        retry_policy: RetryPolicy | None,
+        guard_against_concurrent_modification: bool,
+        track_changes: bool,
+    ) -> BulkUpdateResult[_Model]:
+        """
+        The bulk update pipeline: For each item, the current state is downloaded (only if the changes are callables or
+        a guard is requested), the patch is built (in a separate thread, if the entity is large) and sent; with bounded
+        concurrency, so that the items are in different stages at the same time. Items that fail with an error worth
+        retrying are retried as a whole (including the download of the current state). Once a patch has been sent, it
+        might have been applied already; it's only retried if applying it twice cannot change the entity twice (see
+        can_be_sent_twice), e.g. an 'add' to the end of a list only if the JSON patch tests the list. The retry is built
+        from the state downloaded again, so the test operations added by the guard don't prevent a second application.
+        Items for the same entity are not coordinated with each other.
+        """
+        started = time.monotonic()
+        indexed_items = list(enumerate(items))
+        errors_after_sending_unrepeatable_patches: set[Exception] = set()
+
+        def is_retryable(error: Exception) -> bool:
+            return error not in errors_after_sending_unrepeatable_patches and _is_retry_worthy(error)
+
+        def get_changes(item: BulkUpdateItem[_Model]) -> list[Callable[[_Model], None]] | list[dict[str, Any]]:
+            # the changes may be any sequence (e.g. a tuple) but the patch functions distinguish them by type list
+            return cast(list[Callable[[_Model], None]] | list[dict[str, Any]], list(item.changes))
+
+        def parse_and_create_patch_document(
+            body: bytes, item: BulkUpdateItem[_Model]
+        ) -> tuple[_Model, jsonpatch.JsonPatch]:
+            current_state = model_class.model_validate_json(body)
+            return current_state, _create_patch_document(
+                current_state, get_changes(item), guard_against_concurrent_modification, track_changes
+            )
+
+        async def update(indexed_item: tuple[int, BulkUpdateItem[_Model]]) -> tuple[_Model, bool]:
+            item = indexed_item[1]
+            entity_id = str(item.entity_id)
+            request_url = self._config.server_url / "api" / "v2" / entity_type / entity_id
+            is_unguarded_json_patch = (
+                not changes_are_callables(get_changes(item)) and not guard_against_concurrent_modification
+            )
+            if is_unguarded_json_patch:
+                patch_document = jsonpatch.JsonPatch(get_changes(item))
+            else:
+                body = await get_raw(item)
+                if body is None:
+                    raise ValueError(f"{entity_type} with id '{entity_id}' not found")
+                if len(body) >= _MIN_BODY_SIZE_TO_PATCH_IN_THREAD:
+                    current_state, patch_document = await asyncio.to_thread(parse_and_create_patch_document, body, item)
+                else:
+                    current_state, patch_document = parse_and_create_patch_document(body, item)
+                if all(operation["op"] == "test" for operation in patch_document.patch):
+                    _logger.debug("%s %s is up to date already", entity_type, entity_id)
+                    return current_state, False
+            if changes_are_callables(get_changes(item)):
+                is_repeatable = can_be_sent_twice([x for x in patch_document.patch if x["op"] != "test"])
+            else:
+                is_repeatable = can_be_sent_twice(cast(list[dict[str, Any]], get_changes(item)))
+            try:
+                return (
+                    await self._send_patch(
+                        model_class, request_url, entity_type, entity_id, patch_document, item.keydate
+                    ),
+                    True,
+                )
+            except Exception as error:
+                # the patch might have been applied nonetheless; a retry must not use a cached state
+                await self._invalidate_cached_entity(entity_type, entity_id)
+                if not is_repeatable:
+                    errors_after_sending_unrepeatable_patches.add(error)
+                raise
+
+        outcomes: list[BulkUpdateOutcome[_Model]] = []
+        failure_reasons: list[str | None] = []
+        async for (_, item), result in run_with_bounded_concurrency(
+            indexed_items,
+            update,
+            max_concurrency=max_concurrency,
+            ordered=True,
+            return_exceptions=True,
+            retry_policy=retry_policy or RetryPolicy(),
+            is_retryable=is_retryable,
+        ):
+            if isinstance(result, Exception):
+                _logger.warning("Failed to update %s %s: %s", entity_type, item.entity_id, result)
+                outcomes.append(BulkUpdateOutcome[_Model](item=item, error=str(result)))
+                failure_reasons.append(describe_failure(result))
+                continue
+            entity, has_been_patched = result
+            outcomes.append(BulkUpdateOutcome[_Model](item=item, entity=entity, has_been_patched=has_been_patched))
+            failure_reasons.append(None)
+        summary = BulkOperationSummary.create(failure_reasons, timedelta(seconds=time.monotonic() - started))
+        _logger.info(
+            "Updated %i %s entities (%i failed) at %.1f items/s",
+            summary.number_of_items,
+            entity_type,
+            summary.number_of_failures,
+            summary.items_per_second,
+        )
+        return BulkUpdateResult[_Model](outcomes=outcomes, summary=summary)
+
+    async def update_netzvertraege(
+        self,
+        items: Iterable[BulkUpdateItem[Netzvertrag]],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = 10,
+        retry_policy: RetryPolicy | None = None,
+        guard_against_concurrent_modification: bool = False,
+        track_changes: bool = False,
+    ) -> BulkUpdateResult[Netzvertrag]:
+        """
+        Updates many netzverträge like update_netzvertrag but with bounded concurrency and retries. Failing items do
+        not stop the others; each item gets its own outcome. If the changes do not change anything, no PATCH request
+        is sent. With track_changes, the patches are built by tracking the changes (see build_json_patch_document).
+        """
+
+        async def get_raw(item: BulkUpdateItem[Netzvertrag]) -> bytes | None:
+            return await self.get_netzvertrag_by_id_raw(uuid.UUID(str(item.entity_id)))
+
+        return await self._update_many(
+            Netzvertrag,
+            "Netzvertrag",
+            items,
+            get_raw,
+            max_concurrency,
+            retry_policy,
+            guard_against_concurrent_modification,
+            track_changes,
+        )
+
+    async def update_marktlokationen(
+        self,
+        items: Iterable[BulkUpdateItem[Marktlokation]],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = 10,
+        retry_policy: RetryPolicy | None = None,
+        guard_against_concurrent_modification: bool = False,
+        track_changes: bool = False,
+    ) -> BulkUpdateResult[Marktlokation]:
+        """
+        updates many marktlokationen like update_marktlokation; see update_netzvertraege for details
+        """
+
+        async def get_raw(item: BulkUpdateItem[Marktlokation]) -> bytes | None:
+            return await self.get_marktlokation_raw(str(item.entity_id))
+
+        return await self._update_many(
+            Marktlokation,
+            "Marktlokation",
+            items,
+            get_raw,
+            max_concurrency,
+            retry_policy,
+            guard_against_concurrent_modification,
+            track_changes,
+        )
+
+    async def update_zaehler_many(
+        self,
+        items: Iterable[BulkUpdateItem[Zaehler]],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = 10,
+        retry_policy: RetryPolicy | None = None,
+        guard_against_concurrent_modification: bool = False,
+        track_changes: bool = False,
+    ) -> BulkUpdateResult[Zaehler]:
+        """
+        updates many zaehler like update_zaehler (each one is downloaded at the keydate of its item); see
+        update_netzvertraege for details
+        """
+
+        async def get_raw(item: BulkUpdateItem[Zaehler]) -> bytes | None:
+            return await self.get_zaehler_raw(uuid.UUID(str(item.entity_id)), item.keydate)
+
+        return await self._update_many(
+            Zaehler,
+            "Zaehler",
+            items,
+            get_raw,
+            max_concurrency,
+            retry_policy,
+            guard_against_concurrent_modification,
+            track_changes,
+        )
+
+    def _get_write_queue(
+        self,
+        entity_type: str,
+        update: Callable[
+            [str, list[Callable[[_Model], None]] | JsonPatch, datetime | None], Coroutine[Any, Any, _Model]
+        ],
+    ) -> CoalescingWriteQueue[_Model]:
+        if entity_type not in self._write_queues:
+            self._write_queues[entity_type] = CoalescingWriteQueue(update, self._config.write_coalescing)
+        return self._write_queues[entity_type]
+
+    async def queue_netzvertrag_update(
+        self,
+        netzvertrag_id: uuid.UUID,
+        changes: list[Callable[[Netzvertrag], None]] | JsonPatch,
+        keydate: AwareDatetime | None = None,
+    ) -> Netzvertrag:
+        """
+        Like update_netzvertrag, but the changes are queued for a short time (see config.write_coalescing) and combined
+        with the changes that other callers queue for the same netzvertrag and keydate in the meantime. All of them
+        are sent as one update; every caller gets the netzvertrag after this update.
+        """
+
+        async def update(
+            entity_id: str, combined_changes: Changes[Netzvertrag], _keydate: datetime | None
+        ) -> Netzvertrag:
+            return await self.update_netzvertrag(uuid.UUID(entity_id), combined_changes, _keydate)
+
+        write_queue = self._get_write_queue("Netzvertrag", update)
+        return await write_queue.submit(str(netzvertrag_id), changes, keydate)
+
+    async def queue_marktlokation_update(
+        self,
+        malo_id: str,
+        changes: list[Callable[[Marktlokation], None]] | JsonPatch,
+        keydate: AwareDatetime | None = None,
+    ) -> Marktlokation:
+        """
+        like update_marktlokation but combined with concurrent updates of the same marktlokation; see
+        queue_netzvertrag_update
+        """
+
+        async def update(
+            entity_id: str,
+            combined_changes: list[Callable[[Marktlokation], None]] | JsonPatch,
+            _keydate: datetime | None,
+        ) -> Marktlokation:
+            return await self.update_marktlokation(entity_id, combined_changes, _keydate)
+
+        write_queue = self._get_write_queue("Marktlokation", update)
+        return await write_queue.submit(malo_id, changes, keydate)
+
+    async def queue_zaehler_update(
+        self,
+        zaehler_id: uuid.UUID,
+        changes: list[Callable[[Zaehler], None]] | JsonPatch,
+        keydate: AwareDatetime | None = None,
+    ) -> Zaehler:
+        """
+        like update_zaehler but combined with concurrent updates of the same zaehler; see queue_netzvertrag_update
+        """
+
+        async def update(entity_id: str, combined_changes: Changes[Zaehler], _keydate: datetime | None) -> Zaehler:
+            return await self.update_zaehler(uuid.UUID(entity_id), combined_changes, _keydate)
+
+        write_queue = self._get_write_queue("Zaehler", update)
+        return await write_queue.submit(str(zaehler_id), changes, keydate)
 
     async def get_messlokation(self, messlokation_id: str) -> Messlokation | None:
         """
         provide a Messlokation-ID, get the matching MeLo in return (or None, if 404)
         """
-        session = await self._get_session()
         request_url = self._config.server_url / "api" / "Messlokation" / messlokation_id
-        request_uuid = uuid.uuid4()
-        _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
-            try:
-                if response.status == 404:
-                    return None
-                response.raise_for_status()
-            finally:
-                _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Messlokation.model_validate(response_json)
-        return result
+        return await self._get_entity(Messlokation, request_url, messlokation_id)
+
+    async def get_messlokation_raw(self, messlokation_id: str) -> bytes | None:
+        """
+        like get_messlokation but returns the undecoded response body without validating it (or None, if 404)
+        """
+        request_url = self._config.server_url / "api" / "Messlokation" / messlokation_id
+        return await self._get_entity_raw(request_url, "Messlokation", messlokation_id)
 
     async def get_zaehler(self, zaehler_id: uuid.UUID, keydate: AwareDatetime | None = None) -> Zaehler | None:
         """
         provide a Zaehler-ID, get the matching Zaehler in return (or None, if 404)
         """
-        session = await self._get_session()
         request_url = self._config.server_url / "api" / "Zaehler" / str(zaehler_id)
         if keydate is not None:
             request_url = request_url / keydate.isoformat()
-        request_uuid = uuid.uuid4()
-        _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
-            try:
-                if response.status == 404:
-                    return None
-                response.raise_for_status()
-            finally:
-                _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Zaehler.model_validate(response_json)
-        return result
+        return await self._get_entity(
+            Zaehler, request_url, str(zaehler_id), keydate.isoformat() if keydate is not None else ""
+        )
+
+    async def get_zaehler_raw(self, zaehler_id: uuid.UUID, keydate: AwareDatetime | None = None) -> bytes | None:
+        """
+        like get_zaehler but returns the undecoded response body without validating it (or None, if 404)
+        """
+        request_url = self._config.server_url / "api" / "Zaehler" / str(zaehler_id)
+        if keydate is not None:
+            request_url = request_url / keydate.isoformat()
+        return await self._get_entity_raw(
+            request_url, "Zaehler", str(zaehler_id), keydate.isoformat() if keydate is not None else ""
+        )
 
     async def get_marktlokation(self, malo_id: str) -> Marktlokation | None:
         """
         provide a MaLo-ID, get the matching MaLo in return (or None, if 404)
         """
-        session = await self._get_session()
         request_url = self._config.server_url / "api" / "Marktlokation" / malo_id
-        request_uuid = uuid.uuid4()
-        _logger.debug("[%s] requesting %s", str(request_uuid), request_url)
-        async with session.get(request_url) as response:
+        return await self._get_entity(Marktlokation, request_url, malo_id)
+
+    async def get_marktlokation_raw(self, malo_id: str) -> bytes | None:
+        """
+        like get_marktlokation but returns the undecoded response body without validating it (or None, if 404)
+        """
+        request_url = self._config.server_url / "api" / "Marktlokation" / malo_id
+        return await self._get_entity_raw(request_url, "Marktlokation", malo_id)
+
+    def stream_many(
+        self,
+        getter: Callable[[_EntityId], Coroutine[Any, Any, _DownloadResult | None]],
+        entity_ids: Iterable[_EntityId],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> AsyncGenerator[tuple[_EntityId, _DownloadResult | None], None]:
+        """
+        Calls getter (e.g. client.get_marktlokation) for every distinct entity ID (with bounded concurrency and
+        retries) and yields (ID, entity) pairs in the order in which the requests finish. The entity is None, if it
+        does not exist (404).
+        Errors that are not worth retrying (or that persist after all retries) are raised.
+        """
+
+        async def get_or_none(entity_id: _EntityId) -> _DownloadResult | None:
             try:
-                if response.status == 404:
+                return await getter(entity_id)
+            except ClientResponseError as client_response_error:
+                if client_response_error.status == 404:
                     return None
-                response.raise_for_status()
-            finally:
-                _logger.debug("[%s] response status: %s", str(request_uuid), response.status)
-            response_json = await response.json()
-            result = Marktlokation.model_validate(response_json)
-        return result
+                raise
+
+        async def generator() -> AsyncGenerator[tuple[_EntityId, _DownloadResult | None], None]:
+            async for entity_id, entity in run_with_bounded_concurrency(
+                dict.fromkeys(entity_ids),
+                get_or_none,
+                max_concurrency=max_concurrency,
+                retry_policy=retry_policy or RetryPolicy(),
+            ):
+                yield entity_id, entity
+
+        return generator()
+
+    async def _get_many(
+        self,
+        getter: Callable[[_EntityId], Coroutine[Any, Any, _DownloadResult | None]],
+        entity_ids: Iterable[_EntityId],
+        max_concurrency: int | AdaptiveConcurrencyLimiter,
+        retry_policy: RetryPolicy | None,
+    ) -> dict[_EntityId, _DownloadResult | None]:
+        distinct_ids = list(dict.fromkeys(entity_ids))
+        results = dict([x async for x in self.stream_many(getter, distinct_ids, max_concurrency, retry_policy)])
+        return {entity_id: results[entity_id] for entity_id in distinct_ids}
+
+    async def get_marktlokationen(
+        self,
+        malo_ids: Iterable[str],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, Marktlokation | None]:
+        """
+        provide many MaLo-IDs, get a dict with the matching MaLos in return (the value is None, if 404).
+        Duplicate IDs are only requested once. Use stream_many to process the MaLos as soon as they arrive.
+        """
+        return await self._get_many(self.get_marktlokation, malo_ids, max_concurrency, retry_policy)
+
+    async def get_messlokationen(
+        self,
+        messlokation_ids: Iterable[str],
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[str, Messlokation | None]:
+        """
+        provide many Messlokation-IDs, get a dict with the matching MeLos in return (the value is None, if 404).
+        Duplicate IDs are only requested once. Use stream_many to process the MeLos as soon as they arrive.
+        """
+        return await self._get_many(self.get_messlokation, messlokation_ids, max_concurrency, retry_policy)
+
+    async def get_zaehler_many(
+        self,
+        zaehler_ids: Iterable[uuid.UUID],
+        keydate: AwareDatetime | None = None,
+        max_concurrency: int | AdaptiveConcurrencyLimiter = _DEFAULT_CHUNK_SIZE,
+        retry_policy: RetryPolicy | None = None,
+    ) -> dict[uuid.UUID, Zaehler | None]:
+        """
+        provide many Zaehler-IDs, get a dict with the matching Zaehler in return (the value is None, if 404).
+        Duplicate IDs are only requested once. Use stream_many to process the Zaehler as soon as they arrive.
+        """
+
+        async def get_zaehler_at_keydate(zaehler_id: uuid.UUID) -> Zaehler | None:
+            return await self.get_zaehler(zaehler_id, keydate)
+
+        return await self._get_many(get_zaehler_at_keydate, zaehler_ids, max_concurrency, retry_policy)
 
     async def set_schmutzwasser_relevanz(self, zaehler_id: uuid.UUID, is_waste_water_relevant: bool) -> bool:
         """
@@ -494,49 +1448,49 @@ class TmdsClient(ABC):  # noqa: B024 -- not decorated with @abstractmethod becau
         _logger.info(
             "Changing Schmutzwasserrelevanz of zaehler %s to %s", str(zaehler_id), str(is_waste_water_relevant)
         )
-        session = await self._get_session()
-        async with session.post(url, ssl=True) as response:
+        async with self._request("POST", url, ssl=True) as response:
             response.raise_for_status()
-            updated_zaehler = Zaehler.model_validate_json(await response.json())
-            return updated_zaehler.is_schmutzwasser_relevant == is_waste_water_relevant
+            await self._invalidate_cached_entity("Zaehler", str(zaehler_id))
+            response_json = loads_json(await response.read())
+        if isinstance(response_json, str):
+            # the zaehler might be returned as JSON encoded string
+            updated_zaehler = Zaehler.model_validate_json(response_json)
+        else:
+            updated_zaehler = Zaehler.model_validate(response_json)
+        return updated_zaehler.is_schmutzwasser_relevant == is_waste_water_relevant
 
 
 class BasicAuthTmdsClient(TmdsClient):
     """TMDS client with basic auth"""
 
-    def __init__(self, config: BasicAuthTmdsConfig):
+    def __init__(
+        self,
+        config: BasicAuthTmdsConfig,
+        entity_cache: SqliteEntityCache | None = None,
+        memory_cache: InMemoryEntityCache | None = None,
+    ):
         """instantiate by providing a valid config"""
         if not isinstance(config, BasicAuthTmdsConfig):
             raise ValueError("You must provide a valid config")
-        super().__init__(config)
+        super().__init__(config, entity_cache, memory_cache)
         self._auth = BasicAuth(login=config.usr, password=config.pwd)
 
-    async def _get_session(self) -> ClientSession:
-        """
-        returns a client session (that may be reused or newly created)
-        reusing the same (threadsafe) session will be faster than re-creating a new session for every request.
-        see https://docs.aiohttp.org/en/stable/http_request_lifecycle.html#how-to-use-the-clientsession
-        """
-        async with self._session_lock:
-            if self._session is None or self._session.closed:
-                _logger.info("creating new session")
-                self._session = ClientSession(
-                    auth=self._auth,
-                    timeout=ClientTimeout(60),
-                    raise_for_status=True,
-                )
-            else:
-                _logger.log(5, "reusing aiohttp session")  # log level 5 is half as "loud" logging.DEBUG
-            return self._session
+    def _new_session(self) -> ClientSession:
+        return self._create_session(auth=self._auth)
 
 
 class OAuthTmdsClient(TmdsClient, _OAuthHttpClient):
     """TMDS client with OAuth"""
 
-    def __init__(self, config: OAuthTmdsConfig):
+    def __init__(
+        self,
+        config: OAuthTmdsConfig,
+        entity_cache: SqliteEntityCache | None = None,
+        memory_cache: InMemoryEntityCache | None = None,
+    ):
         if not isinstance(config, OAuthTmdsConfig):
             raise ValueError("You must provide a valid config")
-        super().__init__(config)
+        super().__init__(config, entity_cache, memory_cache)
         _OAuthHttpClient.__init__(
             self,
             base_url=config.server_url,
@@ -546,28 +1500,83 @@ class OAuthTmdsClient(TmdsClient, _OAuthHttpClient):
         )
         self._oauth_config = config
         self._bearer_token: str | None = config.bearer_token if config.bearer_token else None
+        self._bearer_token_deadline: float | None = (
+            get_token_deadline(self._bearer_token) if self._bearer_token is not None else None
+        )
+        """
+        the expiration of the _bearer_token as time.monotonic() value; each token is decoded only once
+        """
+        self._token_refresh_task: asyncio.Task[None] | None = None
 
-    async def _get_session(self) -> ClientSession:
+    def _can_refresh_token(self) -> bool:
+        return bool(self._oauth_config.client_id.strip() and self._oauth_config.client_secret.strip())
+
+    async def _get_bearer_token(self) -> str:
         """
-        returns a client session (that may be reused or newly created)
-        reusing the same (threadsafe) session will be faster than re-creating a new session for every request.
-        see https://docs.aiohttp.org/en/stable/http_request_lifecycle.html#how-to-use-the-clientsession
+        returns a valid bearer token; usually this is the token that has been refreshed in the background already
         """
-        async with self._session_lock:
-            if self._bearer_token is None:
-                self._bearer_token = await self._get_oauth_token()
-            elif not token_is_valid(self._bearer_token):
-                await self.close_session()
-            if self._session is None or self._session.closed:
-                _logger.info("creating new session")
-                self._session = ClientSession(
-                    timeout=ClientTimeout(60),
-                    raise_for_status=True,
-                    headers={"Authorization": f"Bearer {self._bearer_token}"},
+        bearer_token = self._bearer_token
+        if bearer_token is None or not token_deadline_is_valid(self._bearer_token_deadline):
+            # the background refresh did not (yet) happen, e.g. because this is the first request
+            bearer_token = await self._get_oauth_token()
+            self._use_oauth_token(bearer_token)
+        return bearer_token
+
+    def _use_oauth_token(self, token: str) -> None:
+        self._bearer_token = token
+        self._bearer_token_deadline = self._token_deadline
+
+    async def _get_auth_headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {await self._get_bearer_token()}"}
+
+    async def _refresh_token_in_background(self) -> None:
+        """
+        Replaces the bearer token with a new one shortly before it expires, so that no request has to wait for a new
+        token. Because the token is attached to each request (and not to the session), the session and its pooled
+        connections survive the rotation.
+        """
+        while True:
+            try:
+                await self._get_bearer_token()
+                deadline = self._bearer_token_deadline
+                if deadline is None:
+                    # the next request (or the retry below) retrieves a new token
+                    raise ValueError("The token cannot be decoded")
+                if deadline == math.inf:
+                    _logger.info("The token does not expire; stopping the background refresh")
+                    return
+                seconds_until_refresh = max(
+                    deadline - _TOKEN_REFRESH_MARGIN.total_seconds() - time.monotonic(),
+                    _MIN_TOKEN_REFRESH_INTERVAL.total_seconds(),
                 )
-            else:
-                _logger.log(5, "reusing aiohttp session")  # log level 5 is half as "loud" logging.DEBUG
-            return self._session
+                _logger.debug("Refreshing the token in %i seconds", seconds_until_refresh)
+                await asyncio.sleep(seconds_until_refresh)
+                self._use_oauth_token(await self._refresh_oauth_token())
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint:disable=broad-exception-caught
+                # if the refresh keeps on failing, the requests retrieve a token themselves once the token expires
+                _logger.warning("Failed to refresh the token in the background", exc_info=True)
+                await asyncio.sleep(_TOKEN_REFRESH_RETRY_INTERVAL.total_seconds())
+
+    def _new_session(self) -> ClientSession:
+        if self._can_refresh_token() and (self._token_refresh_task is None or self._token_refresh_task.done()):
+            self._token_refresh_task = asyncio.create_task(self._refresh_token_in_background())
+        return self._create_session()
+
+    async def close_session(self) -> None:
+        """
+        closes the client session and stops the background refresh of the token
+        """
+        # the queued updates are sent first; they might create a new session (and start a new background refresh)
+        await super().close_session()
+        if self._token_refresh_task is not None:
+            self._token_refresh_task.cancel()
+            try:
+                await self._token_refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._token_refresh_task = None
 
 
 __all__ = ["BasicAuthTmdsClient", "OAuthTmdsClient", "TmdsClient"]
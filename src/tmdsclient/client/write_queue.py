@@ -0,0 +1,192 @@
+"""
+contains a queue that combines concurrent updates of the same entity into a single update
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable, Coroutine
+from datetime import datetime, timedelta
+from typing import Any, Generic, TypeAlias, TypeVar, cast
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from tmdsclient.models.jsonpatch import JsonPatch
+from tmdsclient.models.patches import changes_are_callables, json_patch_as_change
+
+_logger = logging.getLogger(__name__)
+
+Entity = TypeVar("Entity", bound=BaseModel)
+
+Changes: TypeAlias = list[Callable[[Entity], None]] | JsonPatch
+"""
+either callables that modify the entity or a JSON patch
+"""
+
+_QueueKey: TypeAlias = tuple[str, datetime | None]
+"""
+entity ID and keydate
+"""
+
+
+class WriteCoalescingSettings(BaseModel):
+    """
+    configures how long updates of the same entity are collected before they're sent as one update
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    max_delay: timedelta = timedelta(milliseconds=100)
+    """
+    an update is sent at most this long after the first of its changes has been submitted
+    """
+    max_changes_per_update: int = Field(default=50, ge=1)
+    """
+    as soon as this many changes of the same entity have been submitted, they're sent without further delay
+    """
+    max_pending_updates: int = Field(default=1000, ge=1)
+    """
+    Backpressure: if the changes of this many entities are waiting to be sent (or are being sent), submitting changes
+    for another entity waits until one of these updates has been sent.
+    """
+
+
+def combine_changes(all_changes: list[Changes[Entity]]) -> Changes[Entity]:
+    """
+    Combines the changes of several callers into one. JSON patches are simply concatenated; if there is at least one
+    list of callables, all changes are combined into one list of callables (in the order in which they've been given).
+    """
+    if not any(changes_are_callables(changes) for changes in all_changes):
+        return [operation for changes in all_changes for operation in cast(JsonPatch, changes)]
+    combined: list[Callable[[Entity], None]] = []
+    for changes in all_changes:
+        if changes_are_callables(changes):
+            combined.extend(cast(list[Callable[[Entity], None]], changes))
+        elif changes:
+            combined.append(json_patch_as_change(changes))
+    return combined
+
+
+class _PendingUpdate(Generic[Entity]):  # pylint:disable=too-few-public-methods
+    """
+    the changes of one entity that have not been sent yet
+    """
+
+    def __init__(self, previous: "_PendingUpdate[Entity] | None") -> None:
+        self.changes: list[Changes[Entity]] = []
+        self.futures: list[asyncio.Future[Entity]] = []
+        self.is_full = asyncio.Event()
+        self.is_sent = asyncio.Event()
+        self.previous = previous
+        """
+        the previous update of the same entity; it has to be sent before this one
+        """
+
+
+class CoalescingWriteQueue(Generic[Entity]):
+    """
+    A write-behind queue: Changes of the same entity (and keydate) which are submitted within max_delay are combined
+    and sent as one update (one GET and one PATCH instead of one per caller). Updates of the same entity are sent
+    one after another, never concurrently. Every caller gets the state of the entity after the update that contained
+    its changes (or the error of that update).
+    """
+
+    def __init__(
+        self,
+        update: Callable[[str, Changes[Entity], datetime | None], Coroutine[Any, Any, Entity]],
+        settings: WriteCoalescingSettings | None = None,
+    ):
+        """
+        :param update: sends one update, e.g. client.update_marktlokation
+        """
+        self._update = update
+        self._settings = settings or WriteCoalescingSettings()
+        self._collecting: dict[_QueueKey, _PendingUpdate[Entity]] = {}
+        """
+        the updates which still accept changes
+        """
+        self._latest: dict[_QueueKey, _PendingUpdate[Entity]] = {}
+        """
+        the latest update of each entity which has not been sent yet
+        """
+        self._capacity = asyncio.Semaphore(self._settings.max_pending_updates)
+        self._send_tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def number_of_pending_updates(self) -> int:
+        """
+        the number of updates which have not been sent yet
+        """
+        return len(self._send_tasks)
+
+    async def submit(self, entity_id: str, changes: Changes[Entity], keydate: datetime | None = None) -> Entity:
+        """
+        Queues the changes and returns the state of the entity after they have been sent (together with the changes
+        of other callers).
+        """
+        key: _QueueKey = (entity_id, keydate)
+        pending_update = self._collecting.get(key)
+        if pending_update is None:
+            await self._capacity.acquire()
+            pending_update = self._collecting.get(key)
+            if pending_update is not None:
+                # someone else queued changes for the same entity while we were waiting for capacity
+                self._capacity.release()
+            else:
+                pending_update = _PendingUpdate(previous=self._latest.get(key))
+                self._collecting[key] = pending_update
+                self._latest[key] = pending_update
+                send_task = asyncio.create_task(self._send_later(key, pending_update))
+                self._send_tasks.add(send_task)
+                send_task.add_done_callback(self._send_tasks.discard)
+        future: asyncio.Future[Entity] = asyncio.get_running_loop().create_future()
+        pending_update.changes.append(changes)
+        pending_update.futures.append(future)
+        if len(pending_update.changes) >= self._settings.max_changes_per_update:
+            self._stop_collecting(key, pending_update)
+        # the shield prevents that a cancelled caller also cancels the update for all the other callers
+        return await asyncio.shield(future)
+
+    def _stop_collecting(self, key: _QueueKey, pending_update: _PendingUpdate[Entity]) -> None:
+        pending_update.is_full.set()
+        if self._collecting.get(key) is pending_update:
+            del self._collecting[key]
+
+    async def _send_later(self, key: _QueueKey, pending_update: _PendingUpdate[Entity]) -> None:
+        try:
+            await asyncio.wait_for(pending_update.is_full.wait(), timeout=self._settings.max_delay.total_seconds())
+        except TimeoutError:
+            pass
+        if pending_update.previous is not None:
+            # the changes keep being collected until the previous update of the same entity has been sent
+            await pending_update.previous.is_sent.wait()
+            pending_update.previous = None
+        self._stop_collecting(key, pending_update)
+        try:
+            _logger.debug("Sending %i combined changes of %s", len(pending_update.changes), key)
+            entity = await self._update(key[0], combine_changes(pending_update.changes), key[1])
+        except Exception as error:  # pylint:disable=broad-exception-caught
+            for future in pending_update.futures:
+                if not future.done():
+                    future.set_exception(error)
+                    future.exception()  # marks the exception as retrieved, in case the caller has been cancelled
+        else:
+            for future in pending_update.futures:
+                if not future.done():
+                    future.set_result(entity)
+        finally:
+            self._capacity.release()
+            pending_update.is_sent.set()
+            if self._latest.get(key) is pending_update:
+                del self._latest[key]
+
+    async def flush(self) -> None:
+        """
+        sends all pending updates without further delay and waits until they have been sent
+        """
+        for key, pending_update in list(self._collecting.items()):
+            self._stop_collecting(key, pending_update)
+        while self._send_tasks:
+            await asyncio.gather(*self._send_tasks)
+
+
+__all__ = ["Changes", "CoalescingWriteQueue", "WriteCoalescingSettings", "combine_changes"]
@@ -0,0 +1,118 @@
+"""
+Contains a JSON diff that creates RFC6902 JSON patches. Other than jsonpatch.make_patch, it matches the elements of
+lists by their identity (e.g. their guid) instead of by their position. Inserting an element at the front of a list
+results in a single 'add' operation (instead of a replace operation for every element that has been shifted).
+The result is deterministic: the same input always results in the same operations in the same order.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+DEFAULT_IDENTITY_FIELDS: tuple[str, ...] = ("guid", "zaehlwerkId", "obisKennzahl")
+"""
+the fields which identify the elements of lists in TMDS entities; the first one that all elements have is used
+"""
+
+
+def _escape(token: str | int) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _are_equal(old: Any, new: Any) -> bool:
+    # True == 1 in python, but not in JSON
+    return type(old) is type(new) and old == new
+
+
+def _find_identity_field(old: list[Any], new: list[Any], identity_fields: Sequence[str]) -> str | None:
+    """
+    returns the first of the identity_fields that all elements of both lists have (with unique values per list)
+    """
+    if not old or not new:
+        return None
+    for identity_field in identity_fields:
+        is_suitable = True
+        for elements in (old, new):
+            identities = [x.get(identity_field) if isinstance(x, dict) else None for x in elements]
+            if any(identity is None or isinstance(identity, dict | list) for identity in identities):
+                is_suitable = False
+                break
+            if len(set(identities)) != len(identities):
+                is_suitable = False
+                break
+        if is_suitable:
+            return identity_field
+    return None
+
+
+class _Differ:
+    def __init__(self, identity_fields: Sequence[str]):
+        self._identity_fields = identity_fields
+        self.operations: list[dict[str, Any]] = []
+
+    def diff(self, old: Any, new: Any, path: str) -> None:
+        if isinstance(old, dict) and isinstance(new, dict):
+            self._diff_dicts(old, new, path)
+        elif isinstance(old, list) and isinstance(new, list):
+            identity_field = _find_identity_field(old, new, self._identity_fields)
+            if identity_field is None:
+                self._diff_lists_by_position(old, new, path)
+            else:
+                self._diff_lists_by_identity(old, new, path, identity_field)
+        elif not _are_equal(old, new):
+            self.operations.append({"op": "replace", "path": path, "value": new})
+
+    def _diff_dicts(self, old: dict[str, Any], new: dict[str, Any], path: str) -> None:
+        for key, old_value in old.items():
+            if key not in new:
+                self.operations.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+            else:
+                self.diff(old_value, new[key], f"{path}/{_escape(key)}")
+        for key, new_value in new.items():
+            if key not in old:
+                self.operations.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": new_value})
+
+    def _diff_lists_by_position(self, old: list[Any], new: list[Any], path: str) -> None:
+        common_length = min(len(old), len(new))
+        for index in range(common_length):
+            self.diff(old[index], new[index], f"{path}/{index}")
+        for index in range(len(old) - 1, common_length - 1, -1):
+            self.operations.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(common_length, len(new)):
+            self.operations.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+
+    def _diff_lists_by_identity(self, old: list[Any], new: list[Any], path: str, identity_field: str) -> None:
+        new_identities = {element[identity_field] for element in new}
+        old_elements = {element[identity_field]: element for element in old}
+        # first the elements that have been removed (from back to front, so that the indexes stay valid) ...
+        for index in range(len(old) - 1, -1, -1):
+            if old[index][identity_field] not in new_identities:
+                self.operations.append({"op": "remove", "path": f"{path}/{index}"})
+        # ... then each position of the new list is filled: by moving an existing element there or adding a new one.
+        # The positions in front of the current one are final, so later operations don't change their paths.
+        current_identities = [element[identity_field] for element in old if element[identity_field] in new_identities]
+        for index, new_element in enumerate(new):
+            identity = new_element[identity_field]
+            if identity not in old_elements:
+                self.operations.append({"op": "add", "path": f"{path}/{index}", "value": new_element})
+                current_identities.insert(index, identity)
+                continue
+            current_index = current_identities.index(identity, index)
+            if current_index != index:
+                self.operations.append({"op": "move", "from": f"{path}/{current_index}", "path": f"{path}/{index}"})
+                current_identities.insert(index, current_identities.pop(current_index))
+            self.diff(old_elements[identity], new_element, f"{path}/{index}")
+
+
+def make_json_patch(
+    old: Any, new: Any, identity_fields: Sequence[str] = DEFAULT_IDENTITY_FIELDS
+) -> list[dict[str, Any]]:
+    """
+    returns the RFC6902 operations which turn old into new; list elements are matched by the first of the
+    identity_fields that all of them have (lists of other elements are compared by position)
+    """
+    differ = _Differ(identity_fields)
+    differ.diff(old, new, "")
+    return differ.operations
+
+
+__all__ = ["DEFAULT_IDENTITY_FIELDS", "make_json_patch"]
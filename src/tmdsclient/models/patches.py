@@ -2,22 +2,175 @@
 TMDS in v2 supports RFC6902 JSON Patch. This module contains the patching logic.
 """
 
+import copy
 import json
 from collections.abc import Callable
-from typing import TypeVar
+from typing import Any, TypeVar, cast
 
 import jsonpatch  # type: ignore[import-untyped]# https://github.com/stefankoegl/python-json-patch/issues/158
 from pydantic import BaseModel
 
+from tmdsclient.models.json_diff import make_json_patch
+
 Entity = TypeVar("Entity", bound=BaseModel)
 
 
-def build_json_patch_document(current_state: Entity, changes: list[Callable[[Entity], None]]) -> jsonpatch.JsonPatch:
+def changes_are_callables(changes: list[Callable[[Entity], None]] | list[Any]) -> bool:
+    """
+    returns true if the changes are callables that modify an entity (and false if they're a JSON patch)
+    """
+    # we assume that "not isinstance(changes[0], dict)" == isinstance(changes[0], Callable)
+    return isinstance(changes, list) and len(changes) > 0 and not isinstance(changes[0], dict)
+
+
+def json_patch_as_change(patch: list[Any]) -> Callable[[BaseModel], None]:
+    """
+    returns a change (callable) that applies the JSON patch to an entity; this allows to combine JSON patches with
+    other changes
+    """
+
+    def apply_patch(entity: BaseModel) -> None:
+        model_class = entity.__class__  # not type(entity) which might be a proxy
+        patched_dict = jsonpatch.apply_patch(entity.model_dump(mode="json", by_alias=True), patch)
+        patched = model_class.model_validate(patched_dict)
+        for name in model_class.model_fields:
+            setattr(entity, name, getattr(patched, name))
+        patched_extra = patched.__pydantic_extra__ or {}
+        for name in list(entity.__pydantic_extra__ or {}):
+            if name not in patched_extra:
+                delattr(entity, name)
+        for name, value in patched_extra.items():
+            setattr(entity, name, value)
+
+    return apply_patch
+
+
+def _escape_json_pointer_token(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+class _ChangeTrackingProxy:
+    """
+    Stands in for a model while the changes are applied. Every field that is accessed is copied (copy on access) before
+    it's handed out, so the original model is never modified and only the accessed parts of the tree are copied:
+    Nested models are copied shallowly and wrapped in another proxy, lists and dicts are copied deeply (because their
+    modifications can't be intercepted). Fields that are assigned or whose lists/dicts are handed out are 'touched';
+    only those are compared afterward.
+    """
+
+    __slots__ = ("_child_proxies", "_copy", "_json_pointer", "_original", "_touched_field_names")
+
+    def __init__(self, original: BaseModel, json_pointer: str):
+        object.__setattr__(self, "_original", original)
+        object.__setattr__(self, "_copy", original.model_copy())
+        object.__setattr__(self, "_json_pointer", json_pointer)
+        object.__setattr__(self, "_child_proxies", {})
+        object.__setattr__(self, "_touched_field_names", set())
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> type:  # makes isinstance checks in the changes work as if the proxy was the model itself
+        return type(self._copy)
+
+    def _is_field(self, name: str) -> bool:
+        return name in type(self._copy).model_fields or name in (self._copy.__pydantic_extra__ or {})
+
+    def _get_serialized_key(self, name: str) -> str:
+        field_info = type(self._copy).model_fields.get(name)
+        if field_info is None:
+            return name
+        return field_info.serialization_alias or field_info.alias or name
+
+    def _touch_all_fields(self) -> None:
+        """
+        called if the changes use something else than the fields (e.g. a method) which might modify the model in
+        ways that cannot be tracked; the whole model is copied and compared then
+        """
+        for name in [*type(self._copy).model_fields, *(self._copy.__pydantic_extra__ or {})]:
+            if name in self._touched_field_names:
+                continue
+            child_proxy = self._child_proxies.pop(name, None)
+            value = child_proxy._copy if child_proxy is not None else getattr(self._copy, name)
+            self._copy.__dict__[name] = copy.deepcopy(value)
+            self._touched_field_names.add(name)
+
+    def __getattr__(self, name: str) -> Any:
+        if not self._is_field(name):
+            self._touch_all_fields()
+            return getattr(self._copy, name)
+        if name in self._touched_field_names:
+            return getattr(self._copy, name)
+        if name in self._child_proxies:
+            return self._child_proxies[name]
+        value = getattr(self._copy, name)
+        if isinstance(value, BaseModel):
+            child_proxy = _ChangeTrackingProxy(
+                value, f"{self._json_pointer}/{_escape_json_pointer_token(self._get_serialized_key(name))}"
+            )
+            self._child_proxies[name] = child_proxy
+            self._set_on_copy(name, child_proxy._copy)
+            return child_proxy
+        if isinstance(value, list | dict):
+            value = copy.deepcopy(value)
+            self._set_on_copy(name, value)
+            self._touched_field_names.add(name)
+        return value
+
+    def _set_on_copy(self, name: str, value: Any) -> None:
+        if name in type(self._copy).model_fields:
+            self._copy.__dict__[name] = value
+        else:
+            self._copy.__pydantic_extra__[name] = value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if isinstance(value, _ChangeTrackingProxy):
+            value = value._copy
+        setattr(self._copy, name, value)
+        self._child_proxies.pop(name, None)
+        self._touched_field_names.add(name)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._copy, name)
+        self._child_proxies.pop(name, None)
+        self._touched_field_names.add(name)
+
+    def get_patch_operations(self) -> list[dict[str, Any]]:
+        """
+        returns the operations which turn the original into the modified model (including those of the child proxies)
+        """
+        operations: list[dict[str, Any]] = []
+        if self._touched_field_names:
+            include = set(self._touched_field_names)
+            old_fields = self._original.model_dump(mode="json", by_alias=True, include=include)
+            new_fields = self._copy.model_dump(mode="json", by_alias=True, include=include)
+            for operation in make_json_patch(old_fields, new_fields):
+                operation["path"] = self._json_pointer + operation["path"]
+                if "from" in operation:
+                    operation["from"] = self._json_pointer + operation["from"]
+                operations.append(operation)
+        for child_proxy in self._child_proxies.values():
+            operations.extend(child_proxy.get_patch_operations())
+        return operations
+
+
+def build_json_patch_document(
+    current_state: Entity, changes: list[Callable[[Entity], None]], track_changes: bool = False
+) -> jsonpatch.JsonPatch:
     """
     creates a json patch (RFC6902) that contains all the changes applied to current_state.
-    Note that the result is not stable, i.e. the order of operations in the patch may vary.
-    See https://github.com/stefankoegl/python-json-patch/issues/151
+    Elements of lists are matched by their identity (guid, zaehlwerkId or obisKennzahl, see json_diff), so that
+    inserting or removing a list element results in a single operation. The result is stable, i.e. the same changes
+    always result in the same operations in the same order.
+    By default, the whole model is copied and both the old and the new state are serialized and compared.
+    With track_changes=True, the changes are applied to a proxy which records the fields they access; only those
+    parts of the model are copied, serialized and compared. This is much cheaper for large models of which the
+    changes touch only a few fields. The resulting patch contains the same operations, but possibly in a different
+    order.
     """
+    if track_changes:
+        proxy = _ChangeTrackingProxy(current_state, json_pointer="")
+        for change in changes:
+            change(cast(Entity, proxy))
+        return jsonpatch.JsonPatch(proxy.get_patch_operations())
     current_state_dict = json.loads(current_state.model_dump_json(by_alias=True))
     # we create a deep copy of the original object
     # using construct rather than model_validate to bypass validation
@@ -25,5 +178,102 @@ def build_json_patch_document(current_state: Entity, changes: list[Callable[[Ent
     for change in changes:
         change(new_state)
     new_state_dict = json.loads(new_state.model_dump_json(by_alias=True))
-    patch = jsonpatch.make_patch(current_state_dict, new_state_dict)
-    return patch
+    return jsonpatch.JsonPatch(make_json_patch(current_state_dict, new_state_dict))
+
+
+_NOT_FOUND = object()
+
+
+def _resolve_existing_value(document: Any, path: str) -> Any:
+    """
+    returns the value at path or _NOT_FOUND if there is none; other than JsonPointer.resolve this does not return
+    a marker for the end of a list ('-', used to append to a list)
+    """
+    parts = jsonpatch.JsonPointer(path).parts
+    if not parts:
+        return document
+    parent = jsonpatch.JsonPointer.from_parts(parts[:-1]).resolve(document, _NOT_FOUND)
+    last_part = parts[-1]
+    if isinstance(parent, dict):
+        return parent.get(last_part, _NOT_FOUND)
+    if isinstance(parent, list) and last_part.isdigit() and (last_part == "0" or not last_part.startswith("0")):
+        index = int(last_part)
+        return parent[index] if index < len(parent) else _NOT_FOUND
+    return _NOT_FOUND
+
+
+def _is_list_position(document: Any, path: str) -> bool:
+    """
+    returns true if path points into a list of the document (to an element or to the end of the list)
+    """
+    parts = jsonpatch.JsonPointer(path).parts
+    if not parts:
+        return False
+    parent = jsonpatch.JsonPointer.from_parts(parts[:-1]).resolve(document, _NOT_FOUND)
+    return isinstance(parent, list)
+
+
+def _get_parent_path(path: str) -> str:
+    return path.rsplit("/", 1)[0]
+
+
+def add_test_operations(current_state: BaseModel, patch_document: jsonpatch.JsonPatch) -> jsonpatch.JsonPatch:
+    """
+    Returns a patch that starts with a 'test' operation for each (existing) value which the patch_document overwrites,
+    removes or moves, followed by the operations of the patch_document. The test operations contain the values of
+    current_state. If the entity has been modified on server side in the meantime, the tests fail and the server
+    rejects the whole patch (instead of overwriting the concurrent modification).
+    Operations that insert into a list (add, move or copy to a list position, including '-' for the end of the list)
+    don't overwrite a value; for those the whole list is tested. This way, the patch cannot be applied twice either.
+    """
+    current_state_dict = current_state.model_dump(mode="json", by_alias=True)
+    tested_paths: list[str] = []
+    test_operations: list[dict[str, Any]] = []
+    for operation in patch_document.patch:
+        if operation["op"] == "test":
+            continue
+        paths = [operation["path"], operation.get("from")]
+        if operation["op"] in ("add", "move", "copy") and _is_list_position(current_state_dict, operation["path"]):
+            paths[0] = _get_parent_path(operation["path"])
+        for path in paths:
+            if path is None or any(path == x or path.startswith(x + "/") for x in tested_paths):
+                continue
+            old_value = _resolve_existing_value(current_state_dict, path)
+            if old_value is _NOT_FOUND:
+                continue
+            tested_paths.append(path)
+            test_operations.append({"op": "test", "path": path, "value": old_value})
+    return jsonpatch.JsonPatch(test_operations + list(patch_document.patch))
+
+
+def _might_be_list_position(path: str) -> bool:
+    last_part = jsonpatch.JsonPointer(path).parts[-1:]
+    return bool(last_part) and (last_part[0] == "-" or last_part[0].isdigit())
+
+
+def can_be_sent_twice(operations: list[dict[str, Any]]) -> bool:
+    """
+    Returns true if applying the patch operations a second time (e.g. on a retry after an error, although the patch
+    has been applied already) cannot change the entity again: Every operation is either idempotent ('replace', 'add'
+    or 'copy' to a key of an object, 'remove' or 'move' of a key, which fails the second time) or its target is
+    covered by a 'test' operation (which fails once the patch has been applied).
+    Without the current state, all paths that end with '-' or a number are considered to point into a list.
+    """
+    tested_paths = [operation["path"] for operation in operations if operation["op"] == "test"]
+
+    def is_tested(path: str) -> bool:
+        return any(path == x or path.startswith(x + "/") for x in tested_paths)
+
+    for operation in operations:
+        op = operation["op"]
+        path = operation["path"]
+        if op in ("test", "replace") or is_tested(_get_parent_path(path)):
+            continue
+        if op in ("add", "copy") and not _might_be_list_position(path):
+            continue
+        if op == "remove" and (not _might_be_list_position(path) or is_tested(path)):
+            continue
+        if op == "move" and not _might_be_list_position(path) and not _might_be_list_position(operation["from"]):
+            continue
+        return False
+    return True
@@ -3,6 +3,8 @@ from datetime import UTC, datetime
 
 from aioresponses import aioresponses
 
+from tmdsclient.client.bulk import PlattformfaehigkeitChange
+
 
 class TestTmdsAnschlussobjekt:
     async def test_anschlussobjekt_set_plattform(self, tmds_client_with_default_auth):
@@ -22,3 +24,25 @@ class TestTmdsAnschlussobjekt:
                 external_ao_id, is_plattformfaehig=True, change_date=datetime(2000, 1, 1, tzinfo=UTC)
             )
         assert actual is True
+
+    async def test_set_plattformfaehigkeit_many(self, tmds_client_with_default_auth):
+        client, tmds_settings = tmds_client_with_default_auth
+        changes = [
+            PlattformfaehigkeitChange(external_ao_id=ao_id, change_date=datetime(2000, 1, 1, tzinfo=UTC))
+            for ao_id in ["1", "2", "3"]
+        ]
+        event_id = uuid.uuid4()
+        query = "plattformfaehig=true&aenderungsdatum=2000-01-01T00%253A00%253A00%252B00%253A00"
+        with aioresponses() as mocked_tmds:
+            ao_url = f"{tmds_settings.server_url}api/Anschlussobjekt"
+            mocked_tmds.post(f"{ao_url}/1/setPlattform?{query}", status=200, headers={"x-event-id": str(event_id)})
+            mocked_tmds.post(f"{ao_url}/2/setPlattform?{query}", status=200)
+            mocked_tmds.post(f"{ao_url}/3/setPlattform?{query}", status=500)
+            has_been_handled_url = f"{tmds_settings.server_url}api/Event/hasBeenHandled/{event_id}"
+            mocked_tmds.get(has_been_handled_url, status=200, payload="true")
+            actual = await client.set_plattformfaehigkeit_many(changes)
+        assert [outcome.success for outcome in actual.outcomes] == [True, True, False]
+        assert [outcome.event_id for outcome in actual.outcomes] == [event_id, None, None]
+        assert actual.outcomes[2].error is not None
+        assert actual.summary.number_of_items == 3
+        assert actual.summary.number_of_failures == 1
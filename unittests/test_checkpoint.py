@@ -0,0 +1,27 @@
+import uuid
+from pathlib import Path
+
+from tmdsclient.client.checkpoint import DownloadCheckpoint
+
+
+def test_checkpoint_round_trip(tmp_path: Path):
+    checkpoint_path = tmp_path / "checkpoint.txt"
+    ids = [uuid.uuid4() for _ in range(3)]
+    with DownloadCheckpoint(checkpoint_path) as checkpoint:
+        assert checkpoint.load() == set()
+        for entity_id in ids:
+            checkpoint.mark_as_completed(entity_id)
+    with DownloadCheckpoint(checkpoint_path) as checkpoint:
+        assert checkpoint.load() == set(ids)
+
+
+def test_incomplete_last_line_is_ignored_and_terminated(tmp_path: Path):
+    checkpoint_path = tmp_path / "checkpoint.txt"
+    complete_id = uuid.uuid4()
+    checkpoint_path.write_text(f"{complete_id}\n{str(uuid.uuid4())[:10]}", encoding="utf-8")
+    new_id = uuid.uuid4()
+    with DownloadCheckpoint(checkpoint_path, fsync=True) as checkpoint:
+        assert checkpoint.load() == {complete_id}
+        checkpoint.mark_as_completed(new_id)
+    with DownloadCheckpoint(checkpoint_path) as checkpoint:
+        assert checkpoint.load() == {complete_id, new_id}
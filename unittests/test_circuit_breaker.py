@@ -0,0 +1,61 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from aiohttp import ClientResponseError
+from aioresponses import aioresponses
+from yarl import URL
+
+from tmdsclient.client.circuit_breaker import CircuitBreakerSettings, CircuitOpenError, CircuitState
+from tmdsclient.client.config import BasicAuthTmdsConfig
+from tmdsclient.client.tmdsclient import BasicAuthTmdsClient
+
+
+async def test_circuit_opens_after_failures_and_closes_after_successful_trial():
+    tmds_config = BasicAuthTmdsConfig(
+        server_url=URL("https://tmds.inv/"),
+        usr="my-usr",
+        pwd="my-pwd",
+        circuit_breaker=CircuitBreakerSettings(failure_threshold=2, open_duration=timedelta(milliseconds=50)),
+    )
+    client = BasicAuthTmdsClient(tmds_config)
+    circuit_breaker = client.circuit_breaker
+    assert circuit_breaker is not None
+    malo_url = "https://tmds.inv/api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, status=502)
+        mocked_tmds.get(malo_url, status=503)
+        for _ in range(2):
+            with pytest.raises(ClientResponseError):
+                await client.get_marktlokation_raw("12345678913")
+        assert circuit_breaker.state == CircuitState.OPEN
+        # fails fast without sending a request (there is no mocked response left)
+        with pytest.raises(CircuitOpenError):
+            await client.get_marktlokation_raw("12345678913")
+        await asyncio.sleep(circuit_breaker.retry_after.total_seconds())
+        assert circuit_breaker.state == CircuitState.HALF_OPEN
+        mocked_tmds.get(malo_url, status=404)
+        assert await client.get_marktlokation_raw("12345678913") is None
+    assert circuit_breaker.state == CircuitState.CLOSED
+    await client.close_session()
+
+
+async def test_failed_trial_request_opens_the_circuit_again():
+    tmds_config = BasicAuthTmdsConfig(
+        server_url=URL("https://tmds.inv/"),
+        usr="my-usr",
+        pwd="my-pwd",
+        circuit_breaker=CircuitBreakerSettings(failure_threshold=1, open_duration=timedelta(milliseconds=20)),
+    )
+    client = BasicAuthTmdsClient(tmds_config)
+    malo_url = "https://tmds.inv/api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, exception=TimeoutError(), repeat=True)
+        with pytest.raises(TimeoutError):
+            await client.get_marktlokation_raw("12345678913")
+        await asyncio.sleep(0.03)
+        with pytest.raises(TimeoutError):
+            await client.get_marktlokation_raw("12345678913")
+        assert client.circuit_breaker is not None
+        assert client.circuit_breaker.state == CircuitState.OPEN
+    await client.close_session()
@@ -0,0 +1,200 @@
+"""
+tests the bounded concurrency helper and the retries (no requests)
+"""
+
+import asyncio
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from aiohttp import ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from tmdsclient.client.concurrency import AdaptiveConcurrencyLimiter, run_with_bounded_concurrency
+from tmdsclient.client.retry import RetryPolicy
+
+
+async def _sleep_and_return(delay_and_value: tuple[float, int]) -> int:
+    delay, value = delay_and_value
+    await asyncio.sleep(delay)
+    return value
+
+
+async def test_slow_item_does_not_block_the_other_slots():
+    items = [(0.2, 0)] + [(0.01, i) for i in range(1, 10)]
+    actual = [result async for _, result in run_with_bounded_concurrency(items, _sleep_and_return, max_concurrency=2)]
+    assert sorted(actual) == list(range(10))
+    assert actual[-1] == 0, "all the fast items should have been processed while the slow one was still in flight"
+
+
+async def test_ordered_output():
+    items = [(0.05, 0), (0.01, 1), (0.03, 2), (0.0, 3)]
+    actual = [
+        result
+        async for _, result in run_with_bounded_concurrency(items, _sleep_and_return, max_concurrency=3, ordered=True)
+    ]
+    assert actual == [0, 1, 2, 3]
+
+
+async def test_max_concurrency_is_never_exceeded():
+    currently_running = 0
+    max_running = 0
+
+    async def worker(item: int) -> int:
+        nonlocal currently_running, max_running
+        currently_running += 1
+        max_running = max(max_running, currently_running)
+        await asyncio.sleep(0.001 * (item % 3))
+        currently_running -= 1
+        return item
+
+    actual = [result async for _, result in run_with_bounded_concurrency(range(50), worker, max_concurrency=7)]
+    assert sorted(actual) == list(range(50))
+    assert max_running == 7
+
+
+async def test_exceptions_are_raised_or_returned():
+    async def worker(item: int) -> int:
+        if item == 3:
+            raise ValueError("3 is bad")
+        return item
+
+    with pytest.raises(ValueError):
+        _ = [x async for x in run_with_bounded_concurrency(range(5), worker, max_concurrency=2)]
+    actual = dict([x async for x in run_with_bounded_concurrency(range(5), worker, 2, return_exceptions=True)])
+    assert isinstance(actual[3], ValueError)
+    assert all(actual[i] == i for i in (0, 1, 2, 4))
+
+
+def _http_error(status: int) -> ClientResponseError:
+    url = URL("https://tmds.inv/api/foo")
+    request_info = RequestInfo(url=url, method="GET", headers=CIMultiDictProxy(CIMultiDict()), real_url=url)
+    return ClientResponseError(request_info=request_info, history=(), status=status)
+
+
+def test_limiter_increases_additively_while_healthy():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=6)
+    for _ in range(4):
+        limiter.record_success(latency=0.1)
+    assert limiter.limit == 5
+    for _ in range(5 + 6 + 100):
+        limiter.record_success(latency=0.1)
+    assert limiter.limit == 6, "must not exceed max_limit"
+    assert [c.new_limit for c in limiter.limit_changes] == [5, 6]
+    assert all(c.reason == "healthy" for c in limiter.limit_changes)
+
+
+def test_limiter_does_not_increase_on_slow_responses():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, latency_threshold=timedelta(seconds=1))
+    for _ in range(10):
+        limiter.record_success(latency=1.5)
+    assert limiter.limit == 2
+
+
+def test_limiter_decreases_multiplicatively_once_per_overload():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=40, decrease_factor=0.5)
+    limiter.record_error(_http_error(502))
+    assert limiter.limit == 20
+    for _ in range(20):
+        # errors of the requests which were in flight at the time of the first error
+        limiter.record_error(TimeoutError())
+    assert limiter.limit == 20
+    limiter.record_error(TimeoutError())
+    assert limiter.limit == 10
+    assert [c.reason for c in limiter.limit_changes] == ["HTTP 502", "timeout"]
+
+
+def test_limiter_ignores_client_errors():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+    limiter.record_error(_http_error(404))
+    limiter.record_error(ValueError("not an overload"))
+    assert limiter.limit == 10
+    assert not any(limiter.limit_changes)
+
+
+async def test_bounded_concurrency_follows_adaptive_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, decrease_factor=0.5)
+
+    async def worker(item: int) -> int:
+        await asyncio.sleep(0)
+        if item == 0:
+            raise _http_error(500)
+        return item
+
+    actual = dict([x async for x in run_with_bounded_concurrency(range(20), worker, limiter, return_exceptions=True)])
+    assert len(actual) == 20
+    assert limiter.limit_changes[0].new_limit == 4
+
+
+_no_backoff = RetryPolicy(initial_backoff=timedelta(0), jitter=False)
+
+
+async def test_only_failed_items_are_retried():
+    calls: Counter[int] = Counter()
+
+    async def worker(item: int) -> int:
+        calls[item] += 1
+        if item % 5 == 0 and calls[item] < 3:
+            raise _http_error(502)
+        return item
+
+    actual = dict([x async for x in run_with_bounded_concurrency(range(20), worker, 4, retry_policy=_no_backoff)])
+    assert actual == {i: i for i in range(20)}
+    assert all(calls[i] == (3 if i % 5 == 0 else 1) for i in range(20))
+
+
+async def test_items_are_given_up_after_max_attempts():
+    calls: Counter[int] = Counter()
+
+    async def worker(item: int) -> int:
+        calls[item] += 1
+        if item == 1:
+            raise TimeoutError()
+        return item
+
+    retry_policy = RetryPolicy(max_attempts=3, initial_backoff=timedelta(0))
+    actual = dict(
+        [
+            x
+            async for x in run_with_bounded_concurrency(
+                range(3), worker, 2, return_exceptions=True, retry_policy=retry_policy
+            )
+        ]
+    )
+    assert isinstance(actual[1], TimeoutError)
+    assert calls == {0: 1, 1: 3, 2: 1}
+
+
+async def test_errors_that_are_not_retry_worthy_are_not_retried():
+    calls: Counter[int] = Counter()
+
+    async def worker(item: int) -> int:
+        calls[item] += 1
+        raise _http_error(404)
+
+    with pytest.raises(ClientResponseError):
+        _ = [x async for x in run_with_bounded_concurrency(range(1), worker, 2, retry_policy=_no_backoff)]
+    assert calls[0] == 1
+
+
+async def test_retry_budget_limits_the_total_number_of_retries():
+    calls: Counter[int] = Counter()
+
+    async def worker(item: int) -> int:
+        calls[item] += 1
+        raise _http_error(500)
+
+    retry_policy = RetryPolicy(initial_backoff=timedelta(0), retry_budget_ratio=0.1, min_retries=2)
+    actual = [
+        x async for x in run_with_bounded_concurrency(range(50), worker, 10, True, True, retry_policy=retry_policy)
+    ]
+    assert len(actual) == 50
+    assert sum(calls.values()) == 50 + 5
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    retry_policy = RetryPolicy(initial_backoff=timedelta(seconds=1), max_backoff=timedelta(seconds=5))
+    for retry_number, expected_upper_bound in [(1, 1), (2, 2), (3, 4), (4, 5), (10, 5)]:
+        backoff = retry_policy.get_backoff(retry_number).total_seconds()
+        assert expected_upper_bound / 2 <= backoff <= expected_upper_bound
@@ -0,0 +1,81 @@
+import json
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from aioresponses import CallbackResult, aioresponses
+from yarl import URL
+
+from tmdsclient.client.config import BasicAuthTmdsConfig
+from tmdsclient.client.entity_cache import SqliteEntityCache
+from tmdsclient.client.tmdsclient import BasicAuthTmdsClient
+
+_tmds_config = BasicAuthTmdsConfig(server_url=URL("https://tmds.inv/"), usr="my-usr", pwd="my-pwd")
+_netzvertrag_json = json.loads(
+    (Path(__file__).parent / "example_data" / "single_netzvertrag.json").read_text(encoding="utf-8")
+)
+_netzvertrag_id = uuid.UUID(_netzvertrag_json["id"])
+_netzvertrag_url = f"https://tmds.inv/api/Netzvertrag/{_netzvertrag_id}"
+
+
+def test_cache_survives_a_restart(tmp_path: Path):
+    cache_path = tmp_path / "cache.sqlite"
+    with SqliteEntityCache(cache_path) as entity_cache:
+        entity_cache.put("Zaehler", "123", "2024-01-01T00:00:00+00:00", b"{}", etag='"abc"')
+        entity_cache.put("Zaehler", "123", "", b"[]")
+    with SqliteEntityCache(cache_path) as entity_cache:
+        cached_entity = entity_cache.get("Zaehler", "123", "2024-01-01T00:00:00+00:00")
+        assert cached_entity is not None
+        assert cached_entity.body == b"{}"
+        assert cached_entity.get_conditional_headers() == {"If-None-Match": '"abc"'}
+        assert not entity_cache.is_fresh(cached_entity)  # must be revalidated because there is an ETag
+        entity_cache.invalidate("Zaehler", "123")
+        assert entity_cache.get("Zaehler", "123", "2024-01-01T00:00:00+00:00") is None
+        assert entity_cache.get("Zaehler", "123") is None
+
+
+def test_oldest_entities_are_evicted_if_the_cache_is_full(tmp_path: Path):
+    with SqliteEntityCache(tmp_path / "cache.sqlite", max_entries=3) as entity_cache:
+        for zaehler_id in ["1", "2", "3"]:
+            entity_cache.put("Zaehler", zaehler_id, "", b"{}")
+        entity_cache.put("Zaehler", "1", "", b"[]")  # replacing an entity does not evict anything
+        assert entity_cache.get("Zaehler", "2") is not None
+        entity_cache.put("Zaehler", "4", "", b"{}")
+        assert entity_cache.get("Zaehler", "2") is None
+        assert all(entity_cache.get("Zaehler", zaehler_id) is not None for zaehler_id in ["1", "3", "4"])
+    with SqliteEntityCache(tmp_path / "cache.sqlite", max_entries=1) as entity_cache:
+        entity_cache.put("Zaehler", "5", "", b"{}")
+        assert [entity_cache.get("Zaehler", zaehler_id) is not None for zaehler_id in "1345"] == [False] * 3 + [True]
+
+
+async def test_cached_entity_is_revalidated_with_etag(tmp_path: Path):
+    request_headers: list[dict[str, str]] = []
+
+    def respond_not_modified(url, **kwargs):  # pylint:disable=unused-argument
+        request_headers.append(kwargs["headers"])
+        return CallbackResult(status=304)
+
+    with SqliteEntityCache(tmp_path / "cache.sqlite") as entity_cache:
+        client = BasicAuthTmdsClient(_tmds_config, entity_cache=entity_cache)
+        with aioresponses() as mocked_tmds:
+            mocked_tmds.get(_netzvertrag_url, payload=_netzvertrag_json, headers={"ETag": '"v1"'})
+            mocked_tmds.get(_netzvertrag_url, callback=respond_not_modified)
+            first_netzvertrag = await client.get_netzvertrag_by_id(_netzvertrag_id)
+            second_netzvertrag = await client.get_netzvertrag_by_id(_netzvertrag_id)
+        await client.close_session()
+
+    assert request_headers == [{"If-None-Match": '"v1"'}]
+    assert second_netzvertrag == first_netzvertrag
+
+
+async def test_cached_entity_without_validators_is_fresh_for_ttl(tmp_path: Path):
+    with SqliteEntityCache(tmp_path / "cache.sqlite", ttl=timedelta(hours=1)) as entity_cache:
+        client = BasicAuthTmdsClient(_tmds_config, entity_cache=entity_cache)
+        with aioresponses() as mocked_tmds:
+            # mocked only once: the second call must not hit the server
+            mocked_tmds.get(_netzvertrag_url, payload=_netzvertrag_json)
+            first_netzvertrag = await client.get_netzvertrag_by_id(_netzvertrag_id)
+            second_netzvertrag = await client.get_netzvertrag_by_id(_netzvertrag_id)
+        await client.close_session()
+
+    assert second_netzvertrag == first_netzvertrag
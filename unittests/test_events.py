@@ -0,0 +1,62 @@
+import asyncio
+import itertools
+import time
+import uuid
+from datetime import timedelta
+
+from tmdsclient.client.events import EventTracker, EventTrackingSettings
+
+_fast_settings = EventTrackingSettings(
+    timeout=timedelta(milliseconds=300),
+    initial_poll_interval=timedelta(milliseconds=10),
+    max_poll_interval=timedelta(milliseconds=40),
+    max_concurrent_polls=3,
+)
+
+
+async def test_events_are_polled_together_with_backoff():
+    handled_event_ids = {uuid.uuid4() for _ in range(10)}
+    never_handled_event_id = uuid.uuid4()
+    poll_times: dict[uuid.UUID, list[float]] = {}
+    polls_in_flight = 0
+    max_polls_in_flight = 0
+
+    async def has_been_handled(event_id: uuid.UUID) -> bool:
+        nonlocal polls_in_flight, max_polls_in_flight
+        polls_in_flight += 1
+        max_polls_in_flight = max(max_polls_in_flight, polls_in_flight)
+        poll_times.setdefault(event_id, []).append(time.monotonic())
+        await asyncio.sleep(0.001)
+        polls_in_flight -= 1
+        # the handled events are handled on the third poll
+        return event_id in handled_event_ids and len(poll_times[event_id]) >= 3
+
+    tracker = EventTracker(has_been_handled, _fast_settings)
+    results = await asyncio.gather(
+        *(tracker.wait_until_handled(event_id) for event_id in [*handled_event_ids, never_handled_event_id])
+    )
+    assert results == [True] * len(handled_event_ids) + [False]
+    assert max_polls_in_flight <= 3
+    assert tracker.number_of_pending_events == 0
+    never_handled_poll_times = poll_times[never_handled_event_id]
+    intervals = [b - a for a, b in itertools.pairwise(never_handled_poll_times)]
+    assert len(intervals) < 30, "the poll interval should grow"
+    assert intervals[-2] > intervals[0]
+
+
+async def test_tracking_waits_if_too_many_events_are_pending():
+    first_event_id = uuid.uuid4()
+    first_event_is_handled = False
+
+    async def has_been_handled(event_id: uuid.UUID) -> bool:
+        return event_id != first_event_id or first_event_is_handled
+
+    tracker = EventTracker(has_been_handled, _fast_settings.model_copy(update={"max_pending_events": 1}))
+    first_future = await tracker.track(first_event_id)
+    second_track = asyncio.create_task(tracker.track(uuid.uuid4()))
+    await asyncio.sleep(0.05)
+    assert not second_track.done()
+    first_event_is_handled = True
+    assert await first_future is True
+    assert await (await second_track) is True
+    await tracker.close()
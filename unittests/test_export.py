@@ -0,0 +1,64 @@
+import asyncio
+import gzip
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+
+from tmdsclient.client.export import export_to_ndjson
+
+
+async def _bodies(number: int, pretty: bool = False) -> AsyncGenerator[bytes, None]:
+    for index in range(number):
+        yield json.dumps({"id": index, "name": "Netzvertrag ä"}, indent=2 if pretty else None).encode("utf-8")
+
+
+@pytest.mark.parametrize("compress", [True, False])
+async def test_export_to_ndjson(tmp_path: Path, compress: bool):
+    actual = await export_to_ndjson(_bodies(10), tmp_path, file_name_prefix="foo", compress=compress, queue_size=3)
+    assert actual.number_of_entities == 10
+    assert len(actual.files) == 1
+    assert actual.files[0].name == ("foo-00000.ndjson.gz" if compress else "foo-00000.ndjson")
+    opener = gzip.open if compress else open
+    with opener(actual.files[0], "rt", encoding="utf-8") as ndjson_file:
+        lines = ndjson_file.read().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(10))
+
+
+async def test_export_to_ndjson_with_rotation_and_multiline_bodies(tmp_path: Path):
+    actual = await export_to_ndjson(_bodies(10, pretty=True), tmp_path, file_name_prefix="bar", max_bytes_per_file=100)
+    assert actual.number_of_entities == 10
+    assert len(actual.files) > 1
+    lines = [line for path in actual.files for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [json.loads(line)["id"] for line in lines] == list(range(10))
+    assert all(path.stat().st_size <= 100 for path in actual.files)
+    assert sum(path.stat().st_size for path in actual.files) == actual.number_of_bytes
+
+
+async def _bodies_with_gaps(number: int) -> AsyncGenerator[bytes | None, None]:
+    async for body in _bodies(number):
+        yield body
+        yield None  # e.g. an entity that returned 404
+
+
+async def test_export_to_ndjson_skips_none_bodies(tmp_path: Path):
+    actual = await export_to_ndjson(_bodies_with_gaps(10), tmp_path, file_name_prefix="baz", queue_size=3)
+    assert actual.number_of_entities == 10
+    lines = actual.files[0].read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(10))
+
+
+async def test_export_to_ndjson_closes_the_file_after_the_last_write_when_the_producer_fails(tmp_path: Path):
+    async def failing_bodies() -> AsyncGenerator[bytes, None]:
+        async for body in _bodies(5):
+            yield body
+            await asyncio.sleep(0.01)
+        raise ValueError("download failed")
+
+    with pytest.raises(ValueError):
+        await export_to_ndjson(failing_bodies(), tmp_path, file_name_prefix="qux", compress=True)
+    # a gzip file that has been closed while it was written could not be read
+    with gzip.open(tmp_path / "qux-00000.ndjson.gz", "rt", encoding="utf-8") as ndjson_file:
+        lines = ndjson_file.read().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(5))
@@ -0,0 +1,78 @@
+"""
+tests the identity-aware JSON diff
+"""
+
+import copy
+import random
+from typing import Any
+
+import pytest
+from jsonpatch import JsonPatch  # type: ignore[import-untyped]
+
+from tmdsclient.models.json_diff import make_json_patch
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        pytest.param({"a": 1}, {"a": 1}, [], id="no changes"),
+        pytest.param({"a": 1}, {"a": True}, [{"op": "replace", "path": "/a", "value": True}], id="1 is not true"),
+        pytest.param(
+            {"a/b": 1, "c": 2},
+            {"c": 2, "d": 3},
+            [{"op": "remove", "path": "/a~1b"}, {"op": "add", "path": "/d", "value": 3}],
+            id="remove and add keys",
+        ),
+        pytest.param(
+            {"x": [{"guid": "1", "v": 1}, {"guid": "2", "v": 2}]},
+            {"x": [{"guid": "0", "v": 0}, {"guid": "1", "v": 1}, {"guid": "2", "v": 2}]},
+            [{"op": "add", "path": "/x/0", "value": {"guid": "0", "v": 0}}],
+            id="insert at the front",
+        ),
+        pytest.param(
+            {"x": [{"guid": "1", "v": 1}, {"guid": "2", "v": 2}, {"guid": "3", "v": 3}]},
+            {"x": [{"guid": "2", "v": 2}, {"guid": "3", "v": 4}]},
+            [{"op": "remove", "path": "/x/0"}, {"op": "replace", "path": "/x/1/v", "value": 4}],
+            id="remove and modify",
+        ),
+        pytest.param(
+            {"x": [{"guid": "1"}, {"guid": "2"}, {"guid": "3"}]},
+            {"x": [{"guid": "3"}, {"guid": "1"}, {"guid": "2"}]},
+            [{"op": "move", "from": "/x/2", "path": "/x/0"}],
+            id="reorder",
+        ),
+        pytest.param(
+            {"x": [{"guid": None, "obisKennzahl": "1-1:1.8.0"}, {"guid": None, "obisKennzahl": "1-1:2.8.0"}]},
+            {"x": [{"guid": None, "obisKennzahl": "1-1:2.8.0"}]},
+            [{"op": "remove", "path": "/x/0"}],
+            id="fallback to the next identity field",
+        ),
+        pytest.param(
+            {"x": ["a", "b", "c"]},
+            {"x": ["a", "c"]},
+            [{"op": "replace", "path": "/x/1", "value": "c"}, {"op": "remove", "path": "/x/2"}],
+            id="lists without identity are compared by position",
+        ),
+    ],
+)
+def test_make_json_patch(old: Any, new: Any, expected: list[dict[str, Any]]):
+    assert make_json_patch(old, new) == expected
+    assert JsonPatch(expected).apply(old) == new
+
+
+def _random_list(rng: random.Random, guids: list[str]) -> list[dict[str, Any]]:
+    chosen = rng.sample(guids, rng.randint(0, len(guids)))
+    return [
+        {"guid": guid, "value": rng.randint(0, 2), "nested": [rng.randint(0, 2)] * rng.randint(0, 2)} for guid in chosen
+    ]
+
+
+def test_random_changes_are_patched_correctly():
+    rng = random.Random(42)
+    guids = [str(i) for i in range(6)]
+    for _ in range(500):
+        old = {"liste": _random_list(rng, guids), "wert": rng.randint(0, 1)}
+        new = {"liste": _random_list(rng, guids), "wert": rng.randint(0, 1)}
+        patch = make_json_patch(old, new)
+        assert JsonPatch(patch).apply(copy.deepcopy(old)) == new
+        assert make_json_patch(old, new) == patch, "must be deterministic"
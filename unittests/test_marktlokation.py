@@ -1,11 +1,13 @@
+import json
 import uuid
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from aioresponses import CallbackResult, aioresponses
 from bo4e import Sparte
 from jsonpatch import JsonPatch  # type: ignore[import-untyped]
 
+from tmdsclient.client.retry import RetryPolicy
 from tmdsclient.models.marktlokation import Marktlokation
 
 _example_malo_json = {
@@ -133,6 +135,51 @@ class TestTmdsMarktlokation:
             assert not malo.id.startswith("Marktlokation-")
             assert any(malo.bo_model.netznutzungsabrechnungsdaten)
 
+    async def test_get_marktlokation_raw(self, tmds_client_with_default_auth):
+        client, settings = tmds_client_with_default_auth
+        malo_id = _example_malo_json["id"]
+
+        with aioresponses() as mocked_tmds:
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/{malo_id}", payload=_example_malo_json)
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/12345678913", status=404)
+            actual = await client.get_marktlokation_raw(malo_id)
+            missing = await client.get_marktlokation_raw("12345678913")
+
+        assert isinstance(actual, bytes)
+        assert json.loads(actual) == _example_malo_json
+        assert missing is None
+
+    async def test_get_marktlokationen(self, tmds_client_with_default_auth):
+        client, settings = tmds_client_with_default_auth
+        existing_malo_id = _example_malo_json["id"]
+        missing_malo_id = "12345678913"
+
+        with aioresponses() as mocked_tmds:
+            # each URL is mocked only once, so duplicate IDs must not be requested twice
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/{existing_malo_id}", payload=_example_malo_json)
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/{missing_malo_id}", status=404)
+            actual = await client.get_marktlokationen([existing_malo_id, missing_malo_id, existing_malo_id])
+
+        assert list(actual.keys()) == [existing_malo_id, missing_malo_id]
+        assert isinstance(actual[existing_malo_id], Marktlokation)
+        assert actual[missing_malo_id] is None
+
+    async def test_stream_many_marktlokationen_retries_server_errors(self, tmds_client_with_default_auth):
+        client, settings = tmds_client_with_default_auth
+        malo_id = _example_malo_json["id"]
+        retry_policy = RetryPolicy(initial_backoff=timedelta(0))
+
+        with aioresponses() as mocked_tmds:
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/{malo_id}", status=502)
+            mocked_tmds.get(f"{settings.server_url}api/Marktlokation/{malo_id}", payload=_example_malo_json)
+            actual = [
+                x async for x in client.stream_many(client.get_marktlokation, [malo_id], retry_policy=retry_policy)
+            ]
+
+        assert len(actual) == 1
+        assert actual[0][0] == malo_id
+        assert isinstance(actual[0][1], Marktlokation)
+
     async def test_update_malo(self, tmds_client_with_default_auth) -> None:
         malo_json = _example_malo_json.copy()
         malo_id = malo_json["id"]
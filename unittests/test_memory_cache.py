@@ -0,0 +1,63 @@
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from aioresponses import aioresponses
+from yarl import URL
+
+from tmdsclient.client.config import BasicAuthTmdsConfig
+from tmdsclient.client.memory_cache import CacheStatistics, InMemoryEntityCache
+from tmdsclient.client.tmdsclient import BasicAuthTmdsClient
+
+_tmds_config = BasicAuthTmdsConfig(server_url=URL("https://tmds.inv/"), usr="my-usr", pwd="my-pwd")
+
+
+async def test_concurrent_requests_are_coalesced():
+    memory_cache = InMemoryEntityCache()
+    number_of_loads = 0
+
+    async def load() -> str:
+        nonlocal number_of_loads
+        number_of_loads += 1
+        await asyncio.sleep(0.01)
+        return "foo"
+
+    results = await asyncio.gather(*(memory_cache.get_or_load("Zaehler", "123", "", load) for _ in range(5)))
+    assert results == ["foo"] * 5
+    assert await memory_cache.get_or_load("Zaehler", "123", "", load) == "foo"
+    assert number_of_loads == 1
+    assert memory_cache.statistics == CacheStatistics(hits=1, misses=1, coalesced=4, evictions=0, size=1)
+
+
+async def test_least_recently_used_entry_is_evicted_and_ttl_is_respected():
+    memory_cache = InMemoryEntityCache(max_size=2, ttl_per_entity_type={"Zaehler": timedelta(0)})
+
+    async def load() -> str:
+        return "foo"
+
+    await memory_cache.get_or_load("Marktlokation", "1", "", load)
+    await memory_cache.get_or_load("Marktlokation", "2", "", load)
+    await memory_cache.get_or_load("Marktlokation", "1", "", load)  # hit; 2 is now the least recently used
+    await memory_cache.get_or_load("Marktlokation", "3", "", load)  # evicts 2
+    await memory_cache.get_or_load("Zaehler", "4", "", load)  # not cached because of the TTL of 0
+    await memory_cache.get_or_load("Marktlokation", "2", "", load)
+    assert memory_cache.statistics == CacheStatistics(hits=1, misses=5, coalesced=0, evictions=2, size=2)
+
+
+async def test_client_uses_memory_cache():
+    netzvertrag_json = json.loads(
+        (Path(__file__).parent / "example_data" / "single_netzvertrag.json").read_text(encoding="utf-8")
+    )
+    nv_id = uuid.UUID(netzvertrag_json["id"])
+    memory_cache = InMemoryEntityCache()
+    client = BasicAuthTmdsClient(_tmds_config, memory_cache=memory_cache)
+    with aioresponses() as mocked_tmds:
+        # mocked only once: all other calls must be served by the cache
+        mocked_tmds.get(f"https://tmds.inv/api/Netzvertrag/{nv_id}", payload=netzvertrag_json)
+        concurrent_results = await asyncio.gather(*(client.get_netzvertrag_by_id(nv_id) for _ in range(3)))
+        cached_result = await client.get_netzvertrag_by_id(nv_id)
+    await client.close_session()
+    assert all(result is cached_result for result in concurrent_results)
+    assert memory_cache.statistics.misses == 1
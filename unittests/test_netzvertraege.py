@@ -1,7 +1,9 @@
+import gzip
 import json
 import logging
 import uuid
 from pathlib import Path
+from typing import Any
 
 import httpx
 import pytest
@@ -76,6 +78,170 @@ class TestGetNetzvertraege:
         expected_size = size if not with_http_500 else size - 1
         assert len(result_list) == expected_size
         assert any(m for m in caplog.messages if f"Successfully downloaded {expected_size} Netzvertraege" in str(m))
+        if not as_generator:
+            # the list is in the order of the /allIds response
+            expected_ids = [uuid.UUID(x["interneId"]) for index, x in enumerate(all_ids) if index != index_of_error]
+            assert [nv.id for nv in result_list] == expected_ids
+
+    async def test_get_all_netzvertraege_with_deprecated_chunk_size(self, tmds_client_with_default_auth):
+        all_ids = [uuid.uuid4() for _ in range(3)]
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+            mocked_tmds.get(
+                mocked_get_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in all_ids]}
+            )
+            for nv_id in all_ids:
+                mocked_tmds.get(
+                    f"{tmds_config.server_url}api/Netzvertrag/{nv_id}",
+                    status=200,
+                    payload=netzvertrag_json | {"id": str(nv_id)},
+                )
+            with pytest.warns(DeprecationWarning, match="max_concurrency"):
+                actual = await client.get_all_netzvertraege(as_generator=False, chunk_size=2)
+        assert [nv.id for nv in actual] == all_ids
+
+    @pytest.mark.parametrize("raw", [False, True])
+    async def test_get_all_netzvertraege_skips_deleted_netzvertraege(self, tmds_client_with_default_auth, raw: bool):
+        all_ids = [uuid.uuid4() for _ in range(3)]
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+            mocked_tmds.get(
+                mocked_get_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in all_ids]}
+            )
+            for index, nv_id in enumerate(all_ids):
+                if index == 1:
+                    # deleted after the /allIds request
+                    mocked_tmds.get(f"{tmds_config.server_url}api/Netzvertrag/{nv_id}", status=404)
+                else:
+                    mocked_tmds.get(
+                        f"{tmds_config.server_url}api/Netzvertrag/{nv_id}",
+                        status=200,
+                        payload=netzvertrag_json | {"id": str(nv_id)},
+                    )
+            if raw:
+                stream = await client.get_all_netzvertraege_raw(decode=True, ordered=True)
+                actual_ids = [uuid.UUID(x["id"]) async for x in stream]
+            else:
+                actual_ids = [nv.id for nv in await client.get_all_netzvertraege(as_generator=False)]
+        assert actual_ids == [all_ids[0], all_ids[2]]
+
+    async def test_get_all_netzvertraege_resumable(self, tmds_client_with_default_auth, tmp_path: Path):
+        all_ids = [uuid.uuid4() for _ in range(10)]
+        checkpoint_path = tmp_path / "checkpoint.txt"
+        checkpoint_path.write_text("".join(f"{nv_id}\n" for nv_id in all_ids[:6]), encoding="utf-8")
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+            mocked_tmds.get(
+                mocked_get_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in all_ids]}
+            )
+            for nv_id in all_ids[6:9]:
+                # only the missing IDs are mocked; requesting any other ID would fail
+                mocked_tmds.get(
+                    f"{tmds_config.server_url}api/Netzvertrag/{nv_id}",
+                    status=200,
+                    payload=netzvertrag_json | {"id": str(nv_id)},
+                )
+            # deleted after the /allIds request
+            mocked_tmds.get(f"{tmds_config.server_url}api/Netzvertrag/{all_ids[9]}", status=404)
+            actual = [nv async for nv in await client.get_all_netzvertraege_resumable(checkpoint_path)]
+        assert {nv.id for nv in actual} == set(all_ids[6:9])
+        assert {uuid.UUID(line) for line in checkpoint_path.read_text(encoding="utf-8").splitlines()} == set(all_ids)
+
+    async def test_export_all_netzvertraege_to_ndjson(self, tmds_client_with_default_auth, tmp_path: Path):
+        all_ids = [uuid.uuid4() for _ in range(5)]
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+            mocked_tmds.get(
+                mocked_get_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in all_ids]}
+            )
+            for nv_id in all_ids:
+                mocked_tmds.get(
+                    f"{tmds_config.server_url}api/Netzvertrag/{nv_id}",
+                    status=200,
+                    payload=netzvertrag_json | {"id": str(nv_id)},
+                )
+            actual = await client.export_all_netzvertraege_to_ndjson(tmp_path, compress=True)
+        assert actual.number_of_entities == 5
+        with gzip.open(actual.files[0], "rt", encoding="utf-8") as ndjson_file:
+            netzvertraege = [Netzvertrag.model_validate_json(line) for line in ndjson_file]
+        assert {nv.id for nv in netzvertraege} == set(all_ids)
+
+    @pytest.mark.parametrize("decode", [False, True])
+    async def test_get_all_netzvertraege_raw(self, tmds_client_with_default_auth, decode: bool):
+        all_ids = [uuid.uuid4() for _ in range(3)]
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+            mocked_tmds.get(
+                mocked_get_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in all_ids]}
+            )
+            for nv_id in all_ids:
+                mocked_tmds.get(
+                    f"{tmds_config.server_url}api/Netzvertrag/{nv_id}",
+                    status=200,
+                    payload=netzvertrag_json | {"id": str(nv_id)},
+                )
+            stream = await client.get_all_netzvertraege_raw(decode=decode, ordered=True)
+            actual = [x async for x in stream]
+        if decode:
+            assert actual == [netzvertrag_json | {"id": str(nv_id)} for nv_id in all_ids]
+        else:
+            assert [json.loads(body)["id"] for body in actual] == [str(nv_id) for nv_id in all_ids]
+
+    async def test_sync_netzvertraege(self, tmds_client_with_default_auth, tmp_path: Path):
+        netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
+        with open(netzvertrag_json_file, encoding="utf-8") as infile:
+            netzvertrag_json = json.load(infile)
+        client, tmds_config = tmds_client_with_default_auth
+        snapshot_path = tmp_path / "snapshot.json"
+        ids = [uuid.uuid4() for _ in range(5)]
+        all_ids_url = f"{tmds_config.server_url}api/Netzvertrag/allIds"
+
+        def mock_netzvertrag(mocked_tmds: aioresponses, nv_id: uuid.UUID, beschreibung: str = "foo") -> None:
+            payload = netzvertrag_json | {"id": str(nv_id)}
+            payload["boModel"] = payload["boModel"] | {"beschreibung": beschreibung}
+            mocked_tmds.get(f"{tmds_config.server_url}api/Netzvertrag/{nv_id}", status=200, payload=payload)
+
+        with aioresponses() as mocked_tmds:
+            mocked_tmds.get(all_ids_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in ids[:3]]})
+            for nv_id in ids[:3]:
+                mock_netzvertrag(mocked_tmds, nv_id)
+            first_sync = await client.sync_netzvertraege(snapshot_path)
+        assert {nv.id for nv in first_sync.added} == set(ids[:3])
+        assert not any(first_sync.changed) and not any(first_sync.removed_ids)
+
+        with aioresponses() as mocked_tmds:
+            mocked_tmds.get(all_ids_url, status=200, payload={"Netzvertrag": [{"interneId": str(x)} for x in ids[1:]]})
+            # ids[0] has been removed, ids[1] is suspected to have changed, ids[2] is neither; ids[3] is new;
+            # ids[4] is new, too, but has been deleted after the /allIds request
+            mock_netzvertrag(mocked_tmds, ids[1], beschreibung="bar")
+            mock_netzvertrag(mocked_tmds, ids[3])
+            mocked_tmds.get(f"{tmds_config.server_url}api/Netzvertrag/{ids[4]}", status=404)
+            second_sync = await client.sync_netzvertraege(snapshot_path, revalidate_after=None, suspected_ids=[ids[1]])
+        assert [nv.id for nv in second_sync.added] == [ids[3]]
+        assert [nv.id for nv in second_sync.changed] == [ids[1]]
+        assert second_sync.removed_ids == [ids[0]]
+        assert second_sync.not_downloaded_ids == [ids[2]]
+        assert not any(second_sync.unchanged_ids)
 
     async def test_get_netzvertrag_by_id(self, tmds_client_with_default_auth):
         netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
@@ -115,6 +281,27 @@ class TestGetNetzvertraege:
             "Unmapped properties should be stored in model_extra (Marktlokation)"
         )
 
+    async def test_get_netzvertraege_for_melos(self, tmds_client_with_default_auth):
+        netzvertraege_json_file = Path(__file__).parent / "example_data" / "list_of_netzvertraege.json"
+        with open(netzvertraege_json_file, encoding="utf-8") as infile:
+            netzvertraege_json = json.load(infile)
+        melo_ids = ["DE0011122233344455566677788899900", "DE0011122233344455566677788899911"]
+        missing_melo_id = "DE0011122233344455566677788899922"
+        client, tmds_config = tmds_client_with_default_auth
+        with aioresponses() as mocked_tmds:
+            # each URL is mocked only once, so duplicate IDs must not be requested twice
+            for melo_id in melo_ids:
+                mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/find?messlokation={melo_id}"
+                mocked_tmds.get(mocked_get_url, status=200, payload=netzvertraege_json)
+            mocked_get_url = f"{tmds_config.server_url}api/Netzvertrag/find?messlokation={missing_melo_id}"
+            mocked_tmds.get(mocked_get_url, status=200, payload=[])
+            actual = await client.get_netzvertraege_for_melos([*melo_ids, missing_melo_id, melo_ids[0]])
+        assert list(actual.keys()) == [*melo_ids, missing_melo_id]
+        assert actual[missing_melo_id] == []
+        first_list, second_list = actual[melo_ids[0]], actual[melo_ids[1]]
+        assert len(first_list) == len(netzvertraege_json)
+        assert all(x is y for x, y in zip(first_list, second_list, strict=True))
+
     async def test_update_netzvertrag(self, tmds_client_with_default_auth):
         netzvertrag_json_file = Path(__file__).parent / "example_data" / "single_netzvertrag.json"
         with open(netzvertrag_json_file, encoding="utf-8") as infile:
@@ -143,6 +330,41 @@ class TestGetNetzvertraege:
         assert isinstance(actual, Netzvertrag)
         assert actual.bo_model.vertragstatus == Vertragsstatus.STORNIERT
 
+    async def test_update_netzvertrag_with_current_state_and_guard(self, tmds_client_with_default_auth):
+        netzvertrag_json = json.loads(
+            (Path(__file__).parent / "example_data" / "single_netzvertrag.json").read_text(encoding="utf-8")
+        )
+        current_state = Netzvertrag.model_validate(netzvertrag_json)
+        client, tmds_config = tmds_client_with_default_auth
+        request_bodies: list[list[dict[str, Any]]] = []
+
+        def set_status_to_storniert(nv: Netzvertrag) -> None:
+            assert nv.bo_model is not None
+            nv.bo_model.vertragstatus = Vertragsstatus.STORNIERT
+
+        def patch_endpoint_callback(url, **kwargs):  # pylint:disable=unused-argument
+            request_bodies.append(kwargs["json"])
+            return CallbackResult(status=200, payload=JsonPatch(kwargs["json"]).apply(netzvertrag_json))
+
+        with aioresponses() as mocked_tmds:
+            # no GET request is mocked: the current state must not be downloaded
+            mocked_patch_url = f"{tmds_config.server_url}api/v2/Netzvertrag/{current_state.id}"
+            mocked_tmds.patch(mocked_patch_url, callback=patch_endpoint_callback)
+            actual = await client.update_netzvertrag(
+                current_state.id,
+                [set_status_to_storniert],
+                current_state=current_state,
+                guard_against_concurrent_modification=True,
+            )
+        assert actual.bo_model is not None
+        assert actual.bo_model.vertragstatus == Vertragsstatus.STORNIERT
+        assert request_bodies == [
+            [
+                {"op": "test", "path": "/boModel/vertragstatus", "value": "AKTIV"},
+                {"op": "replace", "path": "/boModel/vertragstatus", "value": "STORNIERT"},
+            ]
+        ]
+
     def test_netzvertrag_can_be_instantiated_using_field_names(self):
         dummy_bo4e_vertrag = Bo4eVertrag.model_construct()
         nv = Netzvertrag(bo_model=dummy_bo4e_vertrag, id=uuid.uuid4())
@@ -0,0 +1,155 @@
+import asyncio
+import math
+from datetime import UTC, datetime, timedelta
+
+import jwt
+from aioresponses import CallbackResult, aioresponses
+from jsonpatch import JsonPatch  # type: ignore[import-untyped]
+
+from tmdsclient.client import tmdsclient as tmdsclient_module
+from tmdsclient.client.oauth import get_token_deadline, get_token_expiration, token_deadline_is_valid, token_is_valid
+
+_SECRET = "a-secret-which-is-long-enough-for-hs256"
+
+
+def _create_token(valid_for: timedelta) -> str:
+    return jwt.encode({"exp": int((datetime.now(UTC) + valid_for).timestamp())}, _SECRET, algorithm="HS256")
+
+
+def test_get_token_expiration():
+    token = _create_token(timedelta(hours=1))
+    expiration = get_token_expiration(token)
+    assert expiration is not None
+    assert timedelta(minutes=59) < expiration - datetime.now(UTC) <= timedelta(hours=1)
+    assert token_is_valid(token)
+    assert get_token_expiration(jwt.encode({"foo": "bar"}, _SECRET, algorithm="HS256")) is None
+
+
+async def test_token_is_refreshed_in_background_without_recreating_the_session(tmds_client_with_oauth, monkeypatch):
+    client, tmds_config = tmds_client_with_oauth
+    monkeypatch.setattr(tmdsclient_module, "_MIN_TOKEN_REFRESH_INTERVAL", timedelta(0))
+    # the first token has to be refreshed (almost) immediately, because of the refresh margin of 2 minutes
+    tokens = [_create_token(timedelta(minutes=2, seconds=1)), _create_token(timedelta(hours=1))]
+    retrieved_tokens: list[str] = []
+
+    async def get_new_token() -> str:
+        retrieved_tokens.append(tokens[len(retrieved_tokens)])
+        return retrieved_tokens[-1]
+
+    client._get_new_token = get_new_token  # pylint:disable=protected-access
+    authorization_headers: list[str] = []
+
+    def record_authorization_header(url, **kwargs):  # pylint:disable=unused-argument
+        authorization_headers.append(kwargs["headers"]["Authorization"])
+        return CallbackResult(status=404)
+
+    malo_url = f"{tmds_config.server_url}api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, callback=record_authorization_header, repeat=True)
+        await client.get_marktlokation_raw("12345678913")
+        session = await client._get_session()  # pylint:disable=protected-access
+        for _ in range(50):
+            if len(retrieved_tokens) == 2:
+                break
+            await asyncio.sleep(0.1)
+        await client.get_marktlokation_raw("12345678913")
+        assert await client._get_session() is session  # pylint:disable=protected-access
+    assert authorization_headers == [f"Bearer {tokens[0]}", f"Bearer {tokens[1]}"]
+
+
+async def test_invalid_token_is_replaced_without_deadlock(tmds_client_with_oauth):
+    client, tmds_config = tmds_client_with_oauth
+    number_of_retrieved_tokens = 0
+
+    async def get_new_token() -> str:
+        nonlocal number_of_retrieved_tokens
+        number_of_retrieved_tokens += 1
+        # tokens that expire in less than a minute are considered invalid
+        return _create_token(timedelta(seconds=30 + number_of_retrieved_tokens))
+
+    client._get_new_token = get_new_token  # pylint:disable=protected-access
+
+    malo_url = f"{tmds_config.server_url}api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, status=404, repeat=True)
+        for _ in range(3):
+            await asyncio.wait_for(client.get_marktlokation_raw("12345678913"), timeout=5)
+    assert number_of_retrieved_tokens >= 3
+
+
+def test_token_deadline():
+    assert token_deadline_is_valid(get_token_deadline(_create_token(timedelta(hours=1))))
+    assert not token_deadline_is_valid(get_token_deadline(_create_token(timedelta(seconds=30))))
+    assert get_token_deadline("not a token") is None
+    assert not token_deadline_is_valid(None)
+    token_without_expiration = jwt.encode({"foo": "bar"}, _SECRET, algorithm="HS256")
+    assert get_token_deadline(token_without_expiration) == math.inf
+    assert token_deadline_is_valid(get_token_deadline(token_without_expiration))
+
+
+async def test_token_without_expiration_is_retrieved_only_once(tmds_client_with_oauth):
+    client, tmds_config = tmds_client_with_oauth
+    number_of_retrieved_tokens = 0
+
+    async def get_new_token() -> str:
+        nonlocal number_of_retrieved_tokens
+        number_of_retrieved_tokens += 1
+        return jwt.encode({"foo": "bar"}, _SECRET, algorithm="HS256")
+
+    client._get_new_token = get_new_token  # pylint:disable=protected-access
+    malo_url = f"{tmds_config.server_url}api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, status=404, repeat=True)
+        for _ in range(3):
+            await client.get_marktlokation_raw("12345678913")
+        refresh_task = client._token_refresh_task  # pylint:disable=protected-access
+        assert refresh_task is not None
+        await asyncio.wait_for(refresh_task, timeout=5)  # the background refresh stops
+    assert number_of_retrieved_tokens == 1
+
+
+async def test_token_is_decoded_only_once(tmds_client_with_oauth, monkeypatch):
+    client, tmds_config = tmds_client_with_oauth
+    token = _create_token(timedelta(hours=1))
+
+    async def get_new_token() -> str:
+        return token
+
+    client._get_new_token = get_new_token  # pylint:disable=protected-access
+    number_of_decodings = 0
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        nonlocal number_of_decodings
+        number_of_decodings += 1
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    malo_url = f"{tmds_config.server_url}api/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get(malo_url, status=404, repeat=True)
+        for _ in range(10):
+            await client.get_marktlokation_raw("12345678913")
+    assert number_of_decodings == 1
+
+
+async def test_closing_stops_the_background_refresh_started_by_queued_updates(tmds_client_with_oauth):
+    client, tmds_config = tmds_client_with_oauth
+
+    async def get_new_token() -> str:
+        return _create_token(timedelta(hours=1))
+
+    client._get_new_token = get_new_token  # pylint:disable=protected-access
+    malo_url = f"{tmds_config.server_url}api/v2/Marktlokation/12345678913"
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.patch(malo_url, status=404, reason="Not Found")
+        queued_update = asyncio.create_task(
+            client.queue_marktlokation_update(
+                "12345678913", JsonPatch([{"op": "replace", "path": "/foo", "value": "bar"}])
+            )
+        )
+        await asyncio.sleep(0)  # the update is queued, but no session has been created yet
+        assert client._token_refresh_task is None  # pylint:disable=protected-access
+        await client.close_session()
+    assert queued_update.done()
+    assert client._token_refresh_task is None  # pylint:disable=protected-access
@@ -2,15 +2,18 @@
 tests the bare JSON patch logic (no requests)
 """
 
+import json
 import uuid
 from collections.abc import Callable
 from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
 
 import pytest
 from jsonpatch import JsonPatch  # type: ignore[import]
 
-from tmdsclient.models.netzvertrag import Bo4eVertrag, Netzvertrag, Vertragsstatus
-from tmdsclient.models.patches import build_json_patch_document
+from tmdsclient.models.netzvertrag import Bo4eVertrag, Netzvertrag, Vertragsstatus, Vertragsteil
+from tmdsclient.models.patches import add_test_operations, build_json_patch_document, can_be_sent_twice
 
 
 def _set_netzvertrag_vertragsbeginn(nv: Netzvertrag, vertragsbeginn: datetime) -> None:
@@ -74,8 +77,154 @@ def test_netzvertrag_patch_creation(
     expected_patch = expected.patch
     assert isinstance(actual_patch, list)
     assert actual_patch is not None
-    assert actual_patch == expected_patch or list(reversed(actual_patch)) == expected_patch
-    # why the hack is the last assertion necessary?
-    # see https://github.com/stefankoegl/python-json-patch/issues/151
-    # note the last assertion only is guaranteed for lists up to 2 entries.
-    # for longer lists you might find the test to be flaky.
+    assert actual_patch == expected_patch
+
+
+def _load_example_netzvertrag() -> Netzvertrag:
+    return Netzvertrag.model_validate_json(
+        (Path(__file__).parent / "example_data" / "single_netzvertrag.json").read_bytes()
+    )
+
+
+def _remove_first_vertragsteil(nv: Netzvertrag) -> None:
+    assert nv.bo_model is not None and nv.bo_model.vertragsteile is not None
+    del nv.bo_model.vertragsteile[0]
+
+
+def _insert_vertragsteil_at_the_front(nv: Netzvertrag) -> None:
+    assert nv.bo_model is not None and nv.bo_model.vertragsteile is not None
+    nv.bo_model.vertragsteile.insert(
+        0,
+        Vertragsteil(
+            guid=uuid.UUID("5e9c62ac-6c12-4c41-9d0c-3a4c45c6a2a1"),
+            vertragsteilbeginn=datetime(2024, 1, 1, 0, 0, 0, tzinfo=UTC),
+        ),
+    )
+
+
+def _set_extra_field(nv: Netzvertrag) -> None:
+    nv.externeId = "foo"  # type: ignore[attr-defined]
+
+
+def _replace_bo_model_and_modify_it(nv: Netzvertrag) -> None:
+    assert nv.bo_model is not None
+    bo_model = nv.bo_model.model_copy()
+    nv.bo_model = bo_model
+    nv.bo_model.vertragsnummer = "12345"
+
+
+def _modify_through_an_untracked_attribute(nv: Netzvertrag) -> None:
+    assert isinstance(nv, Netzvertrag)
+    assert nv.bo_model is not None
+    nv.bo_model.__dict__["vertragsnummer"] = "54321"
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        pytest.param([], id="no changes"),
+        pytest.param(
+            [lambda x: _set_netzvertrag_vertragsbeginn(x, datetime(2024, 1, 1, 0, 0, 0, tzinfo=UTC))],
+            id="change one property",
+        ),
+        pytest.param(
+            [
+                lambda x: _set_netzvertrag_vertragsbeginn(x, datetime(2023, 7, 1, 0, 0, 0, tzinfo=UTC)),
+                lambda x: _set_netzvertrag_status(x, Vertragsstatus.STORNIERT),
+            ],
+            id="change 2 properties",
+        ),
+        pytest.param([_remove_first_vertragsteil], id="modify a list"),
+        pytest.param([_insert_vertragsteil_at_the_front], id="insert into a list"),
+        pytest.param([_set_extra_field], id="change an extra field"),
+        pytest.param([_replace_bo_model_and_modify_it], id="replace a nested model"),
+        pytest.param([_modify_through_an_untracked_attribute], id="untrackable access"),
+    ],
+)
+def test_tracked_changes_are_equivalent_to_full_comparison(changes: list[Callable[[Netzvertrag], None]]):
+    netzvertrag = _load_example_netzvertrag()
+    original_json = json.loads(netzvertrag.model_dump_json(by_alias=True))
+    full_comparison_patch = build_json_patch_document(netzvertrag, changes)
+    tracked_patch = build_json_patch_document(netzvertrag, changes, track_changes=True)
+    assert json.loads(netzvertrag.model_dump_json(by_alias=True)) == original_json, "must not modify the original"
+    assert tracked_patch.apply(original_json) == full_comparison_patch.apply(original_json)
+    assert len(tracked_patch.patch) == len(full_comparison_patch.patch)
+    assert tracked_patch.patch == full_comparison_patch.patch
+
+
+@pytest.mark.parametrize(
+    "change, expected_operations",
+    [
+        pytest.param(_remove_first_vertragsteil, [{"op": "remove", "path": "/boModel/vertragsteile/0"}], id="remove"),
+        pytest.param(_insert_vertragsteil_at_the_front, [{"op": "add", "path": "/boModel/vertragsteile/0"}], id="add"),
+    ],
+)
+def test_list_elements_are_matched_by_guid(change: Callable[[Netzvertrag], None], expected_operations: list[dict]):
+    netzvertrag = _load_example_netzvertrag()
+    patch = build_json_patch_document(netzvertrag, [change])
+    assert [{k: v for k, v in operation.items() if k != "value"} for operation in patch.patch] == expected_operations
+
+
+def test_test_operations_are_only_added_for_existing_values():
+    netzvertrag = _load_example_netzvertrag()
+    assert netzvertrag.bo_model is not None and netzvertrag.bo_model.vertragsteile is not None
+    first_vertragsteil = netzvertrag.bo_model.vertragsteile[0].model_dump(mode="json", by_alias=True)
+    patch = add_test_operations(
+        netzvertrag,
+        JsonPatch(
+            [
+                {"op": "add", "path": "/doesNotExist", "value": 1},
+                {"op": "remove", "path": "/boModel/vertragsteile/0"},
+            ]
+        ),
+    )
+    assert [operation for operation in patch.patch if operation["op"] == "test"] == [
+        {"op": "test", "path": "/boModel/vertragsteile/0", "value": first_vertragsteil}
+    ]
+    json.dumps(patch.patch)  # must be serializable
+
+
+@pytest.mark.parametrize("path", ["/boModel/vertragsteile/-", "/boModel/vertragsteile/0"])
+def test_inserting_into_a_list_tests_the_whole_list(path: str):
+    netzvertrag = _load_example_netzvertrag()
+    assert netzvertrag.bo_model is not None and netzvertrag.bo_model.vertragsteile is not None
+    vertragsteile = [x.model_dump(mode="json", by_alias=True) for x in netzvertrag.bo_model.vertragsteile]
+    patch = add_test_operations(
+        netzvertrag,
+        JsonPatch(
+            [
+                {"op": "add", "path": path, "value": vertragsteile[0]},
+                {"op": "remove", "path": "/boModel/vertragsteile/1"},
+            ]
+        ),
+    )
+    assert [operation for operation in patch.patch if operation["op"] == "test"] == [
+        {"op": "test", "path": "/boModel/vertragsteile", "value": vertragsteile}
+    ]
+    json.dumps(patch.patch)  # must be serializable
+
+
+@pytest.mark.parametrize(
+    "operations, expected",
+    [
+        pytest.param([{"op": "replace", "path": "/a/0", "value": 1}], True, id="replace"),
+        pytest.param([{"op": "add", "path": "/a", "value": 1}], True, id="add a key"),
+        pytest.param([{"op": "remove", "path": "/a"}], True, id="remove a key"),
+        pytest.param([{"op": "add", "path": "/a/-", "value": 1}], False, id="append"),
+        pytest.param([{"op": "add", "path": "/a/0", "value": 1}], False, id="insert"),
+        pytest.param([{"op": "remove", "path": "/a/0"}], False, id="remove an element"),
+        pytest.param([{"op": "move", "from": "/a/1", "path": "/a/0"}], False, id="reorder"),
+        pytest.param(
+            [{"op": "test", "path": "/a", "value": []}, {"op": "add", "path": "/a/-", "value": 1}],
+            True,
+            id="append to a tested list",
+        ),
+        pytest.param(
+            [{"op": "test", "path": "/a/0", "value": 1}, {"op": "remove", "path": "/a/0"}],
+            True,
+            id="remove a tested element",
+        ),
+    ],
+)
+def test_can_be_sent_twice(operations: list[dict[str, Any]], expected: bool):
+    assert can_be_sent_twice(operations) is expected
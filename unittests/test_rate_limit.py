@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from aioresponses import aioresponses
+from yarl import URL
+
+from tmdsclient.client.config import BasicAuthTmdsConfig
+from tmdsclient.client.rate_limit import EndpointBudget, RateLimiter, RateLimitSettings
+from tmdsclient.client.tmdsclient import BasicAuthTmdsClient
+
+_server_url = URL("https://tmds.inv/")
+
+
+async def test_requests_exceeding_the_burst_have_to_wait():
+    rate_limiter = RateLimiter(RateLimitSettings(requests_per_second=50, burst=2))
+    started = time.monotonic()
+    waits = await asyncio.gather(*(rate_limiter.acquire("GET", _server_url / "api" / "Zaehler") for _ in range(6)))
+    # 2 requests are sent at once, the other 4 are spread over 4/50s
+    assert time.monotonic() - started >= 0.07
+    assert sum(1 for wait in waits if wait > 0) == 4
+    statistics = rate_limiter.statistics["overall"]
+    assert statistics.number_of_requests == 6
+    assert statistics.number_of_delayed_requests == 4
+    assert 0.07 <= statistics.max_wait.total_seconds() <= 0.1
+
+
+async def test_endpoint_budgets_only_apply_to_their_endpoint_family():
+    rate_limiter = RateLimiter(
+        RateLimitSettings(
+            requests_per_second=1000,
+            burst=100,
+            endpoint_budgets=[
+                EndpointBudget(name="v2 patches", method="PATCH", path_prefix="api/v2/", requests_per_second=20)
+            ],
+        )
+    )
+    patch_waits = [await rate_limiter.acquire("PATCH", _server_url / "api" / "v2" / "Zaehler") for _ in range(3)]
+    get_waits = [await rate_limiter.acquire("GET", _server_url / "api" / "v2" / "Zaehler") for _ in range(3)]
+    assert patch_waits[0] == 0 and all(wait > 0 for wait in patch_waits[1:])
+    assert get_waits == [0, 0, 0]
+    assert rate_limiter.statistics["v2 patches"].number_of_requests == 3
+    assert rate_limiter.statistics["overall"].number_of_requests == 6
+
+
+async def test_client_requests_pass_the_rate_limiter():
+    tmds_config = BasicAuthTmdsConfig(
+        server_url=_server_url,
+        usr="my-usr",
+        pwd="my-pwd",
+        rate_limit=RateLimitSettings(requests_per_second=10),
+    )
+    client = BasicAuthTmdsClient(tmds_config)
+    with aioresponses() as mocked_tmds:
+        mocked_tmds.get("https://tmds.inv/api/Marktlokation/12345678913", status=404, repeat=True)
+        await asyncio.gather(*(client.get_marktlokation_raw("12345678913") for _ in range(3)))
+    await client.close_session()
+    assert client.rate_limiter is not None
+    statistics = client.rate_limiter.statistics["overall"]
+    assert statistics.number_of_requests == 3
+    assert statistics.number_of_delayed_requests == 2
@@ -1,8 +1,13 @@
+import asyncio
+from datetime import timedelta
+
 import pytest
+from aiohttp import ClientTimeout
 from yarl import URL
 
 from tmdsclient import TmdsClient
 from tmdsclient.client.config import BasicAuthTmdsConfig, OAuthTmdsConfig
+from tmdsclient.client.tmdsclient import BasicAuthTmdsClient
 
 
 @pytest.mark.parametrize(
@@ -29,3 +34,40 @@ def test_oauth_config():
         OAuthTmdsConfig(
             server_url=URL("https://tmds.example.com"), bearer_token="something-which-is-definitely no token"
         )
+
+
+async def test_concurrent_get_session_creates_only_one_session(tmds_client_with_default_auth):
+    client, _ = tmds_client_with_default_auth
+    sessions = await asyncio.gather(*(client._get_session() for _ in range(50)))  # pylint:disable=protected-access
+    assert all(session is sessions[0] for session in sessions)
+    await client.close_session()
+    new_session = await client._get_session()  # pylint:disable=protected-access
+    assert new_session is not sessions[0]
+    assert not new_session.closed
+
+
+async def test_session_is_created_with_transport_settings_from_config():
+    config = BasicAuthTmdsConfig(
+        server_url=URL("https://tmds.example.com"),
+        usr="my-usr",
+        pwd="my-pwd",
+        connection_limit=20,
+        connection_limit_per_host=10,
+        total_timeout=None,
+        connect_timeout=timedelta(seconds=3),
+        read_timeout=timedelta(seconds=30),
+    )
+    client = BasicAuthTmdsClient(config)
+    try:
+        session = await client._get_session()  # pylint:disable=protected-access
+        assert session.connector is not None
+        assert session.connector.limit == 20
+        assert session.connector.limit_per_host == 10
+        assert session.timeout == ClientTimeout(total=None, connect=3, sock_read=30)
+        ssl_context = client._ssl_context  # pylint:disable=protected-access
+        await client.close_session()
+        recreated_session = await client._get_session()  # pylint:disable=protected-access
+        assert recreated_session is not session
+        assert client._ssl_context is ssl_context is not None  # pylint:disable=protected-access
+    finally:
+        await client.close_session()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from aioresponses import CallbackResult, aioresponses
+from jsonpatch import JsonPatch  # type: ignore[import-untyped]
+
+from tmdsclient.client.write_queue import CoalescingWriteQueue, WriteCoalescingSettings, combine_changes
+from tmdsclient.models.netzvertrag import Netzvertrag, Vertragsstatus
+
+_netzvertrag_json = json.loads(
+    (Path(__file__).parent / "example_data" / "single_netzvertrag.json").read_text(encoding="utf-8")
+)
+
+
+def _set_status_to_storniert(nv: Netzvertrag) -> None:
+    assert nv.bo_model is not None
+    nv.bo_model.vertragstatus = Vertragsstatus.STORNIERT
+
+
+def test_json_patches_and_callables_are_combined():
+    netzvertrag = Netzvertrag.model_validate(_netzvertrag_json)
+    combined = combine_changes(
+        [
+            [{"op": "replace", "path": "/boModel/vertragsnummer", "value": "foo"}],
+            [_set_status_to_storniert],
+            [{"op": "replace", "path": "/externeId", "value": "bar"}],
+        ]
+    )
+    assert len(combined) == 3
+    for change in combined:
+        change(netzvertrag)  # type: ignore[operator]
+    assert netzvertrag.bo_model is not None
+    assert netzvertrag.bo_model.vertragsnummer == "foo"
+    assert netzvertrag.bo_model.vertragstatus == Vertragsstatus.STORNIERT
+    assert netzvertrag.model_dump(by_alias=True)["externeId"] == "bar"
+    assert combine_changes([[{"op": "remove", "path": "/a"}], [{"op": "remove", "path": "/b"}]]) == [
+        {"op": "remove", "path": "/a"},
+        {"op": "remove", "path": "/b"},
+    ]
+
+
+async def test_concurrent_changes_of_the_same_entity_are_sent_together():
+    sent_updates: list[tuple[str, int]] = []
+    updates_in_flight: set[str] = set()
+
+    async def update(entity_id: str, changes: Any, _keydate: Any) -> str:
+        assert entity_id not in updates_in_flight, "updates of the same entity must not overlap"
+        updates_in_flight.add(entity_id)
+        await asyncio.sleep(0.02)
+        updates_in_flight.remove(entity_id)
+        sent_updates.append((entity_id, len(changes)))
+        return f"{entity_id} after update {len(sent_updates)}"
+
+    write_queue: CoalescingWriteQueue[Any] = CoalescingWriteQueue(
+        update, WriteCoalescingSettings(max_delay=timedelta(milliseconds=10), max_changes_per_update=3)
+    )
+    first_results = await asyncio.gather(
+        write_queue.submit("a", [{"op": "remove", "path": "/x"}]),
+        write_queue.submit("a", [{"op": "remove", "path": "/y"}]),
+        write_queue.submit("b", [{"op": "remove", "path": "/x"}]),
+    )
+    assert sorted(sent_updates) == [("a", 2), ("b", 1)]
+    assert first_results[0] == first_results[1]
+    sent_updates.clear()
+    # 3 changes trigger an update immediately; the fourth one is sent once the first update is done
+    results = await asyncio.gather(*(write_queue.submit("a", [{"op": "remove", "path": f"/{i}"}]) for i in range(4)))
+    assert sent_updates == [("a", 3), ("a", 1)]
+    assert len(set(results[:3])) == 1 and results[3] != results[0]
+    assert write_queue.number_of_pending_updates == 0
+
+
+async def test_errors_are_raised_to_all_callers():
+    async def update(entity_id: str, changes: Any, _keydate: Any) -> str:
+        raise ValueError(f"{entity_id} not found")
+
+    write_queue: CoalescingWriteQueue[Any] = CoalescingWriteQueue(update)
+    results = await asyncio.gather(
+        write_queue.submit("a", [{"op": "remove", "path": "/x"}]),
+        write_queue.submit("a", [{"op": "remove", "path": "/y"}]),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_client_sends_queued_updates_of_a_netzvertrag_in_one_request(tmds_client_with_default_auth):
+    client, tmds_config = tmds_client_with_default_auth
+    nv_id = uuid.UUID(_netzvertrag_json["id"])
+    request_bodies: list[Any] = []
+
+    def patch_endpoint_callback(url, **kwargs):  # pylint:disable=unused-argument
+        request_bodies.append(kwargs["json"])
+        return CallbackResult(status=200, payload=JsonPatch(kwargs["json"]).apply(_netzvertrag_json))
+
+    with aioresponses() as mocked_tmds:
+        # both the GET and the PATCH are mocked only once
+        mocked_tmds.get(f"{tmds_config.server_url}api/Netzvertrag/{nv_id}", status=200, payload=_netzvertrag_json)
+        mocked_tmds.patch(f"{tmds_config.server_url}api/v2/Netzvertrag/{nv_id}", callback=patch_endpoint_callback)
+        results = await asyncio.gather(
+            client.queue_netzvertrag_update(nv_id, [_set_status_to_storniert]),
+            client.queue_netzvertrag_update(
+                nv_id, [{"op": "replace", "path": "/boModel/vertragsnummer", "value": "foo"}]
+            ),
+        )
+    assert results[0] is results[1]
+    assert results[0].bo_model is not None
+    assert results[0].bo_model.vertragstatus == Vertragsstatus.STORNIERT
+    assert results[0].bo_model.vertragsnummer == "foo"
+    assert len(request_bodies) == 1
+
+
+async def test_submitting_waits_if_too_many_updates_are_pending():
+    first_update_may_finish = asyncio.Event()
+
+    async def update(entity_id: str, changes: Any, _keydate: Any) -> str:
+        if entity_id == "a":
+            await first_update_may_finish.wait()
+        return entity_id
+
+    write_queue: CoalescingWriteQueue[Any] = CoalescingWriteQueue(
+        update,
+        WriteCoalescingSettings(max_delay=timedelta(0), max_pending_updates=1),
+    )
+    first_submit = asyncio.create_task(write_queue.submit("a", []))
+    second_submit = asyncio.create_task(write_queue.submit("b", []))
+    await asyncio.sleep(0.02)
+    assert not first_submit.done() and not second_submit.done()
+    first_update_may_finish.set()
+    assert await first_submit == "a"
+    assert await second_submit == "b"
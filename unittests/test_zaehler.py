@@ -1,10 +1,14 @@
 import uuid
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from typing import Any
 
+import pytest
 from aioresponses import CallbackResult, aioresponses
 from bo4e import Sparte
-from jsonpatch import JsonPatch  # type: ignore[import-untyped]
+from jsonpatch import JsonPatch, JsonPatchTestFailed  # type: ignore[import-untyped]
 
+from tmdsclient.client.bulk import BulkUpdateItem
+from tmdsclient.client.retry import RetryPolicy
 from tmdsclient.models.zaehler import Zaehler
 from tmdsclient.models.zaehler_bo_model import Zaehlertyp
 
@@ -84,6 +88,11 @@ def test_is_wasser_zaehler_false_otherwise():
     assert zaehler.is_wasser_zaehler() is False
 
 
+_ZAEHLWERKE = _get_zaehler_model().model_dump(mode="json", by_alias=True)["boModel"]["zaehlwerke"]
+_REPLACE_ZAEHLERTYP = [{"op": "replace", "path": "/boModel/zaehlertyp", "value": "WASSERZAEHLER"}]
+_APPEND_ZAEHLWERK = [{"op": "add", "path": "/boModel/zaehlwerke/-", "value": {**_ZAEHLWERKE[0], "zaehlwerkId": "neu"}}]
+
+
 class TestTmdsZaehler:
     async def test_get_zaehler_zaehler_exists_returns_zaehler(self, tmds_client_with_default_auth):
         client, settings = tmds_client_with_default_auth
@@ -105,7 +114,25 @@ class TestTmdsZaehler:
             assert any(zaehler)
             assert zaehler.id == uuid.UUID("6b024ea2-82a3-4ae9-be06-01229817373a")
 
-    async def test_set_zaehler_schmutzwasser_relevanz(self, tmds_client_with_default_auth):
+    async def test_get_zaehler_many_at_keydate(self, tmds_client_with_default_auth):
+        client, settings = tmds_client_with_default_auth
+        zaehler = _get_zaehler_model()
+        other_zaehler_id = uuid.uuid4()
+
+        with aioresponses() as mocked_tmds:
+            keydate_part = "2025-01-01T00:00:00+00:00"
+            mocked_tmds.get(
+                f"{settings.server_url}api/Zaehler/{zaehler.id}/{keydate_part}", payload=zaehler.model_dump(mode="json")
+            )
+            mocked_tmds.get(f"{settings.server_url}api/Zaehler/{other_zaehler_id}/{keydate_part}", status=404)
+            actual = await client.get_zaehler_many(
+                [zaehler.id, other_zaehler_id], keydate=datetime(2025, 1, 1, tzinfo=UTC), max_concurrency=1
+            )
+
+        assert actual == {zaehler.id: zaehler, other_zaehler_id: None}
+
+    @pytest.mark.parametrize("as_json_string", [True, False])
+    async def test_set_zaehler_schmutzwasser_relevanz(self, tmds_client_with_default_auth, as_json_string: bool):
         client, settings = tmds_client_with_default_auth
         zaehler_id = uuid.UUID("6b024ea2-82a3-4ae9-be06-01229817373a")
         zaehler_with_updated_swr = _get_zaehler_model()
@@ -118,7 +145,11 @@ class TestTmdsZaehler:
             mocked_tmds.post(
                 mocked_post_url,
                 status=200,
-                payload=zaehler_with_updated_swr.model_dump_json(by_alias=True),
+                payload=(
+                    zaehler_with_updated_swr.model_dump_json(by_alias=True)
+                    if as_json_string
+                    else zaehler_with_updated_swr.model_dump(mode="json", by_alias=True)
+                ),
             )
             was_set_successfully = await client.set_schmutzwasser_relevanz(zaehler_id, True)
             assert was_set_successfully is True
@@ -153,3 +184,96 @@ class TestTmdsZaehler:
         assert actual.boModel is not None
         assert actual.boModel.zaehlertyp is not None
         assert actual.boModel.zaehlertyp == Zaehlertyp.WASSERZAEHLER
+
+    async def test_update_zaehler_many(self, tmds_client_with_default_auth) -> None:
+        zaehler_json = _get_zaehler_model().model_dump(mode="json", by_alias=True)
+        client, tmds_config = tmds_client_with_default_auth
+        changed_id, unchanged_id, missing_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+        def change_zaehlertyp_to_wasserzaehler(_zaehler: Zaehler) -> None:
+            _zaehler.boModel.zaehlertyp = Zaehlertyp.WASSERZAEHLER
+
+        def keep_zaehlertyp(_zaehler: Zaehler) -> None:
+            _zaehler.boModel.zaehlertyp = Zaehlertyp.DREHSTROMZAEHLER
+
+        def patch_endpoint_callback(url, **kwargs):  # pylint:disable=unused-argument
+            return CallbackResult(status=200, payload=JsonPatch(kwargs["json"]).apply(zaehler_json))
+
+        items = [
+            BulkUpdateItem[Zaehler](entity_id=changed_id, changes=[change_zaehlertyp_to_wasserzaehler]),
+            BulkUpdateItem[Zaehler](entity_id=unchanged_id, changes=[keep_zaehlertyp]),
+            BulkUpdateItem[Zaehler](entity_id=missing_id, changes=[change_zaehlertyp_to_wasserzaehler]),
+        ]
+        with aioresponses() as mocked_tmds:
+            for zaehler_id in [changed_id, unchanged_id]:
+                mocked_tmds.get(f"{tmds_config.server_url}api/Zaehler/{zaehler_id}", status=200, payload=zaehler_json)
+            mocked_tmds.get(f"{tmds_config.server_url}api/Zaehler/{missing_id}", status=404)
+            # only the changed zaehler must be patched
+            mocked_tmds.patch(f"{tmds_config.server_url}api/v2/Zaehler/{changed_id}", callback=patch_endpoint_callback)
+            actual = await client.update_zaehler_many(items, track_changes=True)
+        assert [outcome.item for outcome in actual.outcomes] == items
+        assert [outcome.success for outcome in actual.outcomes] == [True, True, False]
+        assert [outcome.has_been_patched for outcome in actual.outcomes] == [True, False, False]
+        assert actual.outcomes[0].entity is not None
+        assert actual.outcomes[0].entity.boModel.zaehlertyp == Zaehlertyp.WASSERZAEHLER
+        assert actual.summary.number_of_failures == 1
+        assert actual.summary.failures_by_reason == {"ValueError": 1}
+
+    @pytest.mark.parametrize(
+        "json_patch, guard_against_concurrent_modification, expected_number_of_patch_requests, expected_failures",
+        [
+            pytest.param(_REPLACE_ZAEHLERTYP, False, 2, {}, id="replace is retried"),
+            pytest.param(_REPLACE_ZAEHLERTYP, True, 2, {}, id="guarded replace is retried"),
+            pytest.param(_APPEND_ZAEHLWERK, False, 1, {"HTTP 502": 1}, id="append is not retried"),
+            pytest.param(_APPEND_ZAEHLWERK, True, 1, {"HTTP 502": 1}, id="guarded append is not retried"),
+            pytest.param(
+                [{"op": "test", "path": "/boModel/zaehlwerke", "value": _ZAEHLWERKE}, *_APPEND_ZAEHLWERK],
+                False,
+                2,
+                {"HTTP 409": 1},
+                id="append with test of the list is retried but rejected",
+            ),
+        ],
+    )
+    async def test_update_zaehler_many_does_not_apply_a_sent_patch_twice(
+        self,
+        tmds_client_with_default_auth,
+        json_patch: list[dict[str, Any]],
+        guard_against_concurrent_modification: bool,
+        expected_number_of_patch_requests: int,
+        expected_failures: dict[str, int],
+    ) -> None:
+        server_state = _get_zaehler_model().model_dump(mode="json", by_alias=True)
+        client, tmds_config = tmds_client_with_default_auth
+        zaehler_id = uuid.uuid4()
+        patch_requests: list[object] = []
+
+        def get_endpoint_callback(url, **kwargs):  # pylint:disable=unused-argument
+            return CallbackResult(status=200, payload=server_state)
+
+        def patch_endpoint_callback(url, **kwargs):  # pylint:disable=unused-argument
+            nonlocal server_state
+            patch_requests.append(kwargs["json"])
+            try:
+                server_state = JsonPatch(kwargs["json"]).apply(server_state)
+            except JsonPatchTestFailed:
+                return CallbackResult(status=409, reason="Conflict")
+            if len(patch_requests) == 1:
+                # the patch has been applied, but the response doesn't reach the client
+                return CallbackResult(status=502, reason="Bad Gateway")
+            return CallbackResult(status=200, payload=server_state)
+
+        with aioresponses() as mocked_tmds:
+            mocked_get_url = f"{tmds_config.server_url}api/Zaehler/{zaehler_id}"
+            mocked_tmds.get(mocked_get_url, callback=get_endpoint_callback, repeat=True)
+            mocked_patch_url = f"{tmds_config.server_url}api/v2/Zaehler/{zaehler_id}"
+            mocked_tmds.patch(mocked_patch_url, callback=patch_endpoint_callback, repeat=True)
+            actual = await client.update_zaehler_many(
+                [BulkUpdateItem[Zaehler](entity_id=zaehler_id, changes=json_patch)],
+                retry_policy=RetryPolicy(initial_backoff=timedelta(0)),
+                guard_against_concurrent_modification=guard_against_concurrent_modification,
+            )
+        assert len(patch_requests) == expected_number_of_patch_requests
+        assert actual.summary.failures_by_reason == expected_failures
+        number_of_appended_zaehlwerke = sum(operation["op"] == "add" for operation in json_patch)
+        assert len(server_state["boModel"]["zaehlwerke"]) == len(_ZAEHLWERKE) + number_of_appended_zaehlwerke